@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import numpy as np
+import scipy.sparse as sp
+
+#===============================================================
+# CONDICIONES DE CONTORNO (APOYOS)
+# En lugar de eliminar filas y columnas con np.delete, que copia la
+# matriz completa cada vez, se guardan los índices de los gdl libres (l)
+# y fijos (s). La matriz se divide en bloques sin pasar a densa:
+#
+#     | K_ll  K_ls | | u_l |   | F_l |
+#     | K_sl  K_ss | | u_s | = | F_s + R |
+#
+#     K_ll u_l = F_l - K_ls u_s
+#     R = K_sl u_l + K_ss u_s - F_s   (reacciones)
+#
+# También se ofrece el método de penalización: se suma un número muy
+# grande en la diagonal de los gdl fijos, sin cambiar la estructura de
+# términos no nulos de la matriz dispersa.
+#===============================================================
+
+# Gdl impedidos de cada tipo de apoyo, con la numeración del nudo
+# (0: ux, 1: uy, 2: giro)
+TIPOS_APOYO = {
+    "empotramiento": (0, 1, 2),
+    "articulacion":  (0, 1),
+    "carrito_x":     (1,),      # Se mueve en x, impide uy
+    "carrito_y":     (0,),      # Se mueve en y, impide ux
+    "deslizante_x":  (1, 2),    # Se mueve en x, impide uy y el giro
+    "deslizante_y":  (0, 2),    # Se mueve en y, impide ux y el giro
+}
+
+# Apoyos de los nudos de celosías 3D (0: ux, 1: uy, 2: uz)
+TIPOS_APOYO_3D = {
+    "fijo":          (0, 1, 2),
+    "deslizante_xy": (2,),      # Se mueve en el plano xy, impide uz
+    "deslizante_xz": (1,),      # Se mueve en el plano xz, impide uy
+    "deslizante_yz": (0,),      # Se mueve en el plano yz, impide ux
+    "guia_x":        (1, 2),    # Se mueve en x, impide uy y uz
+    "guia_y":        (0, 2),    # Se mueve en y, impide ux y uz
+    "guia_z":        (0, 1),    # Se mueve en z, impide ux y uy
+}
+
+#---------------------------------------------------------------
+# Clase Apoyos
+# Inicialización: A partir de la numeración de gdl (n_nudos, 3)
+# Funciones de la clase:
+#     agrega(nudo, tipo, valores): Apoyo en un nudo (indexando desde 0)
+#         tipo: nombre de TIPOS_APOYO, o lista de gdl del nudo
+#         valores: desplazamientos impuestos en esos gdl (por defecto 0)
+#         Los gdl que el nudo no tiene (número -1, p.ej. el giro de un
+#         nudo de barras A2D) no se imponen
+#     agrega_gdl(gdl, valores): Impone directamente gdl globales
+#     gdl_fijos, gdl_libres, u_fijos: índices y valores impuestos
+#     particiona(K): bloques K_ll, K_ls, K_sl, K_ss dispersos
+#     penaliza(K, F): K y F modificados por penalización
+#     reacciones(K, u, F): Reacciones en los gdl fijos
+# Apoyos3D es igual, con los tipos de TIPOS_APOYO_3D (celosías 3D)
+#---------------------------------------------------------------
+class Apoyos:
+    """ Clase para representar los apoyos de un modelo """
+    TIPOS = TIPOS_APOYO
+
+    def __init__(self, numeracion):
+        self.numeracion = np.asarray(numeracion)
+        self.n_gdl = int(self.numeracion.max()) + 1 if self.numeracion.size else 0
+        self._valores = {}
+
+    def agrega(self, nudo, tipo="empotramiento", valores=None):
+        if isinstance(tipo, str):
+            if tipo not in self.TIPOS:
+                raise ValueError("Tipo de apoyo desconocido: " + tipo)
+            tipo = self.TIPOS[tipo]
+        gdl = self.numeracion[nudo][list(tipo)]
+        existe = gdl >= 0
+        if valores is not None:
+            valores = np.broadcast_to(np.asarray(valores, dtype=float), gdl.shape)[existe]
+        self.agrega_gdl(gdl[existe], valores)
+        return self
+
+    def agrega_gdl(self, gdl, valores=None):
+        gdl = np.atleast_1d(np.asarray(gdl, dtype=np.int64))
+        if valores is None:
+            valores = np.zeros(gdl.shape)
+        valores = np.broadcast_to(np.asarray(valores, dtype=float), gdl.shape)
+        for g, v in zip(gdl, valores):
+            self._valores[int(g)] = float(v)
+        return self
+
+    @property
+    def gdl_fijos(self):
+        return np.array(sorted(self._valores), dtype=np.int64)
+
+    @property
+    def gdl_libres(self):
+        return np.setdiff1d(np.arange(self.n_gdl), self.gdl_fijos)
+
+    @property
+    def u_fijos(self):
+        """ Desplazamientos impuestos, en el orden de gdl_fijos """
+        return np.array([self._valores[g] for g in sorted(self._valores)])
+
+# División de K en bloques libres (l) / fijos (s). Los bloques siguen
+# siendo matrices dispersas: sólo se copian los términos no nulos.
+    def particiona(self, K):
+        K = sp.csr_matrix(K)
+        l = self.gdl_libres
+        s = self.gdl_fijos
+        K_l = K[l]
+        K_s = K[s]
+        return K_l[:, l], K_l[:, s], K_s[:, l], K_s[:, s]
+
+# Fuerzas en los gdl libres, descontando el efecto de los desplazamientos
+# impuestos: F_l - K_ls u_s. F puede ser (n_gdl) o (n_gdl, n_casos)
+    def fuerzas_libres(self, K, F):
+        F = np.asarray(F, dtype=float)
+        F_l = F[self.gdl_libres]
+        u_s = self.u_fijos
+        if np.any(u_s != 0):
+            K_ls = sp.csr_matrix(K)[self.gdl_libres][:, self.gdl_fijos]
+            K_u = K_ls @ u_s
+            F_l = F_l - (K_u if F.ndim == 1 else K_u[:, None])
+        return F_l
+
+# Método de penalización: K_ss + alfa, F_s = alfa * u_s
+#     alfa = factor * máximo de la diagonal de K
+#     La estructura de la matriz no cambia (sólo se modifica la diagonal)
+    def penaliza(self, K, F=None, factor=1E8):
+        K = sp.csr_matrix(K, copy=True)
+        K.sort_indices()
+        diagonal = K.diagonal()
+        alfa = self.alfa_penalizacion(K, factor)
+        diagonal[self.gdl_fijos] += alfa
+        K.setdiag(diagonal)
+        if F is None:
+            return K
+        return K, self.fuerzas_penalizadas(F, alfa)
+
+    def alfa_penalizacion(self, K, factor=1E8):
+        return factor * np.max(np.abs(sp.csr_matrix(K).diagonal()))
+
+# Vector de fuerzas del método de penalización, con alfa ya calculado
+    def fuerzas_penalizadas(self, F, alfa):
+        F = np.array(F, dtype=float)
+        F[self.gdl_fijos] = alfa * (self.u_fijos if F.ndim == 1 else self.u_fijos[:, None])
+        return F
+
+# Reacciones R = K_sl u_l + K_ss u_s - F_s, con las filas "s" de K
+    def reacciones(self, K, u, F=None):
+        s = self.gdl_fijos
+        R = sp.csr_matrix(K)[s] @ np.asarray(u, dtype=float)
+        if F is not None:
+            R = R - np.asarray(F, dtype=float)[s]
+        return R
+
+class Apoyos3D(Apoyos):
+    """ Apoyos de los nudos de una celosía 3D (ux, uy, uz) """
+    TIPOS = TIPOS_APOYO_3D
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import numpy as np
+import scipy.sparse as sp
+
+from rigidez import k_p2d_local_lote, condensa_lote
+
+#===============================================================
+# CARGAS EN BARRAS P2D: FUERZAS DE EMPOTRAMIENTO
+# Las fuerzas de empotramiento F_emp son las fuerzas en los extremos de
+# la barra con los dos extremos empotrados, con el mismo criterio de
+# signos que los desplazamientos (ux, uy, giro) de cada extremo:
+#
+#     P = K u + F_emp      (fuerzas en los extremos de la barra)
+#     K u = F - F_emp      (sistema de ecuaciones de la estructura)
+#
+# Ejemplo: carga uniforme q hacia abajo (q_y = -q) en una barra
+# horizontal de longitud L:
+#     F_emp = (0, q L/2, q L^2/12, 0, q L/2, -q L^2/12)
+#
+# Las cargas se dan en ejes locales (x' según la barra, de p1 a p2) o
+# globales (X, Y). Las cargas repartidas son por unidad de longitud de
+# la barra. Todas las funciones calculan muchas cargas a la vez.
+#===============================================================
+
+#---------------------------------------------------------------
+# Función emp_trapecial: Carga repartida lineal en toda la barra
+#     L: longitudes
+#     px1, px2: carga axial (según x') en los nudos inicial y final
+#     py1, py2: carga transversal (según y') en los nudos inicial y final
+#     Salida: F_emp en locales, (n,6). Con px1 = px2, py1 = py2 es la
+#             carga uniforme
+#---------------------------------------------------------------
+def emp_trapecial(L, px1=0., px2=0., py1=0., py2=0.):
+    """ Fuerzas de empotramiento (n,6) de cargas lineales, en locales """
+    L, px1, px2, py1, py2 = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(a, dtype=float)) for a in (L, px1, px2, py1, py2)])
+    F = np.empty((L.shape[0], 6))
+    F[:, 0] = -L / 6 * (2 * px1 + px2)
+    F[:, 3] = -L / 6 * (px1 + 2 * px2)
+    F[:, 1] = -L / 20 * (7 * py1 + 3 * py2)
+    F[:, 4] = -L / 20 * (3 * py1 + 7 * py2)
+    F[:, 2] = -L**2 / 60 * (3 * py1 + 2 * py2)
+    F[:, 5] = L**2 / 60 * (2 * py1 + 3 * py2)
+    return F
+
+#---------------------------------------------------------------
+# Función emp_puntual: Carga puntual (Px', Py') a distancia a del nudo
+# inicial (0 <= a <= L)
+#     Salida: F_emp en locales, (n,6)
+#---------------------------------------------------------------
+def emp_puntual(L, a, Px=0., Py=0.):
+    """ Fuerzas de empotramiento (n,6) de cargas puntuales, en locales """
+    L, a, Px, Py = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(v, dtype=float)) for v in (L, a, Px, Py)])
+    b = L - a
+    F = np.empty((L.shape[0], 6))
+    F[:, 0] = -Px * b / L
+    F[:, 3] = -Px * a / L
+    F[:, 1] = -Py * b**2 * (3 * a + b) / L**3
+    F[:, 4] = -Py * a**2 * (a + 3 * b) / L**3
+    F[:, 2] = -Py * a * b**2 / L**2
+    F[:, 5] = Py * a**2 * b / L**2
+    return F
+
+#---------------------------------------------------------------
+# Función emp_termica: Variación de temperatura en la barra
+#     EA, EI: rigideces de cada barra
+#     alfa: coeficiente de dilatación térmica
+#     dT: incremento de temperatura uniforme
+#     dT_grad: diferencia de temperatura entre la cara +y' y la cara -y'
+#     canto: canto de la sección (distancia entre las dos caras)
+#     Salida: F_emp en locales, (n,6)
+#---------------------------------------------------------------
+def emp_termica(EA, EI, alfa, dT=0., dT_grad=0., canto=1.):
+    """ Fuerzas de empotramiento (n,6) de cargas térmicas, en locales """
+    EA, EI, alfa, dT, dT_grad, canto = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(v, dtype=float)) for v in (EA, EI, alfa, dT, dT_grad, canto)])
+    N = EA * alfa * dT
+    M = EI * alfa * dT_grad / canto
+    F = np.zeros((EA.shape[0], 6))
+    F[:, 0] = N
+    F[:, 3] = -N
+    F[:, 2] = -M
+    F[:, 5] = M
+    return F
+
+#---------------------------------------------------------------
+# Funciones a_locales, a_globales: Cambio de base de cargas y fuerzas
+#     a_locales(angulo, vx, vy): componentes (X, Y) -> (x', y')
+#     a_globales(angulo, F): F_emp (n,6) en locales -> globales
+#---------------------------------------------------------------
+def a_locales(angulo, vx, vy):
+    """ Componentes locales (x', y') de vectores dados en globales """
+    c, s = np.cos(angulo), np.sin(angulo)
+    return c * vx + s * vy, c * vy - s * vx
+
+def a_globales(angulo, F):
+    """ F_emp (n,6) en globales, a partir de locales """
+    c, s = np.cos(angulo)[:, None], np.sin(angulo)[:, None]
+    G = np.array(F, dtype=float)
+    G[:, 0::3] = c * F[:, 0::3] - s * F[:, 1::3]
+    G[:, 1::3] = s * F[:, 0::3] + c * F[:, 1::3]
+    return G
+
+#---------------------------------------------------------------
+# Clase CargasBarras: Conjunto de cargas en un grupo de n barras P2D
+# Inicialización:
+#     L, angulo: longitudes y ángulos (radianes) de las barras
+#     EA, EI: rigideces (sólo para cargas térmicas y barras con gdl
+#             liberados)
+#     liberados: máscara (n,6) o lista de gdl locales condensados en
+#                todas las barras (ver rigidez.condensa_lote)
+# Las cargas se añaden con un índice o vector de índices de barras
+# (desde 0) y "ejes" = "locales" o "globales":
+#     uniforme(barras, qx, qy, ejes)
+#     trapecial(barras, qx1, qy1, qx2, qy2, ejes)
+#     puntual(barras, a, Px, Py, ejes)
+#     termica(barras, alfa, dT, dT_grad, canto)
+# Funciones de la clase:
+#     empotramiento(ejes): F_emp (n,6) de cada barra, en globales o en
+#                      locales, sumando todas sus cargas (cada tipo en
+#                      una sola llamada)
+#     lista(tipo): (barras, valores) de todas las cargas de un tipo
+#     fuerzas_nudos(gdl_e, n_gdl): vector (n_gdl) de cargas en los nudos,
+#                      F = -suma de F_emp (ver ensamblaje.gdl_elementos)
+#---------------------------------------------------------------
+class CargasBarras:
+    """ Clase para representar las cargas de un grupo de barras P2D """
+    def __init__(self, L, angulo, EA=0., EI=0., liberados=None):
+        self.L = np.atleast_1d(np.asarray(L, dtype=float))
+        self.n = self.L.shape[0]
+        self.angulo = np.broadcast_to(np.asarray(angulo, dtype=float), (self.n,))
+        self.EA = np.broadcast_to(np.asarray(EA, dtype=float), (self.n,))
+        self.EI = np.broadcast_to(np.asarray(EI, dtype=float), (self.n,))
+        self.liberados = liberados
+        self._cargas = {"trapecial": [], "puntual": [], "termica": []}
+
+    @classmethod
+    def desde_estructura(cls, estructura, barras, liberados=None):
+        """ Cargas de las barras P2D "barras" de una Estructura (tablas.py) """
+        return cls(estructura.longitudes(barras), estructura.angulos(barras),
+                   estructura.ea(barras), estructura.ei(barras), liberados)
+
+    def _locales(self, barras, vx, vy, ejes):
+        if ejes == "locales":
+            return vx, vy
+        if ejes != "globales":
+            raise ValueError("Ejes desconocidos: " + str(ejes))
+        return a_locales(self.angulo[barras], vx, vy)
+
+    def _agrega(self, tipo, barras, *valores):
+        barras = np.atleast_1d(np.asarray(barras, dtype=np.int64))
+        barras, *valores = np.broadcast_arrays(barras, *[np.asarray(v, dtype=float)
+                                                          for v in valores])
+        self._cargas[tipo].append((barras.copy(), np.stack(valores, axis=1)))
+        return self
+
+    def uniforme(self, barras, qx=0., qy=0., ejes="locales"):
+        return self.trapecial(barras, qx, qy, qx, qy, ejes)
+
+    def trapecial(self, barras, qx1=0., qy1=0., qx2=0., qy2=0., ejes="locales"):
+        px1, py1 = self._locales(barras, qx1, qy1, ejes)
+        px2, py2 = self._locales(barras, qx2, qy2, ejes)
+        return self._agrega("trapecial", barras, px1, px2, py1, py2)
+
+    def puntual(self, barras, a, Px=0., Py=0., ejes="locales"):
+        if np.any(np.asarray(a) < 0) or np.any(np.asarray(a) > self.L[barras]):
+            raise ValueError("La carga puntual debe estar entre los dos nudos de la barra")
+        Px, Py = self._locales(barras, Px, Py, ejes)
+        return self._agrega("puntual", barras, a, Px, Py)
+
+    def termica(self, barras, alfa, dT=0., dT_grad=0., canto=1.):
+        return self._agrega("termica", barras, alfa, dT, dT_grad, canto)
+
+# Todas las cargas de un mismo tipo se juntan y se calculan de una vez
+    def lista(self, tipo):
+        registros = self._cargas[tipo]
+        if not registros:
+            return None, None
+        return (np.concatenate([r[0] for r in registros]),
+                np.concatenate([r[1] for r in registros]))
+
+    def empotramiento(self, ejes="globales"):
+        """ Fuerzas de empotramiento (n,6) de cada barra """
+        F = np.zeros((self.n, 6))
+        barras, v = self.lista("trapecial")
+        if barras is not None:
+            np.add.at(F, barras, emp_trapecial(self.L[barras], *v.T))
+        barras, v = self.lista("puntual")
+        if barras is not None:
+            np.add.at(F, barras, emp_puntual(self.L[barras], *v.T))
+        barras, v = self.lista("termica")
+        if barras is not None:
+            np.add.at(F, barras, emp_termica(self.EA[barras], self.EI[barras], *v.T))
+
+# Extremos articulados: se condensan las fuerzas en locales
+        if self.liberados is not None:
+            K_L = k_p2d_local_lote(self.EA, self.EI, self.L)
+            F = condensa_lote(K_L, self.liberados, F)[2]
+        return F if ejes == "locales" else a_globales(self.angulo, F)
+
+# Ensamblaje disperso del vector de cargas: ternas (gdl, valor)
+    def fuerzas_nudos(self, gdl_e, n_gdl):
+        """ Vector (n_gdl) de fuerzas en los nudos: -suma de F_emp """
+        F = self.empotramiento()
+        gdl_e = np.asarray(gdl_e, dtype=np.int64)
+        existe = gdl_e >= 0 # Los gdl liberados (-1) tienen F_emp nula
+        filas = gdl_e[existe]
+        return -sp.coo_matrix((F[existe], (filas, np.zeros_like(filas))),
+                              shape=(n_gdl, 1)).toarray()[:, 0]
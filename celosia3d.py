@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import numpy as np
+
+from rigidez import geometria_3d_lote, axiles_a3d_lote
+from ensamblaje import ensambla_a3d, gdl_elementos
+from modelo import Modelo, DESPLAZAMIENTOS_3D
+from tablas import TIPO_A3D
+
+#===============================================================
+# CELOSÍAS 3D (BARRAS A3D)
+# Es el mismo cálculo que la clase A3D de py0201coordenadas.py, pero
+# para todas las barras a la vez: M_LG * K_L * M_LG^T se reduce a los
+# bloques EA/L * v v^T, que se calculan por lotes (k_a3d_lote) y se
+# ensamblan en una matriz dispersa. Cada nudo tiene 3 gdl (ux, uy, uz).
+# Los apoyos se dan con un objeto Apoyos3D (ver apoyos.py) o con la
+# lista de gdl impedidos.
+#
+# Por defecto se factoriza con Cholesky en banda tras reordenar con RCM,
+# que en celosías 3D de unos miles de nudos es bastante más rápido que
+# metodo = "dispersa" (SuperLU con reordenación de mínimo grado).
+#===============================================================
+
+#---------------------------------------------------------------
+# Clase Celosia3D (hereda de Modelo)
+# Inicialización:
+#     coords: matriz (n_nudos,3) de coordenadas
+#     conect: matriz (n_barras,2) de nudos de cada barra (desde 0)
+#     ea: vector (n_barras) de EA, o escalar común
+#     apoyos, metodo, modo: igual que en Modelo
+# Funciones de la clase:
+#     desde_estructura: Construye la celosía con las barras A3D de una
+#                       Estructura (tablas.py)
+#     resuelve(F): Desplazamientos (ux, uy, uz) de los nudos
+#     axiles(F): Esfuerzo axil de cada barra (positivo a tracción)
+#---------------------------------------------------------------
+class Celosia3D(Modelo):
+    """ Clase para representar una celosía 3D de barras A3D """
+    DESPLAZAMIENTOS = DESPLAZAMIENTOS_3D
+
+    def __init__(self, coords, conect, ea, apoyos=(), metodo="banda", modo="particion"):
+        self.coords = np.asarray(coords, dtype=float).reshape(-1, 3)
+        self.conect = np.asarray(conect, dtype=np.int64).reshape(-1, 2)
+        self.ea = np.broadcast_to(np.asarray(ea, dtype=float), (self.conect.shape[0],))
+        self.L, self.v = geometria_3d_lote(self.coords[self.conect[:, 0]],
+                                           self.coords[self.conect[:, 1]])
+        K, numeracion = ensambla_a3d(self.coords, self.conect, self.ea)
+        super().__init__(K, numeracion, apoyos, metodo, modo)
+        self.gdl_barras = gdl_elementos(self.conect, numeracion, (0, 1, 2))
+
+    @classmethod
+    def desde_estructura(cls, estructura, apoyos=(), metodo="banda", modo="particion"):
+        """ Celosía con las barras A3D de una Estructura (tablas.py) """
+        a3d = estructura.de_tipo(TIPO_A3D)
+        return cls(estructura.nudos["xyz"], estructura.barras["nudos"][a3d],
+                   estructura.ea(a3d), apoyos, metodo, modo)
+
+# Axiles de todas las barras a la vez: se toman los desplazamientos de
+# los extremos (n_barras, 6[, n_casos]) y N = EA/L * v . (u2 - u1)
+    def axiles(self, F):
+        u = self.resuelve_gdl(F)
+        return axiles_a3d_lote(self.ea, self.L, self.v, u[self.gdl_barras])
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import numpy as np
+import scipy.sparse as sp
+
+from rigidez import (geometria_lote, geometria_3d_lote, k_p2d_local_lote, m_lg_p2d_lote,
+                     m_p2d_local_lote, m_p2d_lote, m_a2d_lote, m_a3d_lote, condensa_lote)
+from ensamblaje import gdl_elementos, tripletes, ensambla_coo
+from resolucion import autovalores_inversos
+
+#===============================================================
+# ANÁLISIS MODAL (FRECUENCIAS Y MODOS DE VIBRACIÓN)
+#     1) Se ensambla la matriz de masa M, dispersa, con las matrices de
+#        las barras (rigidez.m_p2d_lote, m_a2d_lote, m_a3d_lote)
+#     2) K phi = omega^2 M phi en los gdl libres: omega es la frecuencia
+#        angular (rad/s) y phi el modo. f = omega / (2 pi) en Hz
+# Se buscan las menores omega con la factorización de K del modelo
+# (ver resolucion.autovalores_inversos), como en pandeo.py.
+# Con masas concentradas M es diagonal: se guarda como matriz dispersa
+# diagonal, de n_gdl valores. Los giros no tienen masa, y sólo hay
+# tantos modos como gdl con masa.
+# La masa por unidad de longitud de las barras es m = rho * A (ver
+# tablas.Estructura.masas). Las unidades de m deben ser coherentes con
+# las de K: con kN y m, m en t/m da omega en rad/s.
+#===============================================================
+
+# Matriz M dispersa a partir de los pares (M_e, gdl_e) de cada grupo de
+# barras. Con masas concentradas sólo se suman las diagonales
+def _ensambla_masa(grupos, n_gdl, concentrada):
+    if concentrada:
+        diagonal = np.zeros(n_gdl)
+        for M_e, gdl_e in grupos:
+            existe = gdl_e >= 0
+            diagonal += np.bincount(gdl_e[existe],
+                                    weights=np.diagonal(M_e, axis1=1, axis2=2)[existe],
+                                    minlength=n_gdl)
+        return sp.diags(diagonal, format="csr")
+    if not grupos:
+        return ensambla_coo(np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0), n_gdl)
+    ternas = [tripletes(M_e, gdl_e) for M_e, gdl_e in grupos]
+    return ensambla_coo(*[np.concatenate(t) for t in zip(*ternas)], n_gdl)
+
+#---------------------------------------------------------------
+# Función masa_tablas: Matriz de masa global de barras P2D y A2D
+#     coords, conect_p2d, conect_a2d: como en ensamblaje.ensambla_tablas
+#     m_p2d, m_a2d: masa por unidad de longitud de cada barra
+#     concentrada: True para masas concentradas (M diagonal)
+#     liberados_p2d: gdl locales condensados de las barras P2D, como en
+#         ensambla_tablas. Con masa consistente se usa T^T M T, siendo
+#         u = T u_r la recuperación de la condensación estática (por
+#         eso hacen falta ea_p2d y ei_p2d). Con masas concentradas los
+#         giros liberados no tienen masa, y la de las traslaciones
+#         liberadas no se tiene en cuenta
+#     Salida: matriz CSR (n_gdl, n_gdl)
+#---------------------------------------------------------------
+def masa_tablas(coords, numeracion, conect_p2d=None, m_p2d=0., conect_a2d=None, m_a2d=0.,
+                concentrada=False, ea_p2d=0., ei_p2d=0., liberados_p2d=None):
+    """ Matriz de masa global dispersa """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    n_gdl = int(np.max(numeracion)) + 1
+    conect_p2d = np.asarray(conect_p2d if conect_p2d is not None else [],
+                            dtype=np.int64).reshape(-1, 2)
+    conect_a2d = np.asarray(conect_a2d if conect_a2d is not None else [],
+                            dtype=np.int64).reshape(-1, 2)
+    grupos = []
+
+    if conect_p2d.shape[0] > 0:
+        c = conect_p2d
+        L, angulo = geometria_lote(coords[c[:, 0], 0], coords[c[:, 0], 1],
+                                   coords[c[:, 1], 0], coords[c[:, 1], 1])
+        if liberados_p2d is None or concentrada:
+            M = m_p2d_lote(m_p2d, L, angulo, concentrada)
+        else:
+            T = condensa_lote(k_p2d_local_lote(ea_p2d, ei_p2d, L), liberados_p2d)[1]
+            M_LG = m_lg_p2d_lote(angulo)
+            M = M_LG @ T.transpose(0, 2, 1) @ m_p2d_local_lote(m_p2d, L) @ T \
+                @ M_LG.transpose(0, 2, 1)
+        grupos.append((M, gdl_elementos(c, numeracion, (0, 1, 2), liberados_p2d)))
+    if conect_a2d.shape[0] > 0:
+        c = conect_a2d
+        L = geometria_lote(coords[c[:, 0], 0], coords[c[:, 0], 1],
+                           coords[c[:, 1], 0], coords[c[:, 1], 1])[0]
+        grupos.append((m_a2d_lote(m_a2d, L, concentrada), gdl_elementos(c, numeracion, (0, 1))))
+    return _ensambla_masa(grupos, n_gdl, concentrada)
+
+#---------------------------------------------------------------
+# Función masa_a3d: Lo mismo para celosías 3D
+#     coords: matriz (n_nudos,3). numeracion: 3 gdl por nudo
+#---------------------------------------------------------------
+def masa_a3d(coords, conect, m, numeracion, concentrada=False):
+    """ Matriz de masa global dispersa de una celosía 3D """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 3)
+    conect = np.asarray(conect, dtype=np.int64).reshape(-1, 2)
+    L = geometria_3d_lote(coords[conect[:, 0]], coords[conect[:, 1]])[0]
+    return _ensambla_masa([(m_a3d_lote(m, L, concentrada), gdl_elementos(conect, numeracion))],
+                          int(np.max(numeracion)) + 1, concentrada)
+
+#---------------------------------------------------------------
+# Función modos_vibracion: Frecuencias y modos de vibración
+#     modelo: Modelo (modelo.py) con la matriz K ensamblada y los apoyos.
+#             Se usa la factorización de K_ll del modelo (ver
+#             Modelo.rigidez_libres; si ya se ha resuelto, no se repite)
+#     M: matriz de masa (masa_tablas, masa_a3d)
+#     n_modos: número de modos pedidos
+#     Salida: (omega, modos). omega: frecuencias angulares en rad/s, de
+#             menor a mayor; modos: matriz (n_gdl, n) con los modos,
+#             normalizados con phi^T M phi = 1, y ceros en los gdl fijos
+#---------------------------------------------------------------
+def modos_vibracion(modelo, M, n_modos=6):
+    """ Menores frecuencias de K phi = omega^2 M phi """
+    K_ll, factorizacion = modelo.rigidez_libres()
+    M_ll = modelo.apoyos.particiona(M)[0]
+    mu, phi = autovalores_inversos(M_ll, K_ll, factorizacion, n_modos)
+
+# mu = 1 / omega^2. Los mu nulos son de gdl sin masa
+    validos = mu > mu[0] * 1E-12
+    omega = 1. / np.sqrt(mu[validos])
+    phi = phi[:, validos]
+    phi /= np.sqrt(np.einsum("ij,ij->j", phi, M_ll @ phi))
+    modos = np.zeros((modelo.n_gdl, omega.size))
+    modos[modelo.gdl_libres] = phi
+    return omega, modos
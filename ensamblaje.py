@@ -0,0 +1,478 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import scipy.sparse as sp
+
+from rigidez import (geometria_lote, geometria_3d_lote, ejes_locales_lote, k_p2d_lote,
+                     k_p2d_local_lote, m_lg_p2d_lote, k_a2d_lote, k_a3d_lote, k_p3d_lote,
+                     mascara_gdl, condensa_lote)
+from tablas import TIPO_P2D, TIPO_A2D
+
+#===============================================================
+# ENSAMBLAJE DISPERSO DE LA MATRIZ DE RIGIDEZ
+# Numeración automática de gdl y ensamblaje en formato COO -> CSR.
+# La memoria necesaria es proporcional al número de términos no nulos,
+# y no al cuadrado del número de gdl como en np.zeros([n,n]).
+#
+# En las estructuras P2D - A2D cada nudo tiene sólo los gdl a los que
+# llega alguna barra (numera_gdl_barras): un nudo al que sólo llegan
+# barras A2D o extremos articulados no tiene giro. Los gdl que no
+# existen tienen número de ecuación -1, y sus términos se descartan al
+# ensamblar. No hace falta ampliar con ceros las matrices de las barras.
+#===============================================================
+
+#---------------------------------------------------------------
+# Función numera_gdl: Numeración de los gdl de los nudos
+#     Cada nudo tiene 3 gdl (ux, uy, giro). El nudo i tiene los gdl
+#     3i, 3i+1, 3i+2 (indexando desde 0, como Python).
+#     Salida: matriz (n_nudos,3) con el número de ecuación de cada gdl
+#---------------------------------------------------------------
+def numera_gdl(n_nudos, gdl_nudo=3):
+    """ Números de ecuación (n_nudos, gdl_nudo) de cada gdl """
+    return np.arange(n_nudos * gdl_nudo).reshape(n_nudos, gdl_nudo)
+
+#---------------------------------------------------------------
+# Función numera_gdl_barras: Numeración de los gdl que usan las barras
+#     conect: matriz (n,2) de nudos de todas las barras
+#     activos: máscara (n, 2*gdl_nudo) de los gdl de los dos nudos que
+#              usa cada barra. P2D: todos; A2D: (ux, uy) de cada nudo;
+#              P2D con un extremo articulado: todos salvo ese giro
+#     Los gdl se numeran seguidos, nudo a nudo, como en numera_gdl.
+#     Salida: matriz (n_nudos, gdl_nudo) con el número de ecuación de
+#             cada gdl, o -1 si no llega ninguna barra a ese gdl
+#---------------------------------------------------------------
+def numera_gdl_barras(n_nudos, conect, activos, gdl_nudo=3):
+    """ Números de ecuación (n_nudos, gdl_nudo), -1 en los gdl sin barras """
+    conect = np.asarray(conect, dtype=np.int64).reshape(-1, 2)
+    activos = np.asarray(activos, dtype=bool).reshape(-1, 2 * gdl_nudo)
+    usados = np.zeros((n_nudos, gdl_nudo), dtype=bool)
+    np.logical_or.at(usados, conect[:, 0], activos[:, :gdl_nudo])
+    np.logical_or.at(usados, conect[:, 1], activos[:, gdl_nudo:])
+    numeracion = np.full((n_nudos, gdl_nudo), -1, dtype=np.int64)
+    numeracion[usados] = np.arange(np.count_nonzero(usados))
+    return numeracion
+
+#---------------------------------------------------------------
+# Función gdl_elementos: Gdl globales de cada barra
+#     conectividad: matriz (n,2) con los nudos inicial y final
+#     numeracion: salida de numera_gdl o numera_gdl_barras
+#     locales: gdl del nudo que usa la barra, p.ej. [0,1,2] en P2D
+#              y [0,1] en A2D
+#     liberados: opcional, gdl de la barra (máscara (n, 2*len(locales))
+#                o lista, ver rigidez.mascara_gdl) que no se unen al
+#                nudo: se les da el número -1
+#     Salida: matriz (n, 2*len(locales)) con los números de ecuación,
+#             en el mismo orden que las filas de la matriz de la barra
+#---------------------------------------------------------------
+def gdl_elementos(conectividad, numeracion, locales=(0, 1, 2), liberados=None):
+    """ Números de ecuación de los gdl de cada barra """
+    conectividad = np.asarray(conectividad, dtype=np.int64).reshape(-1, 2)
+    locales = list(locales)
+    gdl_e = np.hstack([numeracion[conectividad[:, 0]][:, locales],
+                       numeracion[conectividad[:, 1]][:, locales]])
+    if liberados is not None:
+        gdl_e[mascara_gdl(liberados, gdl_e.shape[0], gdl_e.shape[1])] = -1
+    return gdl_e
+
+#---------------------------------------------------------------
+# Función valores_gdl: Valores de un vector de gdl en una numeración
+#     u: vector (n_gdl) o matriz (n_gdl, n_casos)
+#     gdl: array de números de ecuación (numeracion, gdl_e, ...)
+#     Salida: u[gdl], con ceros en los gdl que no existen (-1)
+#---------------------------------------------------------------
+def valores_gdl(u, gdl):
+    """ u[gdl], con ceros en los gdl de número -1 """
+    u = np.asarray(u, dtype=float)
+    gdl = np.asarray(gdl, dtype=np.int64)
+    v = u[np.maximum(gdl, 0)]
+    v[gdl < 0] = 0.
+    return v
+
+#---------------------------------------------------------------
+# Función tripletes: Ternas (fila, columna, valor) en formato COO
+#     K_e: pila (n,d,d) de matrices de las barras
+#     gdl_e: matriz (n,d) de números de ecuación
+#---------------------------------------------------------------
+def tripletes(K_e, gdl_e):
+    """ Devuelve (filas, columnas, valores) de la pila de matrices """
+    d = gdl_e.shape[1]
+    filas = np.repeat(gdl_e, d, axis=1).ravel()
+    columnas = np.tile(gdl_e, (1, d)).ravel()
+    return filas, columnas, K_e.reshape(-1)
+
+#---------------------------------------------------------------
+# Función ensambla_coo: Matriz global CSR a partir de las ternas
+#     Los términos repetidos (misma fila y columna) se suman, que es
+#     precisamente la operación de ensamblaje. Las ternas de gdl que no
+#     existen (número -1) se descartan.
+#---------------------------------------------------------------
+def ensambla_coo(filas, columnas, valores, n_gdl):
+    """ Matriz dispersa CSR (n_gdl, n_gdl) a partir de ternas COO """
+    validos = (filas >= 0) & (columnas >= 0)
+    if not validos.all():
+        filas, columnas, valores = filas[validos], columnas[validos], valores[validos]
+    K = sp.coo_matrix((valores, (filas, columnas)), shape=(n_gdl, n_gdl))
+    return K.tocsr()
+
+#---------------------------------------------------------------
+# Funciones elementos_p2d, elementos_a2d: Matrices en globales y gdl de
+# un grupo de barras del mismo tipo, a partir de las tablas
+#     P2D: bloque 6x6 sobre los gdl (ux, uy, giro) de sus dos nudos
+#     A2D: bloque 4x4 sólo sobre los gdl (ux, uy) de sus dos nudos
+#     liberados: gdl locales de las barras P2D que se condensan (máscara
+#                (n,6) o lista, ver rigidez.condensa_lote). Sus filas y
+#                columnas quedan a cero y no se unen al nudo
+#     Salida: (K_e, gdl_e), pilas (n,d,d) y (n,d)
+# Funciones tripletes_p2d, tripletes_a2d: Ternas COO de esas barras
+#---------------------------------------------------------------
+def elementos_p2d(coords, conect, ea, ei, numeracion, liberados=None):
+    """ Matrices (n,6,6) y gdl (n,6) de las barras P2D """
+    L, angulo = geometria_lote(coords[conect[:, 0], 0], coords[conect[:, 0], 1],
+                               coords[conect[:, 1], 0], coords[conect[:, 1], 1])
+    if liberados is None:
+        K_e = k_p2d_lote(ea, ei, L, angulo)
+    else:
+        K_c = condensa_lote(k_p2d_local_lote(ea, ei, L), liberados)[0]
+        M_LG = m_lg_p2d_lote(angulo)
+        K_e = M_LG @ K_c @ M_LG.transpose(0, 2, 1)
+    return K_e, gdl_elementos(conect, numeracion, (0, 1, 2), liberados)
+
+def elementos_a2d(coords, conect, ea, numeracion):
+    """ Matrices (n,4,4) y gdl (n,4) de las barras A2D """
+    L, angulo = geometria_lote(coords[conect[:, 0], 0], coords[conect[:, 0], 1],
+                               coords[conect[:, 1], 0], coords[conect[:, 1], 1])
+    return k_a2d_lote(ea, L, angulo), gdl_elementos(conect, numeracion, (0, 1))
+
+def tripletes_p2d(coords, conect, ea, ei, numeracion, liberados=None):
+    """ Ternas COO de las barras P2D """
+    return tripletes(*elementos_p2d(coords, conect, ea, ei, numeracion, liberados))
+
+def tripletes_a2d(coords, conect, ea, numeracion):
+    """ Ternas COO de las barras A2D """
+    return tripletes(*elementos_a2d(coords, conect, ea, numeracion))
+
+#---------------------------------------------------------------
+# Función tripletes_a3d: Ternas COO de barras A3D
+#     coords: matriz (n_nudos,3). Bloque 6x6 sobre los gdl (ux, uy, uz)
+#     de sus dos nudos
+#---------------------------------------------------------------
+def tripletes_a3d(coords, conect, ea, numeracion):
+    """ Ternas COO de las barras A3D """
+    L, v = geometria_3d_lote(coords[conect[:, 0]], coords[conect[:, 1]])
+    K_e = k_a3d_lote(ea, L, v)
+    return tripletes(K_e, gdl_elementos(conect, numeracion, (0, 1, 2)))
+
+#---------------------------------------------------------------
+# Función tripletes_p3d: Ternas COO de barras P3D
+#     coords: matriz (n_nudos,3). Bloque 12x12 sobre los 6 gdl
+#     (ux, uy, uz, giro_x, giro_y, giro_z) de sus dos nudos
+#     giro: ángulo beta de los ejes locales de cada barra (radianes)
+#---------------------------------------------------------------
+def tripletes_p3d(coords, conect, ea, gj, eiy, eiz, giro, numeracion):
+    """ Ternas COO de las barras P3D """
+    L, v = geometria_3d_lote(coords[conect[:, 0]], coords[conect[:, 1]])
+    K_e = k_p3d_lote(ea, gj, eiy, eiz, L, ejes_locales_lote(v, giro))
+    return tripletes(K_e, gdl_elementos(conect, numeracion, range(6)))
+
+#---------------------------------------------------------------
+# Función ensambla_p3d: Ensamblaje de un pórtico 3D a partir de tablas
+#     coords: matriz (n_nudos,3) de coordenadas
+#     conect: matriz (n,2) de nudos de las barras P3D
+#     ea, gj, eiy, eiz, giro: vectores (n) o escalares comunes
+#     Salida: (K, numeracion). Cada nudo tiene 6 gdl
+#---------------------------------------------------------------
+def ensambla_p3d(coords, conect, ea, gj, eiy, eiz, giro=0.):
+    """ Matriz de rigidez global dispersa de un pórtico 3D """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 3)
+    conect = np.asarray(conect, dtype=np.int64).reshape(-1, 2)
+    numeracion = numera_gdl(coords.shape[0], 6)
+    n_gdl = numeracion.size
+    if conect.shape[0] == 0:
+        return sp.csr_matrix((n_gdl, n_gdl)), numeracion
+    f, c, v = tripletes_p3d(coords, conect, ea, gj, eiy, eiz, giro, numeracion)
+    return ensambla_coo(f, c, v, n_gdl), numeracion
+
+#---------------------------------------------------------------
+# Función ensambla_a3d: Ensamblaje de una celosía 3D a partir de tablas
+#     coords: matriz (n_nudos,3) de coordenadas
+#     conect: matriz (n,2) de nudos de las barras A3D
+#     ea: vector (n) de EA
+#     Salida: (K, numeracion). Cada nudo tiene 3 gdl (ux, uy, uz)
+#---------------------------------------------------------------
+def ensambla_a3d(coords, conect, ea):
+    """ Matriz de rigidez global dispersa de una celosía 3D """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 3)
+    conect = np.asarray(conect, dtype=np.int64).reshape(-1, 2)
+    numeracion = numera_gdl(coords.shape[0])
+    n_gdl = numeracion.size
+    if conect.shape[0] == 0:
+        return sp.csr_matrix((n_gdl, n_gdl)), numeracion
+    f, c, v = tripletes_a3d(coords, conect, ea, numeracion)
+    return ensambla_coo(f, c, v, n_gdl), numeracion
+
+#---------------------------------------------------------------
+# Función ensambla_tablas: Ensamblaje a partir de tablas
+#     coords: matriz (n_nudos,2) de coordenadas
+#     conect_p2d: matriz (n_p2d,2) de nudos de las barras P2D
+#     ea_p2d, ei_p2d: vectores (n_p2d) de EA, EI
+#     conect_a2d: matriz (n_a2d,2) de nudos de las barras A2D
+#     ea_a2d: vector (n_a2d) de EA
+#     liberados_p2d: opcional, gdl locales condensados de las barras P2D
+#                    (máscara (n_p2d,6) o lista común, p.ej. [5] para
+#                    articular el extremo final de todas)
+#     procesos: si es mayor que 1, las barras se reparten en bloques
+#               que se calculan en paralelo (ver ensambla_paralelo)
+#     Salida: (K, numeracion). K es una matriz CSR. La numeración es la
+#             de numera_gdl_barras: -1 en los gdl a los que no llega
+#             ninguna barra
+#---------------------------------------------------------------
+def ensambla_tablas(coords, conect_p2d=None, ea_p2d=0., ei_p2d=0.,
+                    conect_a2d=None, ea_a2d=0., procesos=1, tam_bloque=50000,
+                    liberados_p2d=None):
+    """ Matriz de rigidez global dispersa a partir de tablas """
+    coords, conect_p2d, conect_a2d, activos_p2d, numeracion = \
+        _numeracion_tablas(coords, conect_p2d, conect_a2d, liberados_p2d)
+    n_p2d, n_a2d = conect_p2d.shape[0], conect_a2d.shape[0]
+    n_gdl = int(numeracion.max()) + 1 if numeracion.size else 0
+
+    if procesos is not None and procesos > 1:
+        filas, columnas, valores = ensambla_paralelo(coords, numeracion,
+                                                     conect_p2d, ea_p2d, ei_p2d,
+                                                     conect_a2d, ea_a2d,
+                                                     procesos, tam_bloque,
+                                                     ~activos_p2d)
+        K = ensambla_coo(filas, columnas, valores, n_gdl)
+        return K, numeracion
+
+    filas, columnas, valores = [], [], []
+    if n_p2d > 0:
+        f, c, v = tripletes_p2d(coords, conect_p2d, ea_p2d, ei_p2d, numeracion,
+                                liberados_p2d)
+        filas.append(f)
+        columnas.append(c)
+        valores.append(v)
+    if n_a2d > 0:
+        f, c, v = tripletes_a2d(coords, conect_a2d, ea_a2d, numeracion)
+        filas.append(f)
+        columnas.append(c)
+        valores.append(v)
+
+    if not filas:
+        return sp.csr_matrix((n_gdl, n_gdl)), numeracion
+
+    K = ensambla_coo(np.concatenate(filas), np.concatenate(columnas),
+                     np.concatenate(valores), n_gdl)
+    return K, numeracion
+
+# Tablas como arrays, y numeración de los gdl que usa cada barra: todos
+# en P2D salvo los liberados, y sin giros en A2D
+def _numeracion_tablas(coords, conect_p2d, conect_a2d, liberados_p2d):
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    conect_p2d = np.asarray(conect_p2d if conect_p2d is not None else [],
+                            dtype=np.int64).reshape(-1, 2)
+    conect_a2d = np.asarray(conect_a2d if conect_a2d is not None else [],
+                            dtype=np.int64).reshape(-1, 2)
+    n_p2d, n_a2d = conect_p2d.shape[0], conect_a2d.shape[0]
+    activos_p2d = np.ones((n_p2d, 6), dtype=bool)
+    if liberados_p2d is not None:
+        activos_p2d = ~mascara_gdl(liberados_p2d, n_p2d)
+    activos_a2d = np.broadcast_to([True, True, False, True, True, False], (n_a2d, 6))
+    numeracion = numera_gdl_barras(coords.shape[0], np.vstack([conect_p2d, conect_a2d]),
+                                   np.vstack([activos_p2d, activos_a2d]))
+    return coords, conect_p2d, conect_a2d, activos_p2d, numeracion
+
+#---------------------------------------------------------------
+# Función elementos_tablas: Matrices de las barras sin ensamblar
+#     Mismos argumentos que ensambla_tablas. Para resolver sin matriz
+#     global (ver resolucion.OperadorElementos)
+#     Salida: (grupos, numeracion). grupos es una lista de pares
+#             (K_e, gdl_e), uno por tipo de barra
+#---------------------------------------------------------------
+def elementos_tablas(coords, conect_p2d=None, ea_p2d=0., ei_p2d=0.,
+                     conect_a2d=None, ea_a2d=0., liberados_p2d=None):
+    """ Pilas de matrices y gdl de las barras P2D y A2D """
+    coords, conect_p2d, conect_a2d, _, numeracion = \
+        _numeracion_tablas(coords, conect_p2d, conect_a2d, liberados_p2d)
+    grupos = []
+    if conect_p2d.shape[0] > 0:
+        grupos.append(elementos_p2d(coords, conect_p2d, ea_p2d, ei_p2d, numeracion,
+                                    liberados_p2d))
+    if conect_a2d.shape[0] > 0:
+        grupos.append(elementos_a2d(coords, conect_a2d, ea_a2d, numeracion))
+    return grupos, numeracion
+
+#===============================================================
+# ENSAMBLAJE EN PARALELO
+# Las barras se reparten en bloques. Cada bloque se calcula en un proceso
+# (concurrent.futures), que escribe sus ternas COO directamente en su
+# tramo de unos vectores en memoria compartida. Como cada barra ocupa un
+# número fijo de ternas (36 en P2D, 16 en A2D), el tramo de cada bloque
+# se conoce de antemano y no hace falta juntar listas al final.
+# Los datos de entrada también se comparten, para no copiarlos a cada
+# proceso.
+#===============================================================
+
+# Memoria compartida: se crea un bloque y se copia el vector
+def _comparte(vector):
+    shm = shared_memory.SharedMemory(create=True, size=max(vector.nbytes, 1))
+    copia = np.ndarray(vector.shape, dtype=vector.dtype, buffer=shm.buf)
+    copia[...] = vector
+    return shm, (shm.name, vector.shape, vector.dtype.str)
+
+# Acceso desde otro proceso a un vector compartido
+def _abre(descriptor):
+    nombre, forma, tipo = descriptor
+    shm = shared_memory.SharedMemory(name=nombre)
+    return shm, np.ndarray(forma, dtype=np.dtype(tipo), buffer=shm.buf)
+
+# Tarea de cada proceso: un bloque [inicio, fin) de barras de un tipo
+def _bloque(tipo, entradas, salidas, inicio, fin, desplazamiento):
+    abiertos = [_abre(d) for d in entradas + salidas]
+    memorias = [shm for shm, _ in abiertos]
+    coords, numeracion, conect, ea, ei, liberados, filas, columnas, valores = \
+        [v for _, v in abiertos]
+    del abiertos
+
+    tramo = slice(inicio, fin)
+    if tipo == "p2d":
+        f, c, v = tripletes_p2d(coords, conect[tramo], ea[tramo], ei[tramo], numeracion,
+                                liberados[tramo] if liberados[tramo].any() else None)
+    else:
+        f, c, v = tripletes_a2d(coords, conect[tramo], ea[tramo], numeracion)
+    tramo = slice(desplazamiento, desplazamiento + f.size)
+    filas[tramo] = f
+    columnas[tramo] = c
+    valores[tramo] = v
+
+# Se eliminan las vistas antes de cerrar la memoria compartida
+    del coords, numeracion, conect, ea, ei, liberados, filas, columnas, valores
+    for shm in memorias:
+        shm.close()
+    return fin - inicio
+
+#---------------------------------------------------------------
+# Función ensambla_paralelo: Ternas COO de todas las barras en paralelo
+#     procesos: número de procesos (por defecto, el número de núcleos)
+#     tam_bloque: número de barras de cada bloque
+#     liberados_p2d: máscara (n_p2d,6) opcional de gdl condensados
+#     Salida: (filas, columnas, valores), listas para ensambla_coo
+#---------------------------------------------------------------
+def ensambla_paralelo(coords, numeracion, conect_p2d, ea_p2d, ei_p2d,
+                      conect_a2d, ea_a2d, procesos=None, tam_bloque=50000,
+                      liberados_p2d=None):
+    """ Ternas COO de las barras P2D y A2D calculadas en paralelo """
+    n_p2d = conect_p2d.shape[0]
+    n_a2d = conect_a2d.shape[0]
+    n_ternas = 36 * n_p2d + 16 * n_a2d
+    if liberados_p2d is None:
+        liberados_p2d = np.zeros((n_p2d, 6), dtype=bool)
+
+    grupos = [("p2d", conect_p2d, ea_p2d, ei_p2d, liberados_p2d, 36),
+              ("a2d", conect_a2d, ea_a2d, 0., np.zeros((n_a2d, 6), dtype=bool), 16)]
+
+    compartidos = []
+    try:
+        def comparte(vector):
+            shm, descriptor = _comparte(np.ascontiguousarray(vector))
+            compartidos.append(shm)
+            return descriptor
+
+        comunes = [comparte(coords), comparte(numeracion)]
+        salidas = [comparte(np.zeros(n_ternas, dtype=np.int64)),
+                   comparte(np.zeros(n_ternas, dtype=np.int64)),
+                   comparte(np.zeros(n_ternas))]
+
+        tareas = []
+        desplazamiento = 0
+        for tipo, conect, ea, ei, liberados, d2 in grupos:
+            n = conect.shape[0]
+            if n == 0:
+                continue
+            entradas = comunes + [comparte(conect),
+                                  comparte(np.broadcast_to(np.asarray(ea, dtype=float), (n,))),
+                                  comparte(np.broadcast_to(np.asarray(ei, dtype=float), (n,))),
+                                  comparte(np.asarray(liberados, dtype=bool))]
+            for inicio in range(0, n, tam_bloque):
+                fin = min(inicio + tam_bloque, n)
+                tareas.append((tipo, entradas, salidas, inicio, fin,
+                               desplazamiento + d2 * inicio))
+            desplazamiento += d2 * n
+
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            futuros = [ejecutor.submit(_bloque, *t) for t in tareas]
+            for futuro in futuros:
+                futuro.result()
+
+# Se copian las salidas antes de liberar la memoria compartida
+        resultado = [np.ndarray(forma, dtype=np.dtype(tipo),
+                                buffer=compartidos[2 + k].buf).copy()
+                     for k, (_, forma, tipo) in enumerate(salidas)]
+    finally:
+        for shm in compartidos:
+            shm.close()
+            shm.unlink()
+    return tuple(resultado)
+
+#---------------------------------------------------------------
+# Función ensambla: Ensamblaje a partir de objetos P2D / A2D
+#     barras: lista de objetos P2D y A2D
+#     nudos: lista de puntos (Punto2D). El orden de la lista fija la
+#            numeración de los nudos: nudos[i] es el nudo i.
+#     Las barras se reconocen por sus atributos: si tienen "ei" son
+#     P2D, si no, A2D. Los puntos de cada barra deben estar en "nudos".
+#     procesos: número de procesos para calcular las barras en paralelo
+#     liberados: opcional, diccionario {barra P2D: lista de gdl locales
+#                condensados}, p.ej. {barra_a: [2]} articula el nudo
+#                inicial de barra_a (como K_Condensa_Giro(1))
+#     Salida: (K, numeracion). K es una matriz CSR
+#---------------------------------------------------------------
+def ensambla(barras, nudos, procesos=1, liberados=None):
+    """ Matriz de rigidez global dispersa a partir de barras y nudos """
+    indice = {p: i for i, p in enumerate(nudos)}
+    coords = np.array([[p.x, p.y] for p in nudos], dtype=float).reshape(-1, 2)
+
+    p2d = [b for b in barras if hasattr(b, "ei")]
+    a2d = [b for b in barras if not hasattr(b, "ei")]
+
+    try:
+        conect_p2d = [[indice[b.p1], indice[b.p2]] for b in p2d]
+        conect_a2d = [[indice[b.p1], indice[b.p2]] for b in a2d]
+    except KeyError:
+        raise ValueError("Hay barras con puntos que no están en la lista de nudos")
+
+    liberados_p2d = None
+    if liberados:
+        liberados_p2d = np.zeros((len(p2d), 6), dtype=bool)
+        for i, b in enumerate(p2d):
+            liberados_p2d[i, list(liberados.get(b, []))] = True
+
+    return ensambla_tablas(coords,
+                           conect_p2d, [b.ea for b in p2d], [b.ei for b in p2d],
+                           conect_a2d, [b.ea for b in a2d], procesos,
+                           liberados_p2d=liberados_p2d)
+
+#---------------------------------------------------------------
+# Función ensambla_estructura: Ensamblaje a partir de las tablas de una
+# Estructura (ver tablas.py). Se usan las barras P2D y A2D, y las
+# coordenadas (x, y) de todos los nudos de la tabla.
+#     Salida: (K, numeracion). K es una matriz CSR
+#---------------------------------------------------------------
+def ensambla_estructura(estructura, procesos=1):
+    """ Matriz de rigidez global dispersa a partir de una Estructura """
+    p2d = estructura.de_tipo(TIPO_P2D)
+    a2d = estructura.de_tipo(TIPO_A2D)
+    conect = estructura.barras["nudos"]
+    return ensambla_tablas(estructura.nudos["xyz"][:, :2],
+                           conect[p2d], estructura.ea(p2d), estructura.ei(p2d),
+                           conect[a2d], estructura.ea(a2d), procesos)
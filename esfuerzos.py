@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import numpy as np
+
+from ensamblaje import valores_gdl
+
+#===============================================================
+# ESFUERZOS EN LAS BARRAS P2D (POSTPROCESO)
+# A partir de los desplazamientos de la estructura (vector u con todos
+# los gdl, una columna por caso de carga), para todas las barras a la vez:
+#     1) u_e = u[gdl_e]: desplazamientos de los extremos de cada barra
+#     2) u_l = M_LG^T u_e: desplazamientos en locales
+#     3) P = K_L u_l + F_emp: fuerzas en los extremos, en locales
+#     4) Leyes de esfuerzos N, V, M en puntos de cada barra, por
+#        equilibrio del trozo de barra entre el nudo inicial y el punto
+#
+# Criterio de signos de las leyes (ejes locales x', y'):
+#     N > 0 tracción, M > 0 tracciona la cara -y', y dM/dx = V
+# Todos los resultados son arrays de numpy: (n_barras, ...) con una
+# última dimensión para los casos de carga si u tiene varias columnas.
+#===============================================================
+
+#---------------------------------------------------------------
+# Función desplazamientos_barras: Desplazamientos de los extremos
+#     u: vector (n_gdl) o matriz (n_gdl, n_casos)
+#     gdl_e: matriz (n,6) de números de ecuación (ensamblaje.gdl_elementos)
+#     Salida: (n,6) o (n,6,n_casos), en globales. Los gdl liberados o
+#             que no existen (-1) dan 0: con la matriz condensada de la
+#             barra no intervienen en sus fuerzas
+#---------------------------------------------------------------
+def desplazamientos_barras(u, gdl_e):
+    """ Desplazamientos en globales de los extremos de cada barra """
+    return valores_gdl(u, gdl_e)
+
+# Cambio de base globales -> locales de vectores (n,6) o (n,6,n_casos)
+def _a_locales(angulo, u_e):
+    c, s = np.cos(angulo), np.sin(angulo)
+    if u_e.ndim == 3:
+        c, s = c[:, None], s[:, None]
+    u_l = np.array(u_e)
+    for i in (0, 3):
+        u_l[:, i] = c * u_e[:, i] + s * u_e[:, i + 1]
+        u_l[:, i + 1] = c * u_e[:, i + 1] - s * u_e[:, i]
+    return u_l
+
+#---------------------------------------------------------------
+# Función fuerzas_extremos: Fuerzas en los extremos de n barras P2D
+#     K_L: pila (n,6,6) de matrices en locales (k_p2d_local_lote, o las
+#          condensadas si hay extremos articulados)
+#     angulo: ángulos de las barras, en radianes
+#     u_e: desplazamientos en globales (n,6) o (n,6,n_casos)
+#     F_emp: fuerzas de empotramiento en locales (n,6), comunes a todos
+#            los casos, o (n,6,n_casos). Ver cargas.py
+#     Salida: P en locales (Fx_1, Fy_1, M_1, Fx_2, Fy_2, M_2), de la
+#             misma dimensión que u_e
+#---------------------------------------------------------------
+def fuerzas_extremos(K_L, angulo, u_e, F_emp=None):
+    """ Fuerzas en los extremos P = K_L u_l + F_emp, en locales """
+    u_e = np.asarray(u_e, dtype=float)
+    angulo = np.broadcast_to(np.asarray(angulo, dtype=float), (u_e.shape[0],))
+    P = np.einsum("nij,nj...->ni...", K_L, _a_locales(angulo, u_e))
+    if F_emp is not None:
+        F_emp = np.asarray(F_emp, dtype=float)
+        P += F_emp[..., None] if P.ndim == 3 and F_emp.ndim == 2 else F_emp
+    return P
+
+#---------------------------------------------------------------
+# Función diagramas: Leyes de esfuerzos N, V, M de n barras P2D
+#     L: longitudes de las barras
+#     P: fuerzas en los extremos en locales, (n,6) o (n,6,n_casos)
+#     cargas: objeto CargasBarras (cargas.py) con las cargas de las
+#             barras, común a todos los casos, o lista con uno por caso.
+#             None si las barras sólo tienen cargas en los nudos
+#     n_puntos: número de puntos por barra, incluidos los extremos
+#     Salida: (x, N, V, M). x es (n, n_puntos); N, V y M son
+#             (n, n_puntos) o (n, n_puntos, n_casos)
+#     Justo en el punto de una carga puntual se da el valor a su izquierda
+#---------------------------------------------------------------
+def diagramas(L, P, cargas=None, n_puntos=11):
+    """ Leyes de esfuerzos en n_puntos de cada barra """
+    L = np.atleast_1d(np.asarray(L, dtype=float))
+    P = np.asarray(P, dtype=float)
+    x = L[:, None] * np.linspace(0., 1., n_puntos)[None, :]
+
+# Parte debida a las fuerzas del nudo inicial (Fx_1, Fy_1, M_1)
+    forma = P.shape[:1] + (n_puntos,) + P.shape[2:]
+    xc = x if P.ndim == 2 else x[..., None]
+    N = np.broadcast_to(-P[:, None, 0], forma).copy()
+    V = np.broadcast_to(P[:, None, 1], forma).copy()
+    M = -P[:, None, 2] + P[:, None, 1] * xc
+
+# Parte debida a las cargas en el trozo (0, x)
+    if cargas is not None:
+        if isinstance(cargas, (list, tuple)):
+            efecto = np.stack([_efecto_cargas(c, L, x) for c in cargas], axis=-1)
+        else:
+            efecto = _efecto_cargas(cargas, L, x)
+            if P.ndim == 3:
+                efecto = efecto[..., None]
+        N += efecto[:, 0]
+        V += efecto[:, 1]
+        M += efecto[:, 2]
+    return x, N, V, M
+
+# Efecto en (N, V, M) de las cargas de un CargasBarras: (n, 3, n_puntos)
+def _efecto_cargas(cargas, L, x):
+    efecto = np.zeros((L.shape[0], 3, x.shape[1]))
+
+# Cargas lineales p(xi) = p1 + (p2 - p1) xi / L. Se suman por barra
+    barras, v = cargas.lista("trapecial")
+    if barras is not None:
+        p = np.zeros((L.shape[0], 4))
+        np.add.at(p, barras, v)
+        px1, px2, py1, py2 = [c[:, None] for c in p.T]
+        Lc = L[:, None]
+        efecto[:, 0] -= px1 * x + (px2 - px1) * x**2 / (2 * Lc)
+        efecto[:, 1] += py1 * x + (py2 - py1) * x**2 / (2 * Lc)
+        efecto[:, 2] += py1 * x**2 / 2 + (py2 - py1) * x**3 / (6 * Lc)
+
+# Cargas puntuales: sólo actúan en los puntos con x > a
+    barras, v = cargas.lista("puntual")
+    if barras is not None:
+        a, Px, Py = v[:, 0:1], v[:, 1:2], v[:, 2:3]
+        d = x[barras] - a
+        activa = d > 0
+        np.add.at(efecto[:, 0], barras, -Px * activa)
+        np.add.at(efecto[:, 1], barras, Py * activa)
+        np.add.at(efecto[:, 2], barras, Py * d * activa)
+    return efecto
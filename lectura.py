@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import os
+import warnings
+
+import numpy as np
+
+from tablas import Estructura, TIPO_P2D
+from apoyos import Apoyos
+
+#===============================================================
+# LECTURA DE MODELOS DESDE ARCHIVOS
+# Las tablas de nudos, barras, secciones, materiales, apoyos y cargas
+# se leen por bloques de filas y se añaden directamente a las tablas de
+# numpy de una Estructura (tablas.py), sin crear un objeto de Python
+# por fila. La memoria necesaria, además del propio modelo, es la de un
+# bloque.
+#
+# Formatos admitidos (uno por tabla):
+#     .csv: texto separado por comas, con una fila de cabecera con los
+#           nombres de las columnas
+#     .npz: un array por columna, con el nombre de la columna
+#     directorio: un archivo <columna>.npy por columna. Se abren como
+#           memoria mapeada (np.load(mmap_mode="r")): sólo se lee del
+#           disco el bloque que se está copiando
+#
+# Columnas de cada tabla (índices de nudos, barras, secciones y
+# materiales indexando desde 0, dentro de cada archivo):
+#     nudos:       x, y [, z]
+#     barras:      nudo1, nudo2 [, tipo, seccion, material, giro]
+#                  tipo: 0 P2D, 1 A2D, 2 A3D, 3 P3D (por defecto 0)
+#     secciones:   A [, I, Iy, J]
+#     materiales:  E [, G, rho]
+#     apoyos:      nudo, y una columna por gdl impedido o libre (1 =
+#                  impedido): ux, uy, giro (P2D) o uz (3D), giro_x,
+#                  giro_y, giro_z (P3D). P. ej. nudo, ux, uy, giro
+#     cargas:      nudo, y una columna por gdl cargado: Fx, Fy, M (P2D)
+#                  o Fz (3D), Mx, My, Mz (P3D). P. ej. nudo, Fx, Fy, M
+# Las columnas se identifican siempre por su nombre, no por su posición
+# (en un directorio .npy el orden de los archivos no está definido).
+# Las columnas que faltan son 0.
+#===============================================================
+
+# Columnas de los archivos de apoyos y cargas -> gdl del nudo
+GDL_APOYOS = {"ux": 0, "uy": 1, "giro": 2, "uz": 2, "giro_x": 3, "giro_y": 4, "giro_z": 5}
+GDL_CARGAS = {"Fx": 0, "Fy": 1, "M": 2, "Fz": 2, "Mx": 3, "My": 4, "Mz": 5}
+
+# Columnas de los archivos -> (columna de la tabla, componente)
+COLUMNAS_ARCHIVO = {
+    "nudos":      {"x": ("xyz", 0), "y": ("xyz", 1), "z": ("xyz", 2)},
+    "barras":     {"nudo1": ("nudos", 0), "nudo2": ("nudos", 1), "tipo": ("tipo", None),
+                   "seccion": ("seccion", None), "material": ("material", None),
+                   "giro": ("giro", None)},
+    "secciones":  {"A": ("A", None), "I": ("I", None), "Iy": ("Iy", None), "J": ("J", None)},
+    "materiales": {"E": ("E", None), "G": ("G", None), "rho": ("rho", None)},
+}
+
+#---------------------------------------------------------------
+# Función lee_bloques: Generador de bloques de filas de un archivo
+#     ruta: archivo .csv o .npz, o directorio con archivos .npy
+#     tam_bloque: número máximo de filas de cada bloque
+#     Salida: diccionarios {nombre de columna: array (m,)}, m <= tam_bloque
+#---------------------------------------------------------------
+def lee_bloques(ruta, tam_bloque=1000000):
+    """ Bloques {columna: valores} de una tabla, leídos por partes """
+    if os.path.isdir(ruta):
+        columnas = {os.path.splitext(a)[0]: np.load(os.path.join(ruta, a), mmap_mode="r")
+                    for a in sorted(os.listdir(ruta)) if a.endswith(".npy")}
+        yield from _bloques_arrays(columnas, tam_bloque)
+    elif ruta.endswith(".npz"):
+        with np.load(ruta) as datos:
+            yield from _bloques_arrays({k: datos[k] for k in datos.files}, tam_bloque)
+    else:
+        yield from _bloques_csv(ruta, tam_bloque)
+
+# Número de filas de una tabla binaria (None en .csv, que no se conoce
+# sin leer el archivo)
+def filas_archivo(ruta):
+    """ Número de filas de un archivo .npz o directorio .npy """
+    if os.path.isdir(ruta):
+        return min((len(np.load(os.path.join(ruta, a), mmap_mode="r"))
+                    for a in os.listdir(ruta) if a.endswith(".npy")), default=0)
+    if ruta.endswith(".npz"):
+        with np.load(ruta) as datos:
+            return min((len(datos[k]) for k in datos.files), default=0)
+    return None
+
+def _bloques_arrays(columnas, tam_bloque):
+    n = min(len(v) for v in columnas.values()) if columnas else 0
+    for inicio in range(0, n, tam_bloque):
+        yield {k: np.asarray(v[inicio:inicio + tam_bloque]) for k, v in columnas.items()}
+
+# np.loadtxt lee, desde la posición actual del archivo, como mucho
+# tam_bloque filas. El bucle termina con el primer bloque incompleto
+def _bloques_csv(ruta, tam_bloque):
+    with open(ruta) as f:
+        nombres = [c.strip() for c in f.readline().split(",")]
+        while True:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                bloque = np.loadtxt(f, delimiter=",", max_rows=tam_bloque, ndmin=2)
+            if bloque.shape[0] > 0:
+                yield {nombre: bloque[:, j] for j, nombre in enumerate(nombres)}
+            if bloque.shape[0] < tam_bloque:
+                break
+
+# Todos los bloques de un archivo se añaden a una tabla. Si se conoce el
+# número de filas, la tabla se amplía una sola vez
+def _agrega_archivo(tabla, nombre_tabla, ruta, tam_bloque, desplaza=None, defecto=None):
+    filas = filas_archivo(ruta)
+    if filas:
+        tabla.reserva(filas)
+    for bloque in lee_bloques(ruta, tam_bloque):
+        for nombre, valor in (defecto or {}).items():
+            bloque.setdefault(nombre, np.full(len(next(iter(bloque.values()))), valor))
+        _agrega_bloque(tabla, nombre_tabla, bloque, desplaza)
+
+# Un bloque del archivo -> columnas de la tabla, y se añade a la tabla
+def _agrega_bloque(tabla, nombre_tabla, bloque, desplaza=None):
+    columnas = {}
+    m = len(next(iter(bloque.values())))
+    for nombre, valores in bloque.items():
+        if nombre not in COLUMNAS_ARCHIVO[nombre_tabla]:
+            raise ValueError("Columna desconocida en la tabla de %s: %s" % (nombre_tabla, nombre))
+        columna, componente = COLUMNAS_ARCHIVO[nombre_tabla][nombre]
+        if desplaza and columna in desplaza:
+            valores = valores + desplaza[columna]
+        if componente is None:
+            columnas[columna] = valores
+        else:
+            tipo, forma = tabla.COLUMNAS[columna]
+            columnas.setdefault(columna, np.zeros((m,) + forma, dtype=tipo))[:, componente] = valores
+    return tabla.agrega_lote(**columnas)
+
+#---------------------------------------------------------------
+# Función lee_estructura: Estructura a partir de archivos
+#     nudos, barras: rutas de las tablas de nudos y barras
+#     secciones, materiales: rutas opcionales. Si no se dan, cada barra
+#         usa la sección y el material indicados en el archivo de
+#         barras, que deben existir ya en la estructura
+#     estructura: Estructura a la que se añaden las tablas (por defecto
+#         una nueva). Los índices de los archivos se desplazan según
+#         las filas que ya tuviese
+#     Salida: la Estructura
+#---------------------------------------------------------------
+def lee_estructura(nudos, barras, secciones=None, materiales=None, estructura=None,
+                   tam_bloque=1000000):
+    """ Estructura (tablas de numpy) leída de archivos por bloques """
+    est = Estructura() if estructura is None else estructura
+    desplaza = {"nudos": est.nudos.n, "seccion": 0, "material": 0}
+    _agrega_archivo(est.nudos, "nudos", nudos, tam_bloque)
+    if secciones is not None:
+        desplaza["seccion"] = est.secciones.n
+        _agrega_archivo(est.secciones, "secciones", secciones, tam_bloque)
+    if materiales is not None:
+        desplaza["material"] = est.materiales.n
+        _agrega_archivo(est.materiales, "materiales", materiales, tam_bloque)
+    _agrega_archivo(est.barras, "barras", barras, tam_bloque, desplaza, {"tipo": TIPO_P2D})
+
+    n = est.barras.n
+    for nombre, tabla in (("nudos", est.nudos), ("seccion", est.secciones),
+                          ("material", est.materiales)):
+        columna = est.barras[nombre]
+        if n and (columna.min() < 0 or columna.max() >= tabla.n):
+            raise ValueError("Hay barras con índices de %s fuera de la tabla" % nombre)
+    return est
+
+# Un bloque de apoyos o cargas -> (nudos, valores (m, gdl_nudo)), con
+# cada columna en el gdl de su nombre
+def _valores_gdl_nudo(bloque, nombres_gdl, gdl_nudo, tabla):
+    nudo = bloque.pop("nudo").astype(np.int64)
+    valores = np.zeros((nudo.size, gdl_nudo))
+    usados = set()
+    for nombre, columna in bloque.items():
+        if nombre not in nombres_gdl:
+            raise ValueError("Columna desconocida en la tabla de %s: %s" % (tabla, nombre))
+        k = nombres_gdl[nombre]
+        if k >= gdl_nudo or k in usados:
+            raise ValueError("La columna %s está repetida o los nudos no tienen ese gdl" % nombre)
+        usados.add(k)
+        valores[:, k] = columna
+    return nudo, valores
+
+#---------------------------------------------------------------
+# Función lee_apoyos: Apoyos a partir de un archivo
+#     numeracion: matriz (n_nudos, gdl_nudo) de números de ecuación
+#     apoyos: objeto Apoyos al que se añaden (por defecto uno nuevo)
+#     Cada gdl se identifica por el nombre de su columna (GDL_APOYOS)
+#---------------------------------------------------------------
+def lee_apoyos(ruta, numeracion, apoyos=None, tam_bloque=1000000):
+    """ Apoyos leídos de un archivo (nudo y un indicador por gdl) """
+    numeracion = np.asarray(numeracion)
+    apoyos = Apoyos(numeracion) if apoyos is None else apoyos
+    for bloque in lee_bloques(ruta, tam_bloque):
+        nudo, valores = _valores_gdl_nudo(bloque, GDL_APOYOS, numeracion.shape[1], "apoyos")
+        gdl = numeracion[nudo]
+        apoyos.agrega_gdl(gdl[(valores != 0) & (gdl >= 0)])
+    return apoyos
+
+#---------------------------------------------------------------
+# Función lee_cargas: Vector de fuerzas en los nudos a partir de un archivo
+#     numeracion: matriz (n_nudos, gdl_nudo) de números de ecuación
+#     Salida: vector (n_gdl). Las cargas repetidas en un nudo se suman
+#     Cada gdl se identifica por el nombre de su columna (GDL_CARGAS).
+#     Las cargas en gdl que no existen (-1) deben ser nulas
+#---------------------------------------------------------------
+def lee_cargas(ruta, numeracion, tam_bloque=1000000):
+    """ Vector de fuerzas en los nudos leído de un archivo """
+    numeracion = np.asarray(numeracion)
+    F = np.zeros(int(numeracion.max()) + 1 if numeracion.size else 0)
+    for bloque in lee_bloques(ruta, tam_bloque):
+        nudo, valores = _valores_gdl_nudo(bloque, GDL_CARGAS, numeracion.shape[1], "cargas")
+        gdl = numeracion[nudo]
+        existe = gdl >= 0
+        if np.any(valores[~existe] != 0):
+            raise ValueError("Hay cargas en gdl que los nudos no tienen")
+        F += np.bincount(gdl[existe], weights=valores[existe], minlength=F.size)
+    return F
+
+#---------------------------------------------------------------
+# Función guarda_estructura: Guarda las tablas de una Estructura en
+# formato binario, para leerlas después con lee_estructura
+#     directorio: se crean los subdirectorios nudos, barras, secciones
+#                 y materiales, con un archivo .npy por columna
+#---------------------------------------------------------------
+def guarda_estructura(estructura, directorio):
+    """ Guarda las tablas en directorios de archivos .npy """
+    for nombre_tabla in COLUMNAS_ARCHIVO:
+        tabla = getattr(estructura, nombre_tabla)
+        destino = os.path.join(directorio, nombre_tabla)
+        os.makedirs(destino, exist_ok=True)
+        for nombre, (columna, componente) in COLUMNAS_ARCHIVO[nombre_tabla].items():
+            valores = tabla[columna] if componente is None else tabla[columna][:, componente]
+            np.save(os.path.join(destino, nombre + ".npy"), valores)
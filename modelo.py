@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import numpy as np
+import scipy.sparse as sp
+
+from ensamblaje import (ensambla, ensambla_tablas, ensambla_estructura, elementos_tablas,
+                        valores_gdl, gdl_elementos, tripletes, ensambla_coo,
+                        _numeracion_tablas)
+from resolucion import (Factorizacion, FactorizacionActualizada, OperadorElementos,
+                        GradienteConjugado)
+from apoyos import Apoyos
+from tablas import TIPO_P2D, TIPO_A2D, instante
+
+#===============================================================
+# MODELO DE ESTRUCTURA: FACTORIZAR UNA VEZ, RESOLVER MUCHAS CARGAS
+# La matriz de rigidez reducida (sin los gdl impedidos) no depende de
+# las cargas. Se factoriza una sola vez y se guarda; cada combinación
+# de cargas es sólo una sustitución hacia delante y hacia atrás.
+#===============================================================
+
+# Tipo de dato de los desplazamientos de un nudo P2D: (ux, uy, giro)
+DESPLAZAMIENTOS = np.dtype([("ux", float), ("uy", float), ("giro", float)])
+
+# Tipo de dato de los desplazamientos de un nudo de celosía 3D
+DESPLAZAMIENTOS_3D = np.dtype([("ux", float), ("uy", float), ("uz", float)])
+
+#---------------------------------------------------------------
+# Función desplazamientos_nudos: De vector de gdl a array estructurado
+#     u: vector (n_gdl) o matriz (n_gdl, n_casos) de desplazamientos
+#     numeracion: matriz (n_nudos,3) de números de ecuación. Los gdl
+#                 que no existen (-1) tienen desplazamiento 0
+#     tipo: DESPLAZAMIENTOS o DESPLAZAMIENTOS_3D
+#     Salida: array estructurado (n_casos, n_nudos). Ejemplo:
+#             d["uy"][0, 1] es el desplazamiento uy del nudo 1 (Python)
+#             en el primer caso de carga
+#---------------------------------------------------------------
+def desplazamientos_nudos(u, numeracion, tipo=DESPLAZAMIENTOS):
+    """ Array estructurado (n_casos, n_nudos) de desplazamientos """
+    u = np.asarray(u, dtype=float)
+    if u.ndim == 1:
+        u = u[:, None]
+    d = np.zeros((u.shape[1], numeracion.shape[0]), dtype=tipo)
+    for j, nombre in enumerate(tipo.names):
+        d[nombre] = valores_gdl(u, numeracion[:, j]).T
+    return d
+
+#---------------------------------------------------------------
+# Clase Modelo
+# Inicialización: A partir de la matriz de rigidez global K (dispersa),
+# la numeración de gdl y los apoyos. Los apoyos pueden ser un objeto
+# Apoyos (ver apoyos.py) o una lista de gdl impedidos (indexando desde 0)
+#     modo = "particion": se resuelve K_ll u_l = F_l - K_ls u_s
+#     modo = "penalizacion": se resuelve la matriz completa penalizada
+# Funciones de la clase:
+#     desde_barras: Construye el modelo con una lista de barras y nudos
+#     desde_tablas: Construye el modelo con tablas de coordenadas y barras
+#     desde_estructura: Construye el modelo con una Estructura (tablas.py)
+#     factorizacion: Factorización (guardada) de la matriz a resolver
+#     rigidez_libres: (K_ll, factorización de K_ll), para los problemas
+#                     de autovalores (pandeo.py, dinamica.py)
+#     resuelve(F): Desplazamientos para una o varias cargas F
+#     reacciones(F): Reacciones en los gdl fijos
+#     reacciones_gdl(u, F): Reacciones con los desplazamientos u ya
+#                           calculados (n_gdl) o (n_gdl, n_casos)
+#---------------------------------------------------------------
+class Modelo:
+    """ Clase para representar un modelo de barras con apoyos """
+    DESPLAZAMIENTOS = DESPLAZAMIENTOS
+
+    def __init__(self, K, numeracion, apoyos=(), metodo="banda", modo="particion"):
+        if modo not in ("particion", "penalizacion"):
+            raise ValueError("Modo de apoyos desconocido: " + str(modo))
+        self.K = K.tocsr()
+        self.numeracion = numeracion
+        self.n_gdl = K.shape[0]
+        self.metodo = metodo
+        self.modo = modo
+        if not isinstance(apoyos, Apoyos):
+            apoyos = Apoyos(numeracion).agrega_gdl(apoyos)
+        self.apoyos = apoyos
+        self.gdl_fijos = apoyos.gdl_fijos
+        self.gdl_libres = apoyos.gdl_libres
+        self._factorizacion = None
+        self._factorizacion_libres = None
+# En penalización, alfa no cambia entre resoluciones
+        self._alfa = apoyos.alfa_penalizacion(self.K) if modo == "penalizacion" else None
+
+    @classmethod
+    def desde_barras(cls, barras, nudos, apoyos=(), metodo="banda", modo="particion"):
+        """ Modelo a partir de objetos P2D / A2D y la lista de nudos """
+        K, numeracion = ensambla(barras, nudos)
+        return cls(K, numeracion, apoyos, metodo, modo)
+
+    @classmethod
+    def desde_tablas(cls, coords, conect_p2d=None, ea_p2d=0., ei_p2d=0.,
+                     conect_a2d=None, ea_a2d=0., apoyos=(), metodo="banda",
+                     modo="particion"):
+        """ Modelo a partir de tablas de coordenadas y conectividad """
+        K, numeracion = ensambla_tablas(coords, conect_p2d, ea_p2d, ei_p2d,
+                                        conect_a2d, ea_a2d)
+        return cls(K, numeracion, apoyos, metodo, modo)
+
+    @classmethod
+    def desde_estructura(cls, estructura, apoyos=(), metodo="banda", modo="particion"):
+        """ Modelo a partir de las tablas de una Estructura (tablas.py) """
+        K, numeracion = ensambla_estructura(estructura)
+        return cls(K, numeracion, apoyos, metodo, modo)
+
+# La factorización se calcula la primera vez que se necesita
+    def factorizacion(self):
+        if self._factorizacion is None:
+            if self.modo == "particion":
+                K_ll = self.apoyos.particiona(self.K)[0]
+            else:
+                K_ll = self.apoyos.penaliza(self.K)
+            self._factorizacion = Factorizacion(K_ll, self.metodo)
+        return self._factorizacion
+
+# Matriz de los gdl libres y su factorización. En penalización la
+# factorización del modelo es la de la matriz completa penalizada: se
+# factoriza K_ll aparte (una vez)
+    def rigidez_libres(self):
+        if self.K is None:
+            raise ValueError("El modelo no tiene matriz de rigidez global ensamblada")
+        K_ll = self.apoyos.particiona(self.K)[0]
+        if self.modo == "particion":
+            return K_ll, self.factorizacion()
+        if self._factorizacion_libres is None:
+            self._factorizacion_libres = Factorizacion(K_ll, self.metodo)
+        return K_ll, self._factorizacion_libres
+
+# Vector (o matriz) de desplazamientos de todos los gdl
+    def resuelve_gdl(self, F):
+        F = np.asarray(F, dtype=float)
+        if F.shape[0] != self.n_gdl:
+            raise ValueError("El vector de fuerzas debe tener %d filas" % self.n_gdl)
+        if self.modo == "penalizacion":
+            return self.factorizacion().resuelve(self.apoyos.fuerzas_penalizadas(F, self._alfa))
+        u = np.zeros(F.shape)
+        u_s = self.apoyos.u_fijos
+        u[self.gdl_fijos] = u_s if F.ndim == 1 else u_s[:, None]
+        u[self.gdl_libres] = self.factorizacion().resuelve(self.apoyos.fuerzas_libres(self.K, F))
+        return u
+
+# Desplazamientos de los nudos, como array estructurado (n_casos, n_nudos)
+#     F: vector (n_gdl) o matriz (n_gdl, n_casos), una columna por caso.
+#     Las fuerzas en los gdl impedidos no intervienen.
+    def resuelve(self, F):
+        return desplazamientos_nudos(self.resuelve_gdl(F), self.numeracion,
+                                     self.DESPLAZAMIENTOS)
+
+# Reacciones en los gdl fijos (orden de gdl_fijos), una columna por caso
+    def reacciones(self, F):
+        return self.reacciones_gdl(self.resuelve_gdl(F), F)
+
+    def reacciones_gdl(self, u, F=None):
+        return self.apoyos.reacciones(self.K, u, F)
+
+#---------------------------------------------------------------
+# Clase ModeloElementos: Modelo resuelto con gradiente conjugado, sin
+# matriz de rigidez global (ver resolucion.GradienteConjugado)
+# Inicialización:
+#     grupos: lista de pares (K_e, gdl_e) de las barras (ver
+#             ensamblaje.elementos_tablas)
+#     numeracion, apoyos: como en Modelo
+#     precondicionador: "bloques", "jacobi" o None
+#     tol, max_iter: tolerancia del residuo relativo e iteraciones
+# Funciones de la clase: las de Modelo. factorizacion() devuelve el
+# GradienteConjugado, con el número de iteraciones y el historial de
+# residuos del último cálculo
+#---------------------------------------------------------------
+class ModeloElementos(Modelo):
+    """ Modelo de barras resuelto barra a barra, sin matriz global """
+    def __init__(self, grupos, numeracion, apoyos=(), precondicionador="bloques",
+                 tol=1E-10, max_iter=None):
+        self.numeracion = np.asarray(numeracion)
+        self.n_gdl = int(self.numeracion.max()) + 1 if self.numeracion.size else 0
+        self.operador = OperadorElementos(grupos, self.n_gdl)
+        self.K = None
+        self.metodo = "pcg"
+        self.modo = "particion"
+        self.precondicionador = precondicionador
+        self.tol = tol
+        self.max_iter = max_iter
+        if not isinstance(apoyos, Apoyos):
+            apoyos = Apoyos(numeracion).agrega_gdl(apoyos)
+        self.apoyos = apoyos
+        self.gdl_fijos = apoyos.gdl_fijos
+        self.gdl_libres = apoyos.gdl_libres
+        self._factorizacion = None
+
+    @classmethod
+    def desde_tablas(cls, coords, conect_p2d=None, ea_p2d=0., ei_p2d=0.,
+                     conect_a2d=None, ea_a2d=0., apoyos=(), liberados_p2d=None,
+                     precondicionador="bloques", tol=1E-10, max_iter=None):
+        """ Modelo a partir de tablas de coordenadas y conectividad """
+        grupos, numeracion = elementos_tablas(coords, conect_p2d, ea_p2d, ei_p2d,
+                                              conect_a2d, ea_a2d, liberados_p2d)
+        return cls(grupos, numeracion, apoyos, precondicionador, tol, max_iter)
+
+    def factorizacion(self):
+        if self._factorizacion is None:
+            self._factorizacion = GradienteConjugado(self.operador, self.gdl_libres,
+                                                     self.precondicionador, self.numeracion,
+                                                     self.tol, self.max_iter)
+        return self._factorizacion
+
+# Los desplazamientos impuestos se descuentan con el producto K u_s
+    def resuelve_gdl(self, F):
+        F = np.asarray(F, dtype=float)
+        if F.shape[0] != self.n_gdl:
+            raise ValueError("El vector de fuerzas debe tener %d filas" % self.n_gdl)
+        u = np.zeros(F.shape)
+        u_s = self.apoyos.u_fijos
+        u[self.gdl_fijos] = u_s if F.ndim == 1 else u_s[:, None]
+        F_l = F[self.gdl_libres]
+        if np.any(u_s != 0):
+            F_l = F_l - self.operador.producto(u)[self.gdl_libres]
+        u[self.gdl_libres] = self.factorizacion().resuelve(F_l)
+        return u
+
+# Reacciones R = (K u)_s - F_s, con el producto K u sin matriz global
+    def reacciones_gdl(self, u, F=None):
+        R = self.operador.producto(np.asarray(u, dtype=float))[self.gdl_fijos]
+        if F is not None:
+            R = R - np.asarray(F, dtype=float)[self.gdl_fijos]
+        return R
+
+#---------------------------------------------------------------
+# Clase ModeloIncremental: Modelo de una Estructura (tablas.py) que se
+# recalcula sin volver a factorizar cuando cambian pocas barras
+# Inicialización:
+#     estructura: Estructura con barras P2D y A2D
+#     apoyos, metodo: como en Modelo (modo "particion")
+#     max_rango: número máximo de gdl modificados que se acumulan en la
+#                actualización de la factorización. Al superarlo se
+#                factoriza de nuevo la matriz ya modificada. Cada gdl
+#                modificado cuesta una resolución, y factorizar de nuevo
+#                cuesta del orden de decenas de resoluciones
+# Antes de cada resolución se buscan las barras modificadas desde la
+# anterior (con las marcas de las tablas: secciones, materiales, nudos)
+# y las eliminadas o restituidas. Sólo se suma la diferencia de sus
+# matrices: en su sitio en la matriz global K, y como modificación de
+# rango bajo de la factorización (ver resolucion.FactorizacionActualizada)
+# Funciones de la clase, además de las de Modelo:
+#     elimina(barras), restituye(barras): Quita o vuelve a poner barras
+#     actualiza(): Aplica las modificaciones pendientes (se llama al
+#                  resolver). Devuelve los índices de las barras cambiadas
+#     Las cargas no forman parte de la factorización: basta con resolver
+#     con el nuevo vector F
+#---------------------------------------------------------------
+class ModeloIncremental(Modelo):
+    """ Modelo que se actualiza al modificar barras de la Estructura """
+    def __init__(self, estructura, apoyos=(), metodo="banda", max_rango=30):
+        n_barras = estructura.barras.n
+
+# Matrices (n_barras,6,6) con las que está calculada K (A2D en [:4,:4],
+# y ceros en las barras de otros tipos) y sus gdl (-1 si no hay). Se
+# toman de la caché de la Estructura, y con ellas se ensambla K
+        conect = estructura.barras["nudos"]
+        p2d = estructura.de_tipo(TIPO_P2D)
+        a2d = estructura.de_tipo(TIPO_A2D)
+        numeracion = _numeracion_tablas(estructura.nudos["xyz"][:, :2], conect[p2d],
+                                        conect[a2d], None)[4]
+        gdl_e = np.full((n_barras, 6), -1, dtype=np.int64)
+        gdl_e[p2d] = gdl_elementos(conect[p2d], numeracion, (0, 1, 2))
+        gdl_e[a2d, :4] = gdl_elementos(conect[a2d], numeracion, (0, 1))
+        K_e = np.zeros((n_barras, 6, 6))
+        K_e[p2d] = estructura.rigideces(p2d)[:, :6, :6]
+        K_e[a2d] = estructura.rigideces(a2d)[:, :6, :6]
+        barras = np.concatenate([p2d, a2d])
+        n_gdl = int(numeracion.max()) + 1 if numeracion.size else 0
+        K = ensambla_coo(*tripletes(K_e[barras], gdl_e[barras]), n_gdl)
+
+        super().__init__(K, numeracion, apoyos, metodo, "particion")
+        self._claves_K()
+        self.estructura = estructura
+        self.max_rango = max_rango
+        self.n_barras = n_barras
+        self._gdl_e = gdl_e
+        self._K_e = K_e
+        self._barras = barras
+        self.activas = np.ones(self.n_barras, dtype=bool)
+        self._cambiadas = np.zeros(self.n_barras, dtype=bool)
+        self._instante = instante()
+
+# Número de cada gdl en la matriz reducida (-1 en los fijos)
+        self._reducido = np.full(self.n_gdl, -1, dtype=np.int64)
+        self._reducido[self.gdl_libres] = np.arange(self.gdl_libres.size)
+
+    def elimina(self, barras):
+        self.activas[barras] = False
+        self._cambiadas[barras] = True
+        return self
+
+    def restituye(self, barras):
+        self.activas[barras] = True
+        self._cambiadas[barras] = True
+        return self
+
+    def factorizacion(self):
+        if self._factorizacion is None:
+            K_ll = self.apoyos.particiona(self.K)[0]
+            self._factorizacion = FactorizacionActualizada(Factorizacion(K_ll, self.metodo))
+        return self._factorizacion
+
+# K y su factorización deben incluir las modificaciones pendientes
+    def rigidez_libres(self):
+        self.actualiza()
+        return super().rigidez_libres()
+
+    def actualiza(self):
+        if self.estructura.barras.n != self.n_barras:
+            raise ValueError("Se han añadido barras a la estructura: hay que crear el modelo de nuevo")
+        modificadas = self.estructura.modificadas(self._instante, self._barras)
+        self._cambiadas[modificadas] = True
+        self._instante = instante()
+        barras = np.flatnonzero(self._cambiadas)
+        self._cambiadas[:] = False
+        if barras.size == 0:
+            return barras
+
+        K_nuevas = np.zeros((barras.size, 6, 6))
+        activas = self.activas[barras]
+        if np.any(activas):
+            K_nuevas[activas] = self.estructura.rigideces(barras[activas])[:, :6, :6]
+        dK_e = K_nuevas - self._K_e[barras]
+        self._K_e[barras] = K_nuevas
+        filas, columnas, valores = tripletes(dK_e, self._gdl_e[barras])
+        validos = (filas >= 0) & (columnas >= 0)
+        filas, columnas, valores = filas[validos], columnas[validos], valores[validos]
+        self._suma_en_K(filas, columnas, valores)
+
+# Modificación de la factorización con los términos de los gdl libres
+        fl, cl = self._reducido[filas], self._reducido[columnas]
+        libres = (fl >= 0) & (cl >= 0)
+        gdl = np.unique(fl[libres])
+        if self._factorizacion is not None and gdl.size:
+            if self._factorizacion.rango + gdl.size > self.max_rango:
+                self._factorizacion = None
+            else:
+                dK = np.zeros((gdl.size, gdl.size))
+                np.add.at(dK, (np.searchsorted(gdl, fl[libres]),
+                               np.searchsorted(gdl, cl[libres])), valores[libres])
+                self._factorizacion.modifica(gdl, dK)
+        return barras
+
+# Clave fila * n + columna de cada término de K. Con los índices de
+# CSR ordenados, las claves quedan ordenadas
+    def _claves_K(self):
+        self.K.sum_duplicates()
+        self.K.sort_indices()
+        filas = np.repeat(np.arange(self.n_gdl, dtype=np.int64), np.diff(self.K.indptr))
+        self._claves = filas * self.n_gdl + self.K.indices
+
+# Suma en su sitio en K.data. Si algún término no estaba en K, se
+# suma como matriz dispersa (cambia la estructura de K)
+    def _suma_en_K(self, filas, columnas, valores):
+        buscadas = filas * self.n_gdl + columnas
+        posicion = np.minimum(np.searchsorted(self._claves, buscadas), self._claves.size - 1)
+        if self._claves.size and np.all(self._claves[posicion] == buscadas):
+            np.add.at(self.K.data, posicion, valores)
+        else:
+            self.K = (self.K + sp.coo_matrix((valores, (filas, columnas)),
+                                             shape=self.K.shape)).tocsr()
+            self._claves_K()
+
+    def resuelve_gdl(self, F):
+        self.actualiza()
+        return super().resuelve_gdl(F)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.linalg as sla
+
+from rigidez import (geometria_lote, k_p2d_lote, k_a2d_lote, k_p2d_local_lote, m_lg_p2d_lote,
+                     condensa_lote)
+from ensamblaje import gdl_elementos, tripletes, _numeracion_tablas
+from apoyos import Apoyos
+from resolucion import reordena_rcm, ancho_banda
+
+#===============================================================
+# SIMULACIÓN DE MONTE CARLO
+# Se analiza muchas veces la misma estructura con valores aleatorios de
+# E, A, I y de las cargas. La parte "simbólica" no cambia entre muestras:
+#     - numeración de gdl y gdl de cada barra
+#     - posición de cada término de las barras en la matriz global
+#     - reordenación RCM y posición de cada término en la matriz banda
+#     - longitudes y ángulos de las barras
+# Se calcula una sola vez. En cada muestra sólo se recalculan los
+# valores de las matrices de las barras, se suman directamente en la
+# matriz banda (np.bincount) y se factoriza con Cholesky.
+#===============================================================
+
+#---------------------------------------------------------------
+# Clase MonteCarlo
+# Inicialización (mismas tablas que ensambla_tablas):
+#     coords, conect_p2d, conect_a2d: tablas de nudos y barras
+#     apoyos: objeto Apoyos o lista de gdl impedidos (desplazamiento 0)
+#     liberados_p2d: gdl locales condensados de las barras P2D, como en
+#         ensambla_tablas. Se condensan en cada muestra
+#     La numeración de gdl (atributo numeracion) es la de ensambla_tablas
+#     con las mismas tablas: sólo tienen gdl los que usa alguna barra
+# Funciones de la clase:
+#     resuelve_muestra(ea_p2d, ei_p2d, ea_a2d, F): desplazamientos
+#         (n_gdl) de una muestra
+#     simula(ea_p2d, ei_p2d, ea_a2d, F, procesos): desplazamientos
+#         (n_muestras, n_gdl). Cada argumento es:
+#           - común a todas las muestras: escalar, o vector (n_barras)
+#             (n_gdl en F)
+#           - distinto en cada muestra: matriz (n_muestras, n_barras)
+#             ((n_muestras, n_gdl) en F), o (n_muestras, 1) si es el
+#             mismo valor para todas las barras de la muestra
+#         Un vector nunca se toma como una muestra por valor: un valor
+#         por muestra se da como columna (n_muestras, 1)
+#---------------------------------------------------------------
+class MonteCarlo:
+    """ Clase para analizar muestras aleatorias de una misma estructura """
+    def __init__(self, coords, conect_p2d=None, conect_a2d=None, apoyos=(), liberados_p2d=None):
+        coords, self.conect_p2d, self.conect_a2d, _, self.numeracion = \
+            _numeracion_tablas(coords, conect_p2d, conect_a2d, liberados_p2d)
+        self.n_gdl = int(self.numeracion.max()) + 1 if self.numeracion.size else 0
+        self.liberados_p2d = liberados_p2d
+        self.n_p2d = self.conect_p2d.shape[0]
+        self.n_a2d = self.conect_a2d.shape[0]
+
+        if not isinstance(apoyos, Apoyos):
+            apoyos = Apoyos(self.numeracion).agrega_gdl(apoyos)
+        if np.any(apoyos.u_fijos != 0):
+            raise ValueError("MonteCarlo sólo admite apoyos con desplazamiento nulo")
+        self.gdl_libres = apoyos.gdl_libres
+        self.gdl_fijos = apoyos.gdl_fijos
+
+# Geometría de las barras
+        c, p = coords, self.conect_p2d
+        self.L_p2d, self.ang_p2d = geometria_lote(c[p[:, 0], 0], c[p[:, 0], 1],
+                                                  c[p[:, 1], 0], c[p[:, 1], 1])
+        self.M_LG_p2d = m_lg_p2d_lote(self.ang_p2d) if liberados_p2d is not None else None
+        p = self.conect_a2d
+        self.L_a2d, self.ang_a2d = geometria_lote(c[p[:, 0], 0], c[p[:, 0], 1],
+                                                  c[p[:, 1], 0], c[p[:, 1], 1])
+
+# Filas y columnas de todas las ternas COO, en el orden de las barras
+        ceros_p2d = np.zeros((self.n_p2d, 6, 6))
+        ceros_a2d = np.zeros((self.n_a2d, 4, 4))
+        f1, c1, _ = tripletes(ceros_p2d, gdl_elementos(self.conect_p2d, self.numeracion, (0, 1, 2),
+                                                       liberados_p2d))
+        f2, c2, _ = tripletes(ceros_a2d, gdl_elementos(self.conect_a2d, self.numeracion, (0, 1)))
+        filas = np.concatenate([f1, f2])
+        columnas = np.concatenate([c1, c2])
+
+# Numeración de los gdl libres (-1 en los fijos y en los gdl liberados
+# de las barras, que no existen)
+        libre = -np.ones(self.n_gdl, dtype=np.int64)
+        libre[self.gdl_libres] = np.arange(self.gdl_libres.size)
+        fl = np.where(filas >= 0, libre[filas], -1)
+        cl = np.where(columnas >= 0, libre[columnas], -1)
+        activos = (fl >= 0) & (cl >= 0)
+
+# Reordenación RCM con la estructura de la matriz reducida
+        n = self.gdl_libres.size
+        patron = sp.coo_matrix((np.ones(np.count_nonzero(activos)),
+                                (fl[activos], cl[activos])), shape=(n, n)).tocsr()
+        self.perm = reordena_rcm(patron)
+        posicion = np.empty(n, dtype=np.int64)
+        posicion[self.perm] = np.arange(n)
+        self.banda = ancho_banda(patron[self.perm][:, self.perm])
+
+# Posición de cada terna en la matriz banda inferior (b+1, n):
+# ab[i-j, j] = K[i,j] con i >= j, en la numeración reordenada
+        fp, cp = posicion[fl[activos]], posicion[cl[activos]]
+        inferior = fp >= cp
+        self.ternas = np.flatnonzero(activos)[inferior]
+        self.indice_banda = (fp[inferior] - cp[inferior]) * n + cp[inferior]
+        self.n_libres = n
+
+# Valores de las ternas de una muestra, en el mismo orden que las filas
+    def valores(self, ea_p2d=0., ei_p2d=0., ea_a2d=0.):
+        v1 = self._rigideces_p2d(ea_p2d, ei_p2d).ravel() if self.n_p2d else []
+        v2 = k_a2d_lote(ea_a2d, self.L_a2d, self.ang_a2d).ravel() if self.n_a2d else []
+        return np.concatenate([v1, v2])
+
+# Con extremos articulados se condensa en locales, como en ensambla_tablas
+    def _rigideces_p2d(self, ea_p2d, ei_p2d):
+        if self.liberados_p2d is None:
+            return k_p2d_lote(ea_p2d, ei_p2d, self.L_p2d, self.ang_p2d)
+        K_c = condensa_lote(k_p2d_local_lote(ea_p2d, ei_p2d, self.L_p2d), self.liberados_p2d)[0]
+        return self.M_LG_p2d @ K_c @ self.M_LG_p2d.transpose(0, 2, 1)
+
+# Matriz banda de la muestra: suma directa de las ternas en su posición
+    def matriz_banda(self, ea_p2d=0., ei_p2d=0., ea_a2d=0.):
+        v = self.valores(ea_p2d, ei_p2d, ea_a2d)[self.ternas]
+        n = self.n_libres
+        ab = np.bincount(self.indice_banda, weights=v, minlength=(self.banda + 1) * n)
+        return ab.reshape(self.banda + 1, n)
+
+    def resuelve_muestra(self, ea_p2d=0., ei_p2d=0., ea_a2d=0., F=0.):
+        """ Desplazamientos (n_gdl) de una muestra """
+        F = np.broadcast_to(np.asarray(F, dtype=float), (self.n_gdl,))
+        try:
+            cb = sla.cholesky_banded(self.matriz_banda(ea_p2d, ei_p2d, ea_a2d), lower=True)
+        except sla.LinAlgError:
+            raise ValueError("La matriz de rigidez de la muestra no es definida positiva")
+        up = sla.cho_solve_banded((cb, True), F[self.gdl_libres][self.perm])
+        u = np.zeros(self.n_gdl)
+        u[self.gdl_libres[self.perm]] = up
+        return u
+
+# Un bloque de muestras: cada argumento tiene una fila por muestra
+    def _bloque(self, ea_p2d, ei_p2d, ea_a2d, F):
+        U = np.empty((F.shape[0], self.n_gdl))
+        for m in range(F.shape[0]):
+            U[m] = self.resuelve_muestra(ea_p2d[m], ei_p2d[m], ea_a2d[m], F[m])
+        return U
+
+    def simula(self, ea_p2d=0., ei_p2d=0., ea_a2d=0., F=0., n_muestras=None,
+               procesos=None, tam_bloque=100):
+        """ Desplazamientos (n_muestras, n_gdl) de todas las muestras """
+        nombres = ("ea_p2d", "ei_p2d", "ea_a2d", "F")
+        tamanos = (self.n_p2d, self.n_p2d, self.n_a2d, self.n_gdl)
+        argumentos = [np.asarray(ea_p2d, dtype=float), np.asarray(ei_p2d, dtype=float),
+                      np.asarray(ea_a2d, dtype=float), np.asarray(F, dtype=float)]
+        filas = {a.shape[0] for a in argumentos if a.ndim == 2}
+        if len(filas) > 1 or (n_muestras is not None and filas - {n_muestras}):
+            raise ValueError("Los argumentos por muestra deben tener todos n_muestras filas")
+        if n_muestras is None:
+            n_muestras = filas.pop() if filas else 1
+        for nombre, tamano, a in zip(nombres, tamanos, argumentos):
+            columnas = a.shape[-1] if a.ndim else 1
+            if a.ndim > 2 or columnas not in (1, tamano):
+                raise ValueError("%s debe tener 1 o %d valores, comunes a todas las muestras "
+                                 "o en una fila por muestra" % (nombre, tamano))
+# Los argumentos comunes a todas las muestras se repiten (sin copiar)
+        argumentos = [a if a.ndim == 2 else
+                      np.broadcast_to(a, (n_muestras,) + np.atleast_1d(a).shape)
+                      for a in argumentos]
+
+        bloques = [[a[i:i + tam_bloque] for a in argumentos]
+                   for i in range(0, n_muestras, tam_bloque)]
+        if procesos is None or procesos <= 1:
+            return np.vstack([self._bloque(*b) for b in bloques])
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            futuros = [ejecutor.submit(self._bloque, *b) for b in bloques]
+            return np.vstack([f.result() for f in futuros])
+
+#---------------------------------------------------------------
+# Función estadisticas: Media, desviación típica y cuantiles
+#     U: matriz (n_muestras, n) de resultados
+#     Salida: diccionario con "media" (n), "desviacion" (n) y
+#             "cuantiles" (n_cuantiles, n)
+#---------------------------------------------------------------
+def estadisticas(U, cuantiles=(0.05, 0.5, 0.95)):
+    """ Estadísticas de los resultados de las muestras """
+    U = np.asarray(U, dtype=float)
+    return {"media": U.mean(axis=0),
+            "desviacion": U.std(axis=0, ddof=1) if U.shape[0] > 1 else np.zeros(U.shape[1:]),
+            "cuantiles": np.quantile(U, cuantiles, axis=0)}
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import numpy as np
+
+from rigidez import (geometria_lote, geometria_3d_lote, k_p2d_local_lote, m_lg_p2d_lote,
+                     kg_p2d_local_lote, kg_p2d_lote, kg_a2d_lote, kg_a3d_lote,
+                     axiles_a2d_lote, axiles_a3d_lote, condensa_lote)
+from ensamblaje import gdl_elementos, valores_gdl, tripletes, ensambla_coo
+from resolucion import autovalores_inversos
+
+#===============================================================
+# PANDEO LINEAL (FACTORES DE CARGA CRÍTICA)
+#     1) Se resuelve la estructura con las cargas de referencia F y se
+#        calculan los axiles N de las barras
+#     2) Se ensambla la matriz geométrica K_G(N), dispersa
+#     3) (K + lambda K_G) phi = 0: lambda es el factor por el que hay
+#        que multiplicar F para que la estructura pandee, y phi el modo
+# Se buscan los menores lambda > 0 con la factorización de K del modelo
+# (ver resolucion.autovalores_inversos). Los axiles se calculan con los
+# desplazamientos de los nudos: no incluyen el efecto de cargas axiles
+# repartidas en las barras. Con una barra por pilar sólo se obtiene una
+# aproximación: conviene dividir en varias barras los elementos que
+# pueden pandear.
+#===============================================================
+
+#---------------------------------------------------------------
+# Función axiles_tablas: Axiles de las barras P2D y A2D
+#     coords, conect_p2d, ea_p2d, conect_a2d, ea_a2d: como en
+#         ensamblaje.ensambla_tablas
+#     u: vector (n_gdl) de desplazamientos de la carga de referencia
+#     numeracion: numeración de gdl del modelo
+#     Salida: (N_p2d, N_a2d), positivos a tracción
+#---------------------------------------------------------------
+def axiles_tablas(coords, u, numeracion, conect_p2d=None, ea_p2d=0., conect_a2d=None,
+                  ea_a2d=0.):
+    """ Axiles (N_p2d, N_a2d) de las barras a partir de los desplazamientos """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    axiles = []
+    for conect, ea, locales in ((conect_p2d, ea_p2d, (0, 1)), (conect_a2d, ea_a2d, (0, 1))):
+        conect = np.asarray(conect if conect is not None else [], dtype=np.int64).reshape(-1, 2)
+        L, angulo = geometria_lote(coords[conect[:, 0], 0], coords[conect[:, 0], 1],
+                                   coords[conect[:, 1], 0], coords[conect[:, 1], 1])
+        u_e = valores_gdl(u, gdl_elementos(conect, numeracion, locales))
+        axiles.append(axiles_a2d_lote(ea, L, angulo, u_e) if conect.shape[0] else np.zeros(0))
+    return tuple(axiles)
+
+#---------------------------------------------------------------
+# Función geometrica_tablas: Matriz geométrica global de barras P2D y A2D
+#     N_p2d, N_a2d: axiles de las barras (ver axiles_tablas)
+#     liberados_p2d: gdl locales condensados de las barras P2D, como en
+#         ensambla_tablas. En esas barras se usa T^T K_G T, siendo
+#         u = T u_r la recuperación de la condensación estática (por
+#         eso hacen falta ea_p2d y ei_p2d)
+#     Salida: matriz CSR (n_gdl, n_gdl)
+#---------------------------------------------------------------
+def geometrica_tablas(coords, numeracion, conect_p2d=None, N_p2d=0., conect_a2d=None,
+                      N_a2d=0., ea_p2d=0., ei_p2d=0., liberados_p2d=None):
+    """ Matriz de rigidez geométrica global dispersa """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    n_gdl = int(np.max(numeracion)) + 1
+    conect_p2d = np.asarray(conect_p2d if conect_p2d is not None else [],
+                            dtype=np.int64).reshape(-1, 2)
+    conect_a2d = np.asarray(conect_a2d if conect_a2d is not None else [],
+                            dtype=np.int64).reshape(-1, 2)
+    filas, columnas, valores = [], [], []
+
+    if conect_p2d.shape[0] > 0:
+        c = conect_p2d
+        L, angulo = geometria_lote(coords[c[:, 0], 0], coords[c[:, 0], 1],
+                                   coords[c[:, 1], 0], coords[c[:, 1], 1])
+        if liberados_p2d is None:
+            K_G = kg_p2d_lote(N_p2d, L, angulo)
+        else:
+            T = condensa_lote(k_p2d_local_lote(ea_p2d, ei_p2d, L), liberados_p2d)[1]
+            M_LG = m_lg_p2d_lote(angulo)
+            K_G = M_LG @ T.transpose(0, 2, 1) @ kg_p2d_local_lote(N_p2d, L) @ T \
+                @ M_LG.transpose(0, 2, 1)
+        f, co, v = tripletes(K_G, gdl_elementos(c, numeracion, (0, 1, 2), liberados_p2d))
+        filas.append(f)
+        columnas.append(co)
+        valores.append(v)
+    if conect_a2d.shape[0] > 0:
+        c = conect_a2d
+        L, angulo = geometria_lote(coords[c[:, 0], 0], coords[c[:, 0], 1],
+                                   coords[c[:, 1], 0], coords[c[:, 1], 1])
+        f, co, v = tripletes(kg_a2d_lote(N_a2d, L, angulo), gdl_elementos(c, numeracion, (0, 1)))
+        filas.append(f)
+        columnas.append(co)
+        valores.append(v)
+
+    if not filas:
+        return ensambla_coo(np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0), n_gdl)
+    return ensambla_coo(np.concatenate(filas), np.concatenate(columnas),
+                        np.concatenate(valores), n_gdl)
+
+#---------------------------------------------------------------
+# Funciones axiles_a3d, geometrica_a3d: Lo mismo para celosías 3D
+#     coords: matriz (n_nudos,3). numeracion: 3 gdl por nudo
+#---------------------------------------------------------------
+def axiles_a3d(coords, conect, ea, u, numeracion):
+    """ Axiles de las barras A3D a partir de los desplazamientos """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 3)
+    conect = np.asarray(conect, dtype=np.int64).reshape(-1, 2)
+    L, v = geometria_3d_lote(coords[conect[:, 0]], coords[conect[:, 1]])
+    return axiles_a3d_lote(ea, L, v, valores_gdl(u, gdl_elementos(conect, numeracion)))
+
+def geometrica_a3d(coords, conect, N, numeracion):
+    """ Matriz de rigidez geométrica global dispersa de una celosía 3D """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 3)
+    conect = np.asarray(conect, dtype=np.int64).reshape(-1, 2)
+    L, v = geometria_3d_lote(coords[conect[:, 0]], coords[conect[:, 1]])
+    f, c, valores = tripletes(kg_a3d_lote(N, L, v), gdl_elementos(conect, numeracion))
+    return ensambla_coo(f, c, valores, int(np.max(numeracion)) + 1)
+
+#---------------------------------------------------------------
+# Función pandeo: Factores de carga crítica y modos de pandeo
+#     modelo: Modelo (modelo.py) con la matriz K ensamblada y los apoyos.
+#             Se usa la factorización de K_ll del modelo (ver
+#             Modelo.rigidez_libres; si ya se ha resuelto, no se repite)
+#     K_G: matriz geométrica de la carga de referencia
+#     n_modos: número de modos pedidos
+#     Salida: (factores, modos). factores: los lambda > 0, de menor a
+#             mayor; modos: matriz (n_gdl, n) con los modos, de valor
+#             absoluto máximo 1, y ceros en los gdl fijos
+#---------------------------------------------------------------
+def pandeo(modelo, K_G, n_modos=6):
+    """ Menores factores de carga crítica de K phi = -lambda K_G phi """
+    K_ll, factorizacion = modelo.rigidez_libres()
+    G_ll = -modelo.apoyos.particiona(K_G)[0]
+    mu, phi = autovalores_inversos(G_ll, K_ll, factorizacion, n_modos)
+
+# Sólo los mu > 0 son de pandeo (las barras comprimidas dominan)
+    positivos = mu > 0
+    factores = 1. / mu[positivos]
+    modos = np.zeros((modelo.n_gdl, factores.size))
+    modos[modelo.gdl_libres] = phi[:, positivos]
+    indice = np.argmax(np.abs(modos), axis=0)
+    modos /= modos[indice, np.arange(factores.size)]
+    return factores, modos
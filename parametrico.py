@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import numpy as np
+
+#===============================================================
+# ESTUDIOS PARAMÉTRICOS DE UNA BARRA P2D
+# Fuerzas en los extremos P = K_local * u para una malla de valores de
+# L, EA, EI y desplazamientos impuestos u. No se construye ninguna
+# matriz 6x6: cada componente de P se escribe directamente en función
+# de los términos de la matriz, y numpy lo evalúa para toda la malla.
+#===============================================================
+
+#---------------------------------------------------------------
+# Función fuerzas_extremo: P = K_local * u con "broadcasting"
+#     EA, EI, L: escalares o arrays que se puedan expandir a una forma S
+#     u: desplazamientos (ui_x, ui_y, theta_i, uj_x, uj_y, theta_j),
+#        de dimensión (6) o S + (6)
+#     out: array de salida S + (6), opcional (se rellena, sin copias)
+#     Salida: fuerzas (Pi_x, Pi_y, M_i, Pj_x, Pj_y, M_j), forma S + (6)
+#---------------------------------------------------------------
+def fuerzas_extremo(EA, EI, L, u, out=None):
+    """ Fuerzas en los extremos de barras P2D: P = K_local * u """
+    EA = np.asarray(EA, dtype=float)
+    EI = np.asarray(EI, dtype=float)
+    L = np.asarray(L, dtype=float)
+    u = np.asarray(u, dtype=float)
+    forma = np.broadcast_shapes(EA.shape, EI.shape, L.shape, u.shape[:-1])
+    if out is None:
+        out = np.empty(forma + (6,))
+
+# Diferencias de desplazamientos entre extremos
+    du_x = u[..., 0] - u[..., 3]
+    du_y = u[..., 1] - u[..., 4]
+
+    k_ax = EA / L
+    k_11 = 12 * EI / L**3
+    k_12 = 6 * EI / L**2
+    k_22 = 2 * EI / L
+
+    out[..., 0] = k_ax * du_x
+    out[..., 3] = -out[..., 0]
+    out[..., 1] = k_11 * du_y + k_12 * (u[..., 2] + u[..., 5])
+    out[..., 4] = -out[..., 1]
+    out[..., 2] = k_12 * du_y + k_22 * (2 * u[..., 2] + u[..., 5])
+    out[..., 5] = k_12 * du_y + k_22 * (u[..., 2] + 2 * u[..., 5])
+    return out
+
+#---------------------------------------------------------------
+# Función barrido: Fuerzas en los extremos para todas las combinaciones
+#     L, EA, EI: vectores con los valores de cada parámetro
+#     U: matriz (n_u, 6) de casos de desplazamientos impuestos, o (6)
+#     Salida: array (n_L, n_EA, n_EI, n_u, 6)
+#---------------------------------------------------------------
+def barrido(L, EA, EI, U):
+    """ Malla completa de fuerzas en los extremos """
+    L = np.atleast_1d(np.asarray(L, dtype=float))
+    EA = np.atleast_1d(np.asarray(EA, dtype=float))
+    EI = np.atleast_1d(np.asarray(EI, dtype=float))
+    U = np.asarray(U, dtype=float).reshape(-1, 6)
+    return fuerzas_extremo(EA[None, :, None, None], EI[None, None, :, None],
+                           L[:, None, None, None], U[None, None, None, :, :])
+
+#---------------------------------------------------------------
+# Función barrido_bloques: Igual que barrido, por bloques
+#     Para mallas que no caben en memoria. Los puntos de la malla se
+#     recorren en el orden de barrido (índice plano), en bloques de
+#     tam_bloque puntos. Se devuelven pares (inicio, P_bloque), con
+#     P_bloque de dimensión (m, 6) y m <= tam_bloque.
+#     El vector P_bloque se reutiliza en cada bloque: si se quiere
+#     guardar, hay que copiarlo (o escribirlo a disco).
+#     salida: array (n_puntos, 6) opcional, p.ej. un np.memmap. Si se da,
+#             los bloques se escriben directamente en él.
+#---------------------------------------------------------------
+def barrido_bloques(L, EA, EI, U, tam_bloque=1000000, salida=None):
+    """ Generador de bloques (inicio, P_bloque) de la malla de fuerzas """
+    L = np.atleast_1d(np.asarray(L, dtype=float))
+    EA = np.atleast_1d(np.asarray(EA, dtype=float))
+    EI = np.atleast_1d(np.asarray(EI, dtype=float))
+    U = np.asarray(U, dtype=float).reshape(-1, 6)
+    forma = (L.size, EA.size, EI.size, U.shape[0])
+    n_puntos = int(np.prod(forma))
+
+    bloque = np.empty((min(tam_bloque, n_puntos), 6))
+    for inicio in range(0, n_puntos, tam_bloque):
+        fin = min(inicio + tam_bloque, n_puntos)
+        i_L, i_EA, i_EI, i_U = np.unravel_index(np.arange(inicio, fin), forma)
+        destino = bloque[:fin - inicio] if salida is None else salida[inicio:fin]
+        fuerzas_extremo(EA[i_EA], EI[i_EI], L[i_L], U[i_U], out=destino)
+        yield inicio, destino
@@ -14,30 +14,18 @@ Licencia Creative-Commons CC BY-NC-ND 3.0 ES
 
 import numpy as np              #Para importar la librería numpy
 import matplotlib.pyplot as plt #Para dibujar
+from rigidez import k_p2d_local_lote #Matrices de rigidez por lotes
+from parametrico import fuerzas_extremo #Estudios paramétricos
 
 #===============================================================
 #Función para crear la matriz de rigidez de un elemento de 6 gdl
 #Pórtico 2D (P2D)
 #===============================================================
 def k_p2d(ea, ei, lon):
-    k_local = np.zeros([6,6])
-
-    #Se rellenan primero los términos de la triangular superior
-    #En Python las matrices y vectores se indexan desde el 0,1,2,3...
-    #Una matriz 6x6 tendrá índices desde el 0,1,2,3,4,5.
-    k_local[0,:] = np.array([ ea / lon, 0., 0., -ea / lon, 0., 0.])
-    k_local[1,1:] = np.array([12 * ei / lon**3, 6* ei / lon**2, 0,
-                     -12 * ei / lon**3, 6 * ei / lon**2])
-    k_local[2,2:] = np.array([4 * ei / lon, 0, -6 * ei / lon**2, 2 * ei / lon ])
-    k_local[3,3:] = np.array([ea / lon, 0, 0])
-    k_local[4,4:] = np.array([12 * ei / lon**3, -6 * ei / lon**2])
-    k_local[5,5]  = 4 * ei / lon
-
-    #El resto de la matriz se construye por simetría.
-    #Se suma k_local + traspuesta (k_local)
-    #Se resta la diagonal de k_local para que no aparezca 2 veces
-    #Para escribir la traspuesta de k_local, simplemente se escribe k_local.T
-    k_local = (k_local + k_local.T) -  np.diag ( np.diag(k_local) )
+    #La matriz se obtiene con la función por lotes k_p2d_local_lote,
+    #que calcula a la vez las matrices de n barras (ver rigidez.py).
+    #Aquí se pide una sola barra, y se extrae la primera matriz [0]
+    k_local = k_p2d_local_lote(ea, ei, lon)[0]
 
     #Salida de la función:
     return k_local
@@ -123,12 +111,11 @@ print("Mj   = ", P_local[5])
 #Estudio paramétrico
 #===============================================================
 Longitudes = np.linspace(0.5, 5, 50) #Vector desde 0.5 hasta 5, con 50 puntos intermedios
-VecPi_y = []
-
-for Longitud in Longitudes:
-    Mrigidez = k_p2d(EA, EI, Longitud)
-    P = np.dot(Mrigidez,u)
-    VecPi_y = np.append(VecPi_y,P[1]) #La posición [1] es la segunda, pues la primera es P[0]
+#Las fuerzas se calculan para todas las longitudes a la vez con la
+#función fuerzas_extremo (ver parametrico.py), sin bucle ni np.append.
+#Devuelve una fila (Pi_x, Pi_y, M_i, Pj_x, Pj_y, Mj) por cada longitud
+P = fuerzas_extremo(EA, EI, Longitudes, u)
+VecPi_y = P[:,1] #La columna [1] es la segunda, pues la primera es P[:,0]
 
 print("")
 print("Longitud,     Pi_y")
@@ -7,6 +7,7 @@ Licencia Creative-Commons CC BY-NC-ND 3.0 ES
 """
 
 import numpy as np
+from rigidez import k_p2d_global, bloques_lote
 
 #===============================================================
 # FUNCIONES PARA P2D
@@ -21,40 +22,28 @@ def K_P2D(EA, EI, L, Angulo):
     ## L = Longitud de la barra
     ## Angulo = angulo de orientación de la barra, en grados sexagesimales
      Angulo = Angulo * np.pi / 180.
-     
-# Matriz de cambio de base de local a global  M_{L,G}:   
-     M_LG = np.array([[np.cos(Angulo), -np.sin(Angulo), 0],
-                      [np.sin(Angulo), np.cos(Angulo), 0],
-                      [0,             0,             1]])
-
-# Se expande a una 6x6. Se construye por bloques, el bloque fuera de la diagonal es una matriz 3x3 de ceros. Esto se genera con np.zeros((3,3))
-     M_LG = np.vstack([np.hstack([M_LG, np.zeros((3,3))]),
-                       np.hstack([np.zeros((3,3)), M_LG])] )
-         
-# Primero se inicia en cero: 
-     K_L = np.zeros((6,6))
-
-# Se rellenan los términos de la diagonal superior:
-     K_L[0,:] = np.array([ EA / L, 0., 0., - EA / L, 0., 0.])
-     K_L[1,1:] = np.array([12 * EI / L**3, 6* EI / L**2, 0, 
-                     -12 * EI / L**3, 6 * EI / L**2])
-     K_L[2,2:] = np.array([4 * EI / L, 0, -6 * EI / L**2, 2 * EI / L ])
-     K_L[3,3:] = np.array([EA / L, 0, 0])
-     K_L[4,4:] = np.array([12 * EI / L**3, -6 * EI / L**2])
-     K_L[5,5]  = 4 * EI / L
-     
-# Se construye el resto de la matriz por simetría. Se suma K_local + traspuesta (K_local), en numpy la traspuesta se obtiene con .T
-# Se resta la diagonal de k_local para que no aparezca 2 veces
-     K_L = (K_L + K_L.T) -  np.diag ( np.diag(K_L) )
-     
-# Cambio de base a coordenadas globales:  K_G = M(L,G) * K_L * M(G,L) 
-# El producto se realiza sabiendo que el producto matricial A*B = np.dot(A,B)
-     K_G = np.dot(M_LG, np.dot(K_L , M_LG.T ) )      
-    
+
+# La matriz K_G = M(L,G) * K_L * M(G,L) se obtiene con la función
+# k_p2d_global (ver rigidez.py), que escribe directamente sus términos
+# en función de cos, sin, EA/L y EI/L^n, sin multiplicar matrices.
+# Para muchas barras a la vez está la función por lotes k_p2d_lote
+     K_G = k_p2d_global(EA, EI, L, Angulo)
+
 # Salida de la función: la submatriz cambiada a globales
      return K_G
 
 
+#---------------------------------------------------------------
+# Función para obtener las cuatro submatrices de un P2D
+#---------------------------------------------------------------
+def K_P2D_bloques(ea, ei, lon, angle):
+## Esta función obtiene las submatrices 3x3 (11, 12, 21, 22) de un P2D cambiadas a globales
+## Se calcula una sola vez la matriz 6x6. Los bloques son vistas de ella (no se copian)
+     K_globales = K_P2D(ea, ei, lon, angle)
+     B = bloques_lote(K_globales[None])[0] # B[i,j] es el bloque ij, indexando desde 0
+     return B[0,0], B[0,1], B[1,0], B[1,1]
+
+
 #---------------------------------------------------------------
 # Función para definir una submatriz de un P2D
 #---------------------------------------------------------------
@@ -74,11 +63,8 @@ def K_P2D_sub(ea, ei, lon, angle, icol, jcol):
      icol = icol -1
      jcol = jcol -1 
      
-# Llamada a la función K_P2D para generar la matriz 6x6:
-     K_globales = K_P2D(ea, ei, lon, angle)
-
-# Extracción del bloque:
-     K_Bloque = K_globales[icol * 3 : icol * 3 + 3 , jcol * 3 : jcol * 3 + 3]
+# Llamada a la función K_P2D_bloques, y extracción del bloque:
+     K_Bloque = K_P2D_bloques(ea, ei, lon, angle)[icol * 2 + jcol]
      
      return K_Bloque
 
@@ -6,6 +6,11 @@ amcastro@ugr.es
 Licencia Creative-Commons CC BY-NC-ND 3.0 ES
 """
 import numpy as np              
+from ensamblaje import ensambla, gdl_elementos
+from modelo import Modelo
+from apoyos import Apoyos
+from cargas import CargasBarras
+from esfuerzos import desplazamientos_barras, fuerzas_extremos, diagramas
 
 #===============================================================
 # DEFINICIÓN DE CLASES Y FUNCIONES 
@@ -13,164 +18,20 @@ import numpy as np
 # Completa y con submatrices
 # Programación Orientada a Objetos
 #===============================================================
-
-#---------------------------------------------------------------
-# Definición de la clase "Punto". Coordenadas (x, y) de un punto
-#    Observación: Se inicializa con las coordenadas (0,0)
-#    Se define bidimensional, pues se usará para el P2D
-#---------------------------------------------------------------
-class Punto2D:
-    """ Clase para representar los puntos en 3D, coordenadas x, y, z """
-    def __init__(self, x=0, y=0):
-        self.x = x
-        self.y = y 
-    def coords(self):
-        return "({0}, {1})".format(self.x, self.y)
-
-#---------------------------------------------------------------
-# Definición de la función "longitud" 
-# Calcula la distancia entre dos puntos
-# Trabaja con p1,p2. Es una función "amiga" de la clase Punto 
-#---------------------------------------------------------------
-def longitud(p1, p2):
-    """ Devuelve la longitud (módulo) del vector p1-p2 """
-    Longitud = 0
-    Longitud += (p2.x - p1.x ) ** 2
-    Longitud += (p2.y - p1.y ) ** 2
-    Longitud = np.sqrt(Longitud)
-    return Longitud
-
-#---------------------------------------------------------------
-# Definición de la función "alfa"
-# Devuelve el ángulo que define el vector P1 -> P2
-# La función "arctan2" devuelve el ángulo buscado
-#---------------------------------------------------------------
-def alfa(p1,p2):
-    """Angulo P1 -> P2"""
-    vy = p2.y -p1.y
-    vx = p2.x -p1.x
-    angulo = np.arctan2(vy,vx)
-    return angulo
-
-#---------------------------------------------------------------
-# Definición de la clase "P2D", para barra P2D
-#---------------------------------------------------------------
-# Inicialización: A partir de dos puntos, y los parámetros EA, EI
-# Funciones de la clase:  
+# Las clases Punto2D, P2D y A2D, y las funciones longitud y alfa, están en tablas.py
+# Los puntos y barras se guardan en tablas de numpy (una fila por nudo o barra). Cada objeto es una vista de su fila.
+# Funciones de la clase P2D:  
 #     K_local: Para obtener la matriz de rigidez en locales (6x6)
 #     M_lg: Matriz de cambio de base de Locales a Globales (6x6)
 #     K_global: Para obtener la matriz de rigidez en globales (6x6)
 #     K_global_caja(i,j): Para obtener la submatriz ij en globales (3x3)
-
-class P2D:
-    """ Clase para representar la barra P2D """
-    def __init__(self, p1 = Punto2D(), p2 = Punto2D(), ea = 0, ei = 0):
-        self.p1 = p1
-        self.p2 = p2
-        self.ea = ea
-        self.ei = ei
-
-    def K_local(self):
-        L = longitud(self.p1,self.p2)
-        EA = self.ea
-        EI = self.ei        
-       
-        K_L = np.zeros((6,6))
-
-        K_L[0,:] = np.array([ EA / L, 0., 0., - EA / L, 0., 0.])
-        K_L[1,1:] = np.array([12 * EI / L**3, 6* EI / L**2, 0, 
-                     -12 * EI / L**3, 6 * EI / L**2])
-        K_L[2,2:] = np.array([4 * EI / L, 0, -6 * EI / L**2, 2 * EI / L ])
-        K_L[3,3:] = np.array([EA / L, 0, 0])
-        K_L[4,4:] = np.array([12 * EI / L**3, -6 * EI / L**2])
-        K_L[5,5]  = 4 * EI / L
-        
-        K_L = (K_L + K_L.T) -  np.diag ( np.diag(K_L) )
-        
-        return K_L
-
-    def M_lg(self):
-        Angulo = alfa (self.p1, self.p2)   
-        
-        M_LG = np.array([[np.cos(Angulo), -np.sin(Angulo), 0],
-                      [np.sin(Angulo), np.cos(Angulo), 0],
-                      [0,             0,             1]])
-        M_LG = np.vstack([np.hstack([M_LG, np.zeros((3,3))]),
-                       np.hstack([np.zeros((3,3)), M_LG])] )
-
-        return M_LG
-
-    def K_global(self): 
-        
-        M_LG = self.M_lg() 
-        K_L = self.K_local() 
-        
-        K_G = np.dot(M_LG, np.dot(K_L , M_LG.T ))  
-        
-        return K_G
-        
-# Función para extraer una submatriz
-    def K_global_caja(self,icol=1,jcol=1):
-        if (icol not in ([1,2]) or jcol not in ([1,2]) ):
-            print("Valores de icol, jcol fuera de rango")
-            return
-        icol = icol -1
-        jcol = jcol -1 
-        kg  = self.K_global()
-
-        K_sub = kg[icol * 3:icol * 3 + 3 , jcol * 3 : jcol * 3 + 3]
-     
-        return K_sub
-
-#---------------------------------------------------------------
-# Definición de la clase "A2D", para barra A2D
-#---------------------------------------------------------------
-# Inicialización: A partir de dos puntos, y el parámetro ea
-# Funciones de la clase:  
+# Funciones de la clase A2D:  
 #     K_local : Para obtener la matriz de rigidez en locales (2x2)
 #     M_lg : Matriz de cambio de base de Locales a Globales (4x2)
-#     K_global: Para obtener la matriz de rigidez en globales (6x6)
+#     K_global: Para obtener la matriz de rigidez en globales (4x4)
 #     K_global_caja(i,j): Para obtener la submatriz en ij en globales (2x2)
-
-     
-class A2D:
-    """ Clase para representar la barra A2D """
-    def __init__(self, p1 = Punto2D(), p2 = Punto2D(), ea = 0):
-        self.p1 = p1
-        self.p2 = p2
-        self.ea = ea
-
-    def K_local(self):
-        L = longitud(self.p1,self.p2)
-        EA = self.ea     
-        K_L = np.array([[EA / L, -EA / L],
-                     [-EA / L, EA / L]])
-        return K_L
-
-    def M_lg(self):
-        Angulo = alfa (self.p1, self.p2)   
-        M_LG = np.array([[np.cos(Angulo), 0],
-               [np.sin(Angulo), 0],
-               [0, np.cos(Angulo)],
-               [0, np.sin(Angulo)]])
-        return M_LG
-
-    def K_global(self): 
-        M_LG = self.M_lg() 
-        K_L = self.K_local() 
-        K_G = np.dot(M_LG, np.dot(K_L , M_LG.T ))  
-        return K_G
-        
-# Función para extraer una submatriz
-    def K_global_caja(self,icol=1,jcol=1):
-        if (icol not in ([1,2]) or jcol not in ([1,2]) ):
-            print("Valores de icol, jcol fuera de rango")
-            return
-        icol = icol -1
-        jcol = jcol -1 
-        kg  = self.K_global()
-        K_sub = kg[icol * 2:icol * 2 + 2 , jcol * 2 : jcol * 2 + 2]
-        return K_sub
+from tablas import reinicia_estructura, Punto2D, P2D, A2D, longitud, alfa
+reinicia_estructura() # Los puntos y barras del ejemplo van a una estructura por defecto nueva
 
 
 #===============================================================
@@ -282,6 +143,17 @@ print("")
 print("Matriz de rigidez tras eliminar filas-columnas 2 y 3")
 print(krigidez_final)
 
+#---------------------------------------------------------------
+# Comprobación con el ensamblaje automático (ver ensamblaje.py)
+#---------------------------------------------------------------
+# La función "ensambla" numera los gdl de los nudos en el orden de la lista y ensambla todas las barras en una matriz dispersa.
+# Cada nudo tiene sólo los gdl a los que llega alguna barra: el nudo 4, al que sólo llega la barra A2D, no tiene giro (numeracion[3,2] = -1).
+# Se extraen los gdl libres: u_1x y los 3 gdl del nudo 2. Python indexa desde 0.
+K_disp, numeracion = ensambla([barra_a, barra_b, barra_c], [p1, p2, p3, p4])
+libres = np.array([numeracion[0,0], *numeracion[1]])
+print("")
+print("¿Coincide con el ensamblaje automático?", np.allclose(K_disp[libres][:,libres].toarray(), krigidez_final))
+
 
 #---------------------------------------------------------------
 # Vector de fuerzas de empotramiento
@@ -289,10 +161,13 @@ print(krigidez_final)
 # Aparecen fuerzas de empotramiento en los nudos 2 y 3 debido a la carga distribuida en la barra b.
 # Sólo interviene la fuerza de empotramiento del nudo 2
 
-# Calculamos el vector de fuerzas de empotramiento del nudo 2, debido a la carga q:
+# Calculamos el vector de fuerzas de empotramiento del nudo 2, debido a la carga q (ver cargas.py).
+# La carga va hacia abajo: componente Y global negativa
 q = 100  # kN/m
-Lb = longitud(p2,p3)
-p2 = np.array([0, q * Lb / 2, q * Lb**2 / 12.]) 
+cargas_b = CargasBarras(longitud(p2,p3), alfa(p2,p3))
+cargas_b.uniforme(0, qy = -q, ejes = "globales")
+F_emp_b = cargas_b.empotramiento()[0] # (F_2x, F_2y, M_2, F_3x, F_3y, M_3)
+p2 = F_emp_b[0:3]
 
 vec_fuerzas = np.zeros(6)
 vec_fuerzas[3:6] = p2
@@ -311,3 +186,53 @@ print("u_1x =", u[0], "m")
 print("u_2x =", u[1], "m")
 print("u_2y =", u[2], "m")
 print("Theta_2 =", u[3], "rad")
+
+#---------------------------------------------------------------
+## Varios casos de carga con una sola factorización (ver modelo.py)
+#---------------------------------------------------------------
+# Se usan K_disp y numeracion del ensamblaje automático. Los apoyos se definen por nudos (indexando desde 0), ver apoyos.py
+# El nudo 4 no tiene giro: basta con la articulación.
+apoyos = Apoyos(numeracion)
+apoyos.agrega(0, "deslizante_x")
+apoyos.agrega(2, "empotramiento")
+apoyos.agrega(3, "articulacion")
+modelo = Modelo(K_disp, numeracion, apoyos)
+
+# Una columna por caso de carga: q = 100, 50 y 150 kN/m en la barra b. Fuerzas de empotramiento cambiadas de signo en los nudos 2 y 3
+# Las fuerzas de empotramiento son proporcionales a q: se usan las de q = 100 escaladas
+cargas = np.array([100., 50., 150.])
+F = np.zeros((K_disp.shape[0], cargas.size))
+F[numeracion[1:3].ravel()] = -np.outer(F_emp_b / q, cargas) # El nudo 3 sólo interviene en sus reacciones
+
+d = modelo.resuelve(F)
+print("")
+print("Casos de carga q =", cargas, "kN/m")
+print("u_2y =", d["uy"][:,1], "m")
+print("¿Coincide el caso q = 100?", np.isclose(d["uy"][0,1], u[2]))
+print("")
+print("Reacciones del caso q = 100 (gdl", apoyos.gdl_fijos, ")")
+print(modelo.reacciones(F)[:,0])
+
+#---------------------------------------------------------------
+## Esfuerzos en las barras P2D, para todos los casos (ver esfuerzos.py)
+#---------------------------------------------------------------
+# Desplazamientos de los extremos de cada barra -> fuerzas en los extremos en locales (P = K_L u_l + F_emp) -> leyes N, V, M
+# Las barras a y b unen los nudos 1-2 y 2-3 (0-1 y 1-2 indexando desde 0)
+barras_p2d = [barra_a, barra_b]
+gdl_p2d = gdl_elementos([[0, 1], [1, 2]], numeracion)
+L_p2d = [barra.longitud() for barra in barras_p2d]
+alfa_p2d = [barra.alfa() for barra in barras_p2d]
+K_L_p2d = np.array([barra.K_local() for barra in barras_p2d])
+
+# Las cargas de cada caso, con la carga q en la barra b (índice 1 del grupo)
+cargas_casos = [CargasBarras(L_p2d, alfa_p2d).uniforme(1, qy = -qc, ejes = "globales") for qc in cargas]
+F_emp_casos = np.stack([c.empotramiento("locales") for c in cargas_casos], axis = -1)
+
+u_casos = modelo.resuelve_gdl(F)
+P = fuerzas_extremos(K_L_p2d, alfa_p2d, desplazamientos_barras(u_casos, gdl_p2d), F_emp_casos)
+x, N, V, M = diagramas(L_p2d, P, cargas_casos, n_puntos = 5)
+print("")
+print("Esfuerzos en la barra b, caso q = 100, en x =", x[1], "m")
+print("N =", N[1, :, 0], "kN")
+print("V =", V[1, :, 0], "kN")
+print("M =", M[1, :, 0], "kN m")
@@ -15,194 +15,27 @@ import matplotlib.pyplot as plt
 # Completa y con submatrices
 # Programación Orientada a Objetos
 #===============================================================
-
-#---------------------------------------------------------------
-# Definición de la clase "Punto". Coordenadas (x, y) de un punto
-#    Observación: Se inicializa con las coordenadas (0,0)
-#    Se define bidimensional, pues se usará para el P2D
-#---------------------------------------------------------------
-class Punto2D:
-    """ Clase para representar los puntos en 3D, coordenadas x, y, z """
-    def __init__(self, x=0, y=0):
-        self.x = x
-        self.y = y 
-    def coords(self):
-        return "({0}, {1})".format(self.x, self.y)
-
-#---------------------------------------------------------------
-# Definición de la función "longitud" 
-# Calcula la distancia entre dos puntos
-# Trabaja con p1,p2. Es una función "amiga" de la clase Punto 
-#---------------------------------------------------------------
-def longitud(p1, p2):
-    """ Devuelve la longitud (módulo) del vector p1-p2 """
-    Longitud = 0
-    Longitud += (p2.x - p1.x ) ** 2
-    Longitud += (p2.y - p1.y ) ** 2
-    Longitud = np.sqrt(Longitud)
-    return Longitud
-
-#---------------------------------------------------------------
-# Definición de la función "alfa"
-# Devuelve el ángulo que define el vector P1 -> P2
-# La función "arctan2" devuelve el ángulo buscado
-#---------------------------------------------------------------
-def alfa(p1,p2):
-    """Angulo P1 -> P2"""
-    vy = p2.y -p1.y
-    vx = p2.x -p1.x
-    angulo = np.arctan2(vy,vx)
-    return angulo
-
-#---------------------------------------------------------------
-# Definición de la clase "P2D", para barra P2D
-#---------------------------------------------------------------
-# Inicialización: A partir de dos puntos, y los parámetros EA, EI
-# Funciones de la clase:  
+# Las clases Punto2D, P2D y A2D, y las funciones longitud y alfa, están en tablas.py
+# Los puntos y barras se guardan en tablas de numpy (una fila por nudo o barra). Cada objeto es una vista de su fila.
+# Funciones de la clase P2D:  
 #     K_local: Para obtener la matriz de rigidez en locales (6x6)
 #     M_lg: Matriz de cambio de base de Locales a Globales (6x6)
 #     K_global: Para obtener la matriz de rigidez en globales (6x6)
 #     K_global_caja(i,j): Para obtener la submatriz ij en globales (3x3)
-
-class P2D:
-    """ Clase para representar la barra P2D """
-    def __init__(self, p1 = Punto2D(), p2 = Punto2D(), ea = 0, ei = 0):
-        self.p1 = p1
-        self.p2 = p2
-        self.ea = ea
-        self.ei = ei
-
-    def K_local(self):
-        L = longitud(self.p1,self.p2)
-        EA = self.ea
-        EI = self.ei        
-       
-        K_L = np.zeros((6,6))
-
-        K_L[0,:] = np.array([ EA / L, 0., 0., - EA / L, 0., 0.])
-        K_L[1,1:] = np.array([12 * EI / L**3, 6* EI / L**2, 0, 
-                     -12 * EI / L**3, 6 * EI / L**2])
-        K_L[2,2:] = np.array([4 * EI / L, 0, -6 * EI / L**2, 2 * EI / L ])
-        K_L[3,3:] = np.array([EA / L, 0, 0])
-        K_L[4,4:] = np.array([12 * EI / L**3, -6 * EI / L**2])
-        K_L[5,5]  = 4 * EI / L
-        
-        K_L = (K_L + K_L.T) -  np.diag ( np.diag(K_L) )
-        
-        return K_L
-
-    def M_lg(self):
-        Angulo = alfa (self.p1, self.p2)   
-        
-        M_LG = np.array([[np.cos(Angulo), -np.sin(Angulo), 0],
-                      [np.sin(Angulo), np.cos(Angulo), 0],
-                      [0,             0,             1]])
-        M_LG = np.vstack([np.hstack([M_LG, np.zeros((3,3))]),
-                       np.hstack([np.zeros((3,3)), M_LG])] )
-
-        return M_LG
-
-    def K_global(self): 
-        
-        M_LG = self.M_lg() 
-        K_L = self.K_local() 
-        
-        K_G = np.dot(M_LG, np.dot(K_L , M_LG.T ))  
-        
-        return K_G
-        
-# Función para extraer una submatriz
-    def K_global_caja(self,icol=1,jcol=1):
-        if (icol not in ([1,2]) or jcol not in ([1,2]) ):
-            print("Valores de icol, jcol fuera de rango")
-            return
-        icol = icol -1
-        jcol = jcol -1 
-        kg  = self.K_global()
-
-        K_sub = kg[icol * 3:icol * 3 + 3 , jcol * 3 : jcol * 3 + 3]
-     
-        return K_sub
-
-
-# Matriz de rigidez con giro condensado en globales
-#     La operación de condensación se realiza en esta función
-
-    def K_Condensa_Giro(self,nodo=2) : 
-        # Si nodo = 1, giro condensado en nodo inicial
-        # Si nodo = 2, giro condensado en nodo final
-        indice = nodo*3-1 # Indice local del GDL en giro, en vector de Python
-            
-        kg = self.K_global()
-        
-#     k11,k12,k21,k22 son matrices-bloque necesarias para condensar el giro
-#      k11: submatriz 5x5. A partir de kg, eliminando F-C del GDL condensado
-#      k12: columna 5x1. En la posición del GDL condensado
-#      k21: fila 1x5. En la posición del GDL condensado. 
-#      k22: componente de la diagonal en el GDL condensado   
-        k11 = np.delete(kg,indice,axis=0)
-        k11 = np.delete(k11,indice,axis=1)
-      # Se extrae la columna k12 en formato matriz 
-      # Observe cómo se extraen en Python columnas, respetando el formato columna     
-        k12 = kg.T[[indice]].T    
-        k12 = np.delete(k12,indice,axis=0) #se elimina la fila "indice"
-      # Se extrae la fila "indice" en formato matriz
-        k21 = kg[[indice]] # Directamente extrae la fila "indice" en forma de matriz
-        k21 = np.delete(k21,indice,axis=1) #se elimina la columa "indice"     
-        k22 = kg[indice,indice]
-        
-        return k11 - k12.dot(k21) / k22 # k12.dot(k21)=np.dot(k12,k21)
-
-
-#---------------------------------------------------------------
-# Definición de la clase "A2D", para barra A2D
-#---------------------------------------------------------------
-# Inicialización: A partir de dos puntos, y el parámetro ea
-# Funciones de la clase:  
+#     K_Condensa_Giro(nodo): Matriz de rigidez en globales con el giro del nodo 1 o 2 condensado (5x5)
+# Funciones de la clase A2D:  
 #     K_local : Para obtener la matriz de rigidez en locales (2x2)
 #     M_lg : Matriz de cambio de base de Locales a Globales (4x2)
-#     K_global: Para obtener la matriz de rigidez en globales (6x6)
+#     K_global: Para obtener la matriz de rigidez en globales (4x4)
 #     K_global_caja(i,j): Para obtener la submatriz en ij en globales (2x2)
-
-     
-class A2D:
-    """ Clase para representar la barra A2D """
-    def __init__(self, p1 = Punto2D(), p2 = Punto2D(), ea = 0):
-        self.p1 = p1
-        self.p2 = p2
-        self.ea = ea
-
-    def K_local(self):
-        L = longitud(self.p1,self.p2)
-        EA = self.ea     
-        K_L = np.array([[EA / L, -EA / L],
-                     [-EA / L, EA / L]])
-        return K_L
-
-    def M_lg(self):
-        Angulo = alfa (self.p1, self.p2)   
-        M_LG = np.array([[np.cos(Angulo), 0],
-               [np.sin(Angulo), 0],
-               [0, np.cos(Angulo)],
-               [0, np.sin(Angulo)]])
-        return M_LG
-
-    def K_global(self): 
-        M_LG = self.M_lg() 
-        K_L = self.K_local() 
-        K_G = np.dot(M_LG, np.dot(K_L , M_LG.T ))  
-        return K_G
-        
-# Función para extraer una submatriz
-    def K_global_caja(self,icol=1,jcol=1):
-        if (icol not in ([1,2]) or jcol not in ([1,2]) ):
-            print("Valores de icol, jcol fuera de rango")
-            return
-        icol = icol -1
-        jcol = jcol -1 
-        kg  = self.K_global()
-        K_sub = kg[icol * 2:icol * 2 + 2 , jcol * 2 : jcol * 2 + 2]
-        return K_sub
+from tablas import reinicia_estructura, Punto2D, P2D, longitud
+reinicia_estructura() # Los puntos y barras del ejemplo van a una estructura por defecto nueva
+from cargas import CargasBarras
+from ensamblaje import ensambla, ensambla_tablas, gdl_elementos
+from apoyos import Apoyos
+from modelo import Modelo
+from pandeo import axiles_tablas, geometrica_tablas, pandeo
+from dinamica import masa_tablas, modos_vibracion
 
 
 #===============================================================
@@ -374,16 +207,26 @@ krigidez[6:8,6:8] = k44_c
 #---------------------------------------------------------------
 q = 100 # Carga distribuida: 10 kN/m
 
-La = longitud(p1,p2)
-F2_a = np.array([0, 5./8 *q *La,-q*La**2./8.])
+# Las fuerzas de empotramiento de las barras del tablero se calculan con la clase CargasBarras (ver cargas.py).
+# Se indican los giros condensados de cada barra (gdl locales, indexando desde 0), como en K_Condensa_Giro:
+# barra a con el giro en 1 condensado, y barra c con el giro en 2 condensado.
+# Con las barras articuladas, las fuerzas ya incluyen los coeficientes 5/8 y 3/8
+tablero = [barra_a, barra_b, barra_c]
+articulados = np.zeros((3, 6), dtype=bool)
+articulados[0, 2] = True # Barra a: giro del nudo inicial
+articulados[2, 5] = True # Barra c: giro del nudo final
+cargas_tablero = CargasBarras([b.longitud() for b in tablero], [b.alfa() for b in tablero],
+                              [b.ea for b in tablero], [b.ei for b in tablero], articulados)
+cargas_tablero.uniforme([0, 1, 2], qy = -q, ejes = "globales")
+F_emp = cargas_tablero.empotramiento()
 
-Lb = longitud(p2,p3)
-F2_b = np.array([0, q * Lb / 2., q * Lb**2 / 12.])
-F3_b = np.array([0, q * Lb / 2., -q * Lb**2 / 12.])
+F2_a = F_emp[0, 3:6]
 
-Lc = longitud(p3,p4)
-F3_c = np.array([0, 5./8 *q*Lc, q * Lc**2/8.])
-F4_c = np.array([0, 3./8.*q*Lc])
+F2_b = F_emp[1, 0:3]
+F3_b = F_emp[1, 3:6]
+
+F3_c = F_emp[2, 0:3]
+F4_c = F_emp[2, 3:5]
 
 F2 = F2_a + F2_b
 F3 = F3_b + F3_c
@@ -418,3 +261,112 @@ print("u_3y =",   u[4], "m")
 print("Theta_3 =",   u[5], "rad")
 print("")
 print("u_4x =",      u[6], "m")
+
+#---------------------------------------------------------------
+# Comprobación con el ensamblaje automático (ver ensamblaje.py)
+#---------------------------------------------------------------
+# Los giros condensados de cada barra se indican con un diccionario {barra: gdl locales}, como en K_Condensa_Giro.
+# No hace falta ampliar con ceros las matrices kd y ke: cada nudo tiene sólo los gdl a los que llega alguna barra.
+# Los nudos 1 y 4 no tienen giro, porque todas sus barras están articuladas en ellos (numeracion = -1).
+condensados = {barra_a: [2], barra_c: [5], barra_d: [5], barra_e: [5]}
+K_disp, numeracion = ensambla([barra_a, barra_b, barra_c, barra_d, barra_e], listapuntos,
+                              liberados = condensados)
+print("")
+print("Numeración de gdl de los nudos (-1: el nudo no tiene ese gdl)")
+print(numeracion)
+
+apoyos = Apoyos(numeracion)
+apoyos.agrega(0, "articulacion")
+apoyos.agrega(3, "carrito_x")
+apoyos.agrega(4, "empotramiento")
+apoyos.agrega(5, "empotramiento")
+libres = apoyos.gdl_libres
+print("¿Coincide con el ensamblaje automático?", np.allclose(K_disp[libres][:,libres].toarray(), krigidez_final))
+
+# Fuerzas en los nudos a partir de las cargas del tablero, con los gdl de sus barras (los giros condensados no se unen al nudo)
+gdl_tablero = gdl_elementos([[0, 1], [1, 2], [2, 3]], numeracion, liberados = articulados)
+F_nudos = cargas_tablero.fuerzas_nudos(gdl_tablero, K_disp.shape[0])
+modelo = Modelo(K_disp, numeracion, apoyos)
+print("¿Coincide la solución?", np.allclose(modelo.resuelve_gdl(F_nudos)[libres], u))
+
+#---------------------------------------------------------------
+# Caché de geometría y rigidez (ver tablas.py)
+#---------------------------------------------------------------
+# La matriz de la barra b se ha pedido 6 veces (3 con K_global_caja y 3 con K_global), pero sólo se ha calculado la primera.
+# Si se cambiase una coordenada o una sección, la caché de las barras afectadas se invalidaría automáticamente.
+print("")
+print("Caché de la estructura:", barra_b.estructura.estadisticas_cache())
+
+#---------------------------------------------------------------
+# Pandeo lineal de las pilas (ver pandeo.py)
+#---------------------------------------------------------------
+# Cada pila se divide en 8 barras, para que su modo de pandeo se pueda representar. La última barra de cada pila está articulada en el tablero.
+# Primero se resuelve con la carga q (carga de referencia) para tener los axiles; después se busca el factor lambda por el que hay que multiplicar q para que la estructura pandee.
+n_div = 8
+coords = np.array([[p.x, p.y] for p in listapuntos])
+conect = [[0, 1], [1, 2], [2, 3]] # Tablero: barras a, b, c
+for base, cabeza in ((4, 1), (5, 2)): # Pilas: barras d y e, de la base al tablero
+    t = np.linspace(0, 1, n_div + 1)[1:-1, None]
+    nuevos = np.arange(len(coords), len(coords) + n_div - 1)
+    coords = np.vstack([coords, coords[base] + t * (coords[cabeza] - coords[base])])
+    nudos_pila = np.concatenate([[base], nuevos, [cabeza]])
+    conect += np.column_stack([nudos_pila[:-1], nudos_pila[1:]]).tolist()
+conect = np.array(conect)
+ea_barras = np.array([EA_tablero] * 3 + [EA_p1] * n_div + [EA_p2] * n_div)
+ei_barras = np.array([EI_tablero] * 3 + [EI_p1] * n_div + [EI_p2] * n_div)
+liberados = np.zeros((conect.shape[0], 6), dtype = bool)
+liberados[0, 2] = True          # Barra a: giro del nudo inicial
+liberados[2, 5] = True          # Barra c: giro del nudo final
+liberados[2 + n_div, 5] = True  # Última barra de la pila 1
+liberados[2 + 2 * n_div, 5] = True # Última barra de la pila 2
+
+K_p, num_p = ensambla_tablas(coords, conect, ea_barras, ei_barras, liberados_p2d = liberados)
+apoyos_p = Apoyos(num_p).agrega(0, "articulacion").agrega(3, "carrito_x").agrega(4).agrega(5)
+modelo_p = Modelo(K_p, num_p, apoyos_p)
+F_q = cargas_tablero.fuerzas_nudos(gdl_elementos(conect[:3], num_p, liberados = articulados), K_p.shape[0])
+u_q = modelo_p.resuelve_gdl(F_q)
+
+N_q = axiles_tablas(coords, u_q, num_p, conect, ea_barras)[0]
+K_G = geometrica_tablas(coords, num_p, conect, N_q, ea_p2d = ea_barras, ei_p2d = ei_barras, liberados_p2d = liberados)
+factores, modos = pandeo(modelo_p, K_G, n_modos = 3)
+print("")
+print("Axil en las pilas con la carga q:", N_q[3], N_q[3 + n_div], "kN")
+print("Factores de carga crítica:", factores)
+
+# Comprobación: pila empotrada-articulada, carga crítica de Euler con longitud de pandeo 0.7 L
+L_pila = longitud(p5, p2)
+print("Estimación de Euler para la pila 1:", np.pi**2 * EI_p1 / (0.699 * L_pila)**2 / -N_q[3])
+
+
+#---------------------------------------------------------------
+# Frecuencias propias (ver dinamica.py)
+#---------------------------------------------------------------
+# Hormigón de densidad 2.5 t/m3: masa por unidad de longitud m = rho * A, en t/m. Con kN y m las frecuencias salen en rad/s.
+# Con una sola barra por vano, las masas concentradas del tablero quedarían sobre los apoyos y se perderían sus modos de flexión: se dividen en n_div barras todas las barras a, b, c, d y e.
+rho = 2.5
+coords_d = np.array([[p.x, p.y] for p in listapuntos])
+conect_d, ea_d, ei_d, m_d, liberados_d = [], [], [], [], []
+for inicio, fin, ea, ei, area, libera in ((0, 1, EA_tablero, EI_tablero, At, (2,)), (1, 2, EA_tablero, EI_tablero, At, ()),
+                                          (2, 3, EA_tablero, EI_tablero, At, (5,)), (4, 1, EA_p1, EI_p1, Ap1, (5,)),
+                                          (5, 2, EA_p2, EI_p2, Ap2, (5,))):
+    t = np.linspace(0, 1, n_div + 1)[1:-1, None]
+    nuevos = np.arange(len(coords_d), len(coords_d) + n_div - 1)
+    coords_d = np.vstack([coords_d, coords_d[inicio] + t * (coords_d[fin] - coords_d[inicio])])
+    nudos_barra = np.concatenate([[inicio], nuevos, [fin]])
+    conect_d += np.column_stack([nudos_barra[:-1], nudos_barra[1:]]).tolist()
+    ea_d += [ea] * n_div
+    ei_d += [ei] * n_div
+    m_d += [rho * area] * n_div
+    lib = np.zeros((n_div, 6), dtype = bool)
+    for gdl in libera: # Giro del extremo inicial (2) en la primera barra, del final (5) en la última
+        lib[0 if gdl == 2 else -1, gdl] = True
+    liberados_d.append(lib)
+conect_d, liberados_d = np.array(conect_d), np.vstack(liberados_d)
+
+K_d, num_d = ensambla_tablas(coords_d, conect_d, ea_d, ei_d, liberados_p2d = liberados_d)
+modelo_d = Modelo(K_d, num_d, Apoyos(num_d).agrega(0, "articulacion").agrega(3, "carrito_x").agrega(4).agrega(5))
+print("")
+for concentrada in (False, True):
+    M_d = masa_tablas(coords_d, num_d, conect_d, m_d, concentrada = concentrada, ea_p2d = ea_d, ei_p2d = ei_d, liberados_p2d = liberados_d)
+    omega, modos_v = modos_vibracion(modelo_d, M_d, n_modos = 4) # La factorización de K se hace una vez
+    print("Frecuencias (Hz), masas", "concentradas:" if concentrada else "consistentes:", omega / (2 * np.pi))
@@ -0,0 +1,447 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import numpy as np
+import scipy.sparse as sp
+import scipy.linalg as sla
+import scipy.sparse.linalg as spla
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+from ensamblaje import valores_gdl
+from rigidez import bloques_lote
+
+#===============================================================
+# RESOLUCIÓN DEL SISTEMA K u = F CON MATRICES DISPERSAS
+# La matriz de rigidez, una vez impuestos los apoyos, es simétrica y
+# definida positiva. Sus términos no nulos se concentran cerca de la
+# diagonal (matriz en banda) si los gdl están bien numerados.
+# Se reordenan los gdl con el algoritmo de Cuthill-McKee inverso (RCM)
+# para reducir el ancho de banda, y después se factoriza con Cholesky
+# en banda (K = L L^T), que sólo almacena los términos de la banda.
+#===============================================================
+
+#---------------------------------------------------------------
+# Función ancho_banda: Semiancho de banda de una matriz
+#     Es la mayor distancia |i-j| de un término no nulo a la diagonal
+#---------------------------------------------------------------
+def ancho_banda(K):
+    """ Semiancho de banda de la matriz K """
+    K = sp.coo_matrix(K)
+    if K.nnz == 0:
+        return 0
+    return int(np.max(np.abs(K.row - K.col)))
+
+#---------------------------------------------------------------
+# Función relleno_banda: Términos de relleno de Cholesky en banda
+#     La factorización en banda ocupa todos los términos de la banda
+#     (triangular inferior). El relleno son los que eran nulos en K.
+#     Salida: (términos almacenados, términos de relleno)
+#---------------------------------------------------------------
+def relleno_banda(K):
+    """ Devuelve (términos en la banda, relleno) de la factorización """
+    K = sp.coo_matrix(K)
+    n = K.shape[0]
+    b = ancho_banda(K)
+# En la fila i se almacenan min(i, b) + 1 términos
+    almacenados = int(np.sum(np.minimum(np.arange(n), b) + 1))
+    nnz_inferior = int(np.count_nonzero(K.row >= K.col))
+    return almacenados, almacenados - nnz_inferior
+
+#---------------------------------------------------------------
+# Función reordena_rcm: Permutación de Cuthill-McKee inversa
+#     Salida: vector perm, tal que K[perm][:,perm] tiene menor banda
+#---------------------------------------------------------------
+def reordena_rcm(K):
+    """ Permutación RCM de los gdl de la matriz K """
+    return reverse_cuthill_mckee(sp.csr_matrix(K), symmetric_mode=True)
+
+#---------------------------------------------------------------
+# Función informe_reordenacion: Ancho de banda y relleno antes y
+# después de reordenar. Sirve para comprobar la ganancia en cada modelo.
+#---------------------------------------------------------------
+def informe_reordenacion(K, perm=None):
+    """ Diccionario con banda y relleno antes y después de reordenar """
+    K = sp.csr_matrix(K)
+    if perm is None:
+        perm = reordena_rcm(K)
+    Kp = K[perm][:, perm]
+    almac_0, relleno_0 = relleno_banda(K)
+    almac_1, relleno_1 = relleno_banda(Kp)
+    return {"n_gdl": K.shape[0],
+            "nnz": K.nnz,
+            "banda_inicial": ancho_banda(K),
+            "banda_final": ancho_banda(Kp),
+            "almacenados_inicial": almac_0,
+            "almacenados_final": almac_1,
+            "relleno_inicial": relleno_0,
+            "relleno_final": relleno_1}
+
+#---------------------------------------------------------------
+# Función matriz_banda: Almacenamiento en banda (inferior) de LAPACK
+#     ab[i-j, j] = K[i,j] para i >= j. Dimensión (b+1, n)
+#---------------------------------------------------------------
+def matriz_banda(K, b=None):
+    """ Matriz K (simétrica) en formato banda inferior (b+1, n) """
+    K = sp.coo_matrix(K)
+    if b is None:
+        b = ancho_banda(K)
+    inf = K.row >= K.col
+    ab = np.zeros((b + 1, K.shape[0]))
+    np.add.at(ab, (K.row[inf] - K.col[inf], K.col[inf]), K.data[inf])
+    return ab
+
+#---------------------------------------------------------------
+# Clase Factorizacion
+#     Factoriza una sola vez la matriz K (dispersa, simétrica y definida
+#     positiva) y resuelve después K u = F para uno o varios vectores F.
+#     metodo = "banda": Cholesky en banda tras reordenar con RCM
+#     metodo = "dispersa": LU dispersa (SuperLU) con reordenación de
+#              mínimo grado (MMD) de K + K^T, que reduce el relleno y no
+#              sólo la banda. Sin pivotaje fuera de la diagonal, como
+#              corresponde a una K definida positiva. No se usa RCM
+#     Atributo "informe": con "banda", banda y relleno antes y después de
+#     reordenar (informe_reordenacion). Con "dispersa", lo que ha
+#     factorizado SuperLU: términos de L y U (nnz_LU), relleno (términos
+#     de L + U, sin contar dos veces la diagonal, que no estaban en K) y
+#     permutaciones de filas y columnas (perm_r, perm_c)
+#---------------------------------------------------------------
+class Factorizacion:
+    """ Factorización de K reordenada, para resolver K u = F """
+    def __init__(self, K, metodo="banda", reordena=True):
+        if metodo not in ("banda", "dispersa"):
+            raise ValueError("Método de factorización desconocido: " + str(metodo))
+        K = sp.csr_matrix(K)
+        n = K.shape[0]
+        self.n = n
+        self.metodo = metodo
+        self.perm = reordena_rcm(K) if reordena and metodo == "banda" else np.arange(n)
+
+        Kp = K[self.perm][:, self.perm]
+        if metodo == "banda":
+            self.informe = informe_reordenacion(K, self.perm)
+            try:
+                self.cb = sla.cholesky_banded(matriz_banda(Kp), lower=True)
+            except sla.LinAlgError:
+                raise ValueError("La matriz de rigidez no es definida positiva. "
+                                 "Compruebe los apoyos (posible mecanismo)")
+        else:
+            self.lu = spla.splu(Kp.tocsc(), permc_spec="MMD_AT_PLUS_A" if reordena else "NATURAL",
+                                diag_pivot_thresh=0., options={"SymmetricMode": True})
+            nnz_LU = self.lu.L.nnz + self.lu.U.nnz
+            self.informe = {"n_gdl": n,
+                            "nnz": K.nnz,
+                            "nnz_LU": nnz_LU,
+                            "relleno": nnz_LU - n - K.nnz,
+                            "perm_r": self.lu.perm_r,
+                            "perm_c": self.lu.perm_c}
+
+    def resuelve(self, F):
+        """ Resuelve K u = F. F puede ser (n) o (n, n_casos) """
+        F = np.asarray(F, dtype=float)
+        Fp = F[self.perm]
+        if self.metodo == "banda":
+            up = sla.cho_solve_banded((self.cb, True), Fp)
+        else:
+            up = self.lu.solve(Fp)
+# Se deshace la permutación: u[perm] = up
+        u = np.empty_like(up)
+        u[self.perm] = up
+        return u
+
+#---------------------------------------------------------------
+# Clase FactorizacionActualizada
+#     Resuelve (K + dK) u = F con la factorización de K y la fórmula de
+#     Sherman-Morrison-Woodbury, sin volver a factorizar. dK sólo tiene
+#     términos en m gdl (los de las barras modificadas): dK = U C U^T,
+#     siendo U las m columnas de la identidad de esos gdl y C (m,m):
+#         Z = K^-1 U,  W = U^T Z,  S = I + C W
+#         (K + dK)^-1 F = y - Z S^-1 C y[gdl],  con y = K^-1 F
+#     C puede ser singular (una barra tiene movimientos de sólido rígido).
+#     Calcular Z cuesta m resoluciones, y cada resolución posterior
+#     una resolución con K y operaciones de orden n m.
+#     base: Factorizacion de K
+# Funciones de la clase:
+#     modifica(gdl, dK): Añade una modificación dK (m,m) en los gdl
+#     rango: número de gdl modificados (m)
+#     resuelve(F): Como en Factorizacion
+#---------------------------------------------------------------
+class FactorizacionActualizada:
+    """ Factorización de K modificada con Sherman-Morrison-Woodbury """
+    def __init__(self, base):
+        self.base = base
+        self.n = base.n
+        self.gdl = np.zeros(0, dtype=np.int64)
+        self.C = np.zeros((0, 0))
+        self.Z = np.zeros((self.n, 0))
+
+    @property
+    def rango(self):
+        return self.gdl.size
+
+    def modifica(self, gdl, dK):
+        gdl = np.asarray(gdl, dtype=np.int64)
+        nuevos = np.setdiff1d(gdl, self.gdl)
+        if nuevos.size:
+            U = np.zeros((self.n, nuevos.size))
+            U[nuevos, np.arange(nuevos.size)] = 1.
+            Z = self.base.resuelve(U)
+# Se mantienen los gdl ordenados, y C y Z en el mismo orden
+            todos = np.concatenate([self.gdl, nuevos])
+            orden = np.argsort(todos)
+            C = np.zeros((todos.size, todos.size))
+            C[:self.gdl.size, :self.gdl.size] = self.C
+            self.gdl = todos[orden]
+            self.C = C[orden][:, orden]
+            self.Z = np.hstack([self.Z, Z])[:, orden]
+        posicion = np.searchsorted(self.gdl, gdl)
+        self.C[np.ix_(posicion, posicion)] += dK
+        S = np.eye(self.gdl.size) + self.C @ self.Z[self.gdl]
+        self._lu = sla.lu_factor(S, check_finite=False)
+        diagonal = np.abs(np.diag(self._lu[0]))
+        if diagonal.size and diagonal.min() <= 1E-12 * diagonal.max():
+            raise ValueError("La matriz de rigidez modificada es singular. "
+                             "Compruebe los apoyos (posible mecanismo)")
+
+    def resuelve(self, F):
+        """ Resuelve (K + dK) u = F. F puede ser (n) o (n, n_casos) """
+        y = self.base.resuelve(F)
+        if self.gdl.size == 0:
+            return y
+        return y - self.Z @ sla.lu_solve(self._lu, self.C @ y[self.gdl])
+
+#---------------------------------------------------------------
+# Función autovalores_inversos: Mayores autovalores de A phi = mu K phi
+#     Pandeo (A = -K_G) y vibraciones (A = M) llevan a K phi = lambda A phi,
+#     con K definida positiva. Los menores lambda > 0 son los mayores
+#     mu = 1/lambda: se buscan con ARPACK (eigsh) aplicando K^-1 con la
+#     factorización ya calculada, sin formar matrices densas. Equivale a
+#     la transformación espectral "shift-invert" con desplazamiento 0.
+#     A, K: matrices dispersas (n,n), simétricas
+#     factorizacion: objeto con resuelve(F) = K^-1 F (Factorizacion,
+#                    FactorizacionActualizada)
+#     n_modos: número de autovalores pedidos (menor que n)
+#     Salida: (mu, phi), mu decreciente y phi (n, n_modos) con
+#             phi^T K phi = I
+#---------------------------------------------------------------
+def autovalores_inversos(A, K, factorizacion, n_modos=6, tol=0.):
+    """ Mayores autovalores mu de A phi = mu K phi, con K^-1 factorizada """
+    n = K.shape[0]
+    if not 0 < n_modos < n:
+        raise ValueError("El número de modos debe estar entre 1 y %d" % (n - 1))
+    K_inv = spla.LinearOperator((n, n), matvec=factorizacion.resuelve, dtype=float)
+    mu, phi = spla.eigsh(sp.csr_matrix(A), k=n_modos, M=sp.csr_matrix(K), Minv=K_inv,
+                         which="LA", tol=tol)
+    orden = np.argsort(mu)[::-1]
+    return mu[orden], phi[:, orden]
+
+#---------------------------------------------------------------
+# Función resuelve: Resolución directa de K u = F
+#     Equivale a np.linalg.solve(K, F) con K dispersa
+#---------------------------------------------------------------
+def resuelve(K, F, metodo="banda"):
+    """ Solución de K u = F con reordenación RCM y Cholesky """
+    return Factorizacion(K, metodo).resuelve(F)
+
+#===============================================================
+# RESOLUCIÓN ITERATIVA SIN MATRIZ GLOBAL (GRADIENTE CONJUGADO)
+# En modelos muy grandes el relleno de la factorización puede no caber
+# en memoria. El gradiente conjugado sólo necesita productos K p, que se
+# calculan barra a barra con las pilas (n,d,d) de matrices de las
+# barras, sin ensamblar K:
+#     1) p_e = p[gdl_e]          (se recogen los gdl de cada barra)
+#     2) q_e = K_e p_e           (producto de todas las barras a la vez)
+#     3) q = suma de q_e         (se suman en los gdl, np.bincount)
+# Precondicionadores (se aplican como z = M^-1 r):
+#     "jacobi":  M = diagonal de K
+#     "bloques": M = bloques diagonales de cada nudo (3x3 en P2D), la
+#                suma de las cajas K_global_caja(i,i) de sus barras
+#===============================================================
+
+#---------------------------------------------------------------
+# Clase OperadorElementos: Producto K u sin matriz global
+# Inicialización:
+#     grupos: lista de pares (K_e, gdl_e), pilas (n,d,d) de matrices en
+#             globales y (n,d) de números de ecuación de las barras
+#             (ver ensamblaje.elementos_tablas). gdl -1: no existe
+#     n_gdl: número de gdl de la estructura
+# Funciones de la clase:
+#     producto(u): K u, con u (n_gdl) o (n_gdl, n_casos)
+#     diagonal(): diagonal de K
+#     bloques_nudos(numeracion): bloques diagonales (n_nudos,g,g) de K
+#---------------------------------------------------------------
+class OperadorElementos:
+    """ Producto de la matriz de rigidez por vectores, barra a barra """
+    def __init__(self, grupos, n_gdl):
+        self.grupos = [(np.asarray(K_e, dtype=float), np.asarray(gdl_e, dtype=np.int64))
+                       for K_e, gdl_e in grupos]
+        self.n_gdl = n_gdl
+        self._existe = [gdl_e >= 0 for _, gdl_e in self.grupos]
+
+    def producto(self, u):
+        u = np.asarray(u, dtype=float)
+        if u.ndim == 2:
+            return np.stack([self.producto(u[:, j]) for j in range(u.shape[1])], axis=1)
+        q = np.zeros(self.n_gdl)
+        for (K_e, gdl_e), existe in zip(self.grupos, self._existe):
+            q_e = (K_e @ valores_gdl(u, gdl_e)[:, :, None])[:, :, 0]
+            q += np.bincount(gdl_e[existe], weights=q_e[existe], minlength=self.n_gdl)
+        return q
+
+    def diagonal(self):
+        d = np.zeros(self.n_gdl)
+        for (K_e, gdl_e), existe in zip(self.grupos, self._existe):
+            d_e = np.diagonal(K_e, axis1=1, axis2=2)
+            d += np.bincount(gdl_e[existe], weights=d_e[existe], minlength=self.n_gdl)
+        return d
+
+# Suma de las cajas (i,i) de las barras en el bloque de su nudo. Las
+# filas de los gdl que no existen quedan a cero
+    def bloques_nudos(self, numeracion):
+        numeracion = np.asarray(numeracion)
+        n_nudos, g = numeracion.shape
+        existe = numeracion >= 0
+        nudo = np.empty(self.n_gdl, dtype=np.int64)
+        local = np.empty(self.n_gdl, dtype=np.int64)
+        nudo[numeracion[existe]] = np.nonzero(existe)[0]
+        local[numeracion[existe]] = np.nonzero(existe)[1]
+
+        B = np.zeros(n_nudos * g * g)
+        for K_e, gdl_e in self.grupos:
+            h = gdl_e.shape[1] // 2
+            cajas = bloques_lote(K_e)
+            for i in (0, 1):
+                f = gdl_e[:, i * h:(i + 1) * h]
+                filas, columnas = f[:, :, None], f[:, None, :]
+                validos = (filas >= 0) & (columnas >= 0)
+                fv = np.broadcast_to(filas, validos.shape)[validos]
+                cv = np.broadcast_to(columnas, validos.shape)[validos]
+                posicion = (nudo[fv] * g + local[fv]) * g + local[cv]
+                B += np.bincount(posicion, weights=cajas[:, i, i][validos],
+                                 minlength=B.size)
+        return B.reshape(n_nudos, g, g)
+
+#---------------------------------------------------------------
+# Clase GradienteConjugado
+#     Resuelve K_ll u_l = F_l (gdl libres) con gradiente conjugado
+#     precondicionado, con la misma función resuelve que Factorizacion.
+#     operador: OperadorElementos de la estructura completa
+#     gdl_libres: números de ecuación de los gdl libres
+#     precondicionador: "bloques" (necesita la numeración), "jacobi"
+#                       o None
+#     tol: tolerancia del residuo relativo |r| / |F_l|
+#     max_iter: número máximo de iteraciones (por defecto n_libres)
+#     Atributos tras resolver: iteraciones y residuos (historial de
+#     |r| / |F_l|, empezando en 1), uno por caso si F tiene varias
+#     columnas
+#---------------------------------------------------------------
+class GradienteConjugado:
+    """ Gradiente conjugado precondicionado, sin matriz global """
+    def __init__(self, operador, gdl_libres, precondicionador="bloques", numeracion=None,
+                 tol=1E-10, max_iter=None):
+        if precondicionador not in ("bloques", "jacobi", None):
+            raise ValueError("Precondicionador desconocido: " + str(precondicionador))
+        self.operador = operador
+        self.libres = np.asarray(gdl_libres, dtype=np.int64)
+        self.n = self.libres.size
+        self.tol = tol
+        self.max_iter = self.n if max_iter is None else max_iter
+        self.precondicionador = precondicionador
+        self.iteraciones = None
+        self.residuos = None
+
+        if precondicionador == "jacobi":
+            d = operador.diagonal()[self.libres]
+            if np.any(d <= 0):
+                raise ValueError("Hay gdl libres sin rigidez. "
+                                 "Compruebe los apoyos (posible mecanismo)")
+            self._inv_diagonal = 1. / d
+        elif precondicionador == "bloques":
+            if numeracion is None:
+                raise ValueError("El precondicionador por bloques necesita la numeración")
+            self._prepara_bloques(np.asarray(numeracion))
+
+# Bloques de cada nudo con sólo sus gdl libres: los demás gdl (fijos o
+# que no existen) se sustituyen por la identidad antes de invertir
+    def _prepara_bloques(self, numeracion):
+        g = numeracion.shape[1]
+        B = self.operador.bloques_nudos(numeracion)
+        libre = np.zeros(self.operador.n_gdl, dtype=bool)
+        libre[self.libres] = True
+        libre_nudo = (numeracion >= 0) & libre[np.maximum(numeracion, 0)]
+        B = np.where(libre_nudo[:, :, None] & libre_nudo[:, None, :], B, 0.)
+        B[:, np.arange(g), np.arange(g)] += ~libre_nudo
+        try:
+            self._inv_bloques = np.linalg.inv(B)
+        except np.linalg.LinAlgError:
+            raise ValueError("Hay nudos sin rigidez. "
+                             "Compruebe los apoyos (posible mecanismo)")
+# Posición (nudo, gdl del nudo) de cada gdl libre
+        nudos, locales = np.nonzero(libre_nudo)
+        orden = np.argsort(numeracion[nudos, locales])
+        self._posicion = (nudos[orden], locales[orden])
+        self._forma = numeracion.shape
+
+    def _precondiciona(self, r):
+        if self.precondicionador == "jacobi":
+            return self._inv_diagonal * r
+        if self.precondicionador == "bloques":
+            R = np.zeros(self._forma)
+            R[self._posicion] = r
+            return (self._inv_bloques @ R[:, :, None])[:, :, 0][self._posicion]
+        return r.copy()
+
+# Producto K_ll p: se completa con ceros en los gdl fijos
+    def _producto(self, p):
+        u = np.zeros(self.operador.n_gdl)
+        u[self.libres] = p
+        return self.operador.producto(u)[self.libres]
+
+    def resuelve(self, F):
+        """ Resuelve K_ll u = F. F puede ser (n) o (n, n_casos) """
+        F = np.asarray(F, dtype=float)
+        if F.ndim == 2:
+            u, iteraciones, residuos = [], [], []
+            for j in range(F.shape[1]):
+                u.append(self.resuelve(F[:, j]))
+                iteraciones.append(self.iteraciones)
+                residuos.append(self.residuos)
+            self.iteraciones, self.residuos = iteraciones, residuos
+            return np.stack(u, axis=1)
+
+        u = np.zeros(self.n)
+        norma_F = np.linalg.norm(F)
+        self.iteraciones, self.residuos = 0, np.ones(1)
+        if norma_F == 0:
+            return u
+        r = F.copy()
+        z = self._precondiciona(r)
+        p = z.copy()
+        rz = r @ z
+        residuos = [1.]
+        for k in range(1, self.max_iter + 1):
+            q = self._producto(p)
+            pq = p @ q
+            if pq <= 0:
+                raise ValueError("La matriz de rigidez no es definida positiva. "
+                                 "Compruebe los apoyos (posible mecanismo)")
+            alfa = rz / pq
+            u += alfa * p
+            r -= alfa * q
+            residuos.append(np.linalg.norm(r) / norma_F)
+            if residuos[-1] < self.tol:
+                break
+            z = self._precondiciona(r)
+            rz, rz_anterior = r @ z, rz
+            p = z + (rz / rz_anterior) * p
+        self.iteraciones, self.residuos = k, np.array(residuos)
+        if residuos[-1] >= self.tol:
+            raise ValueError("El gradiente conjugado no converge en %d iteraciones "
+                             "(residuo %.2e)" % (k, residuos[-1]))
+        return u
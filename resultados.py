@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import os
+
+import numpy as np
+
+from ensamblaje import valores_gdl
+from esfuerzos import desplazamientos_barras, fuerzas_extremos
+
+#===============================================================
+# ALMACÉN DE RESULTADOS EN DISCO
+# Cada resultado se guarda en un archivo .npy de un directorio, con el
+# caso de carga como primer índice y el nudo o la barra como segundo:
+#     desplazamientos.npy  (n_casos, n_nudos, gdl_nudo)
+#     reacciones.npy       (n_casos, n_gdl_fijos), y gdl_fijos.npy
+#     fuerzas_barras.npy   (n_casos, n_barras, 6), en locales
+# Los archivos se abren como memoria mapeada (np.lib.format.open_memmap):
+# al leer un caso o una barra sólo se leen del disco esas posiciones, y
+# al escribir no hace falta tener todos los casos en memoria.
+# Los archivos se pueden abrir también directamente con
+# np.load(ruta, mmap_mode="r").
+#===============================================================
+
+#---------------------------------------------------------------
+# Clase AlmacenResultados
+# Inicialización:
+#     directorio: directorio de los archivos (se crea si no existe)
+#     modo: "r" sólo lectura, "r+" lectura y escritura
+# Funciones de la clase:
+#     crea(nombre, forma): Crea un resultado nuevo (a ceros)
+#     almacen[nombre]: Array en memoria mapeada del resultado
+#     nombres: Resultados del almacén
+#     lee(nombre, casos, entidades): Copia en memoria de una parte
+#     escribe(nombre, casos, valores): Escribe los casos indicados
+#---------------------------------------------------------------
+class AlmacenResultados:
+    """ Clase para guardar y leer resultados en memoria mapeada """
+    def __init__(self, directorio, modo="r"):
+        if modo not in ("r", "r+"):
+            raise ValueError("Modo de apertura desconocido: " + str(modo))
+        if modo == "r+":
+            os.makedirs(directorio, exist_ok=True)
+        elif not os.path.isdir(directorio):
+            raise ValueError("No existe el directorio de resultados: " + str(directorio))
+        self.directorio = directorio
+        self.modo = modo
+        self._abiertos = {}
+
+    def _ruta(self, nombre):
+        return os.path.join(self.directorio, nombre + ".npy")
+
+    @property
+    def nombres(self):
+        return sorted(os.path.splitext(a)[0] for a in os.listdir(self.directorio)
+                      if a.endswith(".npy"))
+
+    def crea(self, nombre, forma, dtype=float):
+        if self.modo == "r":
+            raise ValueError("El almacén está abierto sólo para lectura")
+        self._abiertos[nombre] = np.lib.format.open_memmap(
+            self._ruta(nombre), mode="w+", dtype=dtype, shape=tuple(forma))
+        return self._abiertos[nombre]
+
+    def __getitem__(self, nombre):
+        if nombre not in self._abiertos:
+            if not os.path.exists(self._ruta(nombre)):
+                raise KeyError("No hay resultados con el nombre " + nombre)
+            self._abiertos[nombre] = np.load(self._ruta(nombre), mmap_mode=self.modo)
+        return self._abiertos[nombre]
+
+    def lee(self, nombre, casos=slice(None), entidades=slice(None)):
+        """ Copia en memoria de los casos y nudos (o barras) pedidos """
+        return np.array(self[nombre][casos, entidades])
+
+    def escribe(self, nombre, casos, valores):
+        self[nombre][casos] = valores
+
+    def cierra(self):
+        """ Escribe en disco los cambios pendientes y cierra los archivos """
+        for array in self._abiertos.values():
+            if isinstance(array, np.memmap) and self.modo != "r":
+                array.flush()
+        self._abiertos = {}
+
+#---------------------------------------------------------------
+# Función guarda_casos: Resuelve un Modelo para muchos casos de carga
+# y guarda los resultados en un almacén, por bloques de casos
+#     modelo: Modelo (modelo.py) o cualquiera de sus clases derivadas,
+#             ya con sus apoyos
+#     F: matriz (n_gdl, n_casos) de fuerzas, una columna por caso
+#        (puede ser también un array en memoria mapeada)
+#     almacen: AlmacenResultados abierto con modo "r+"
+#     barras: opcional, (K_L, angulo, gdl_e[, F_emp]) de un grupo de
+#             barras P2D para guardar sus fuerzas en los extremos (ver
+#             esfuerzos.fuerzas_extremos). F_emp (n_barras,6) es común
+#             a todos los casos, o (n_barras,6,n_casos)
+#     tam_bloque: número de casos que se resuelven a la vez
+#---------------------------------------------------------------
+def guarda_casos(modelo, F, almacen, barras=None, tam_bloque=100):
+    """ Desplazamientos, reacciones y fuerzas en barras, guardados en disco """
+    n_casos = F.shape[1]
+    numeracion = modelo.numeracion
+    almacen.crea("desplazamientos", (n_casos,) + numeracion.shape)
+    almacen.crea("reacciones", (n_casos, modelo.gdl_fijos.size))
+    almacen.crea("gdl_fijos", modelo.gdl_fijos.shape, dtype=np.int64)[:] = modelo.gdl_fijos
+    if barras is not None:
+        K_L, angulo, gdl_e = barras[:3]
+        F_emp = barras[3] if len(barras) > 3 else None
+        almacen.crea("fuerzas_barras", (n_casos, np.shape(gdl_e)[0], 6))
+
+    for inicio in range(0, n_casos, tam_bloque):
+        casos = slice(inicio, min(inicio + tam_bloque, n_casos))
+        F_b = np.asarray(F[:, casos], dtype=float)
+        u = modelo.resuelve_gdl(F_b)
+        almacen.escribe("desplazamientos", casos, valores_gdl(u, numeracion).transpose(2, 0, 1))
+        almacen.escribe("reacciones", casos, modelo.reacciones_gdl(u, F_b).T)
+        if barras is not None:
+            F_emp_b = F_emp[..., casos] if F_emp is not None and np.ndim(F_emp) == 3 else F_emp
+            P = fuerzas_extremos(K_L, angulo, desplazamientos_barras(u, gdl_e), F_emp_b)
+            almacen.escribe("fuerzas_barras", casos, P.transpose(2, 0, 1))
+    almacen.cierra()
+    return almacen
@@ -0,0 +1,674 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import math
+
+import numpy as np
+
+#===============================================================
+# MATRICES DE RIGIDEZ POR LOTES
+# Se calculan las matrices de n barras a la vez, sin bucles en Python.
+# Todas las funciones devuelven pilas de matrices de dimensión (n,6,6):
+#     K[e] es la matriz de rigidez de la barra e.
+# Los argumentos pueden ser escalares o vectores de longitud n
+# (numpy los expande a la misma dimensión con np.broadcast_arrays).
+#===============================================================
+
+#---------------------------------------------------------------
+# Función geometria_lote: Longitud y ángulo de n barras
+#     A partir de las coordenadas de los nudos inicial (x1,y1) y
+#     final (x2,y2) de cada barra.
+#---------------------------------------------------------------
+def geometria_lote(x1, y1, x2, y2):
+    """ Devuelve (L, angulo) de n barras. El ángulo en radianes """
+    vx = np.asarray(x2, dtype=float) - np.asarray(x1, dtype=float)
+    vy = np.asarray(y2, dtype=float) - np.asarray(y1, dtype=float)
+    L = np.hypot(vx, vy)
+    angulo = np.arctan2(vy, vx)
+    return np.atleast_1d(L), np.atleast_1d(angulo)
+
+#---------------------------------------------------------------
+# Función k_p2d_local_lote: Matrices de rigidez P2D en locales
+#     EA, EI, L: escalares o vectores de longitud n
+#     Salida: pila (n,6,6)
+#---------------------------------------------------------------
+def k_p2d_local_lote(EA, EI, L):
+    """ Matrices de rigidez en locales (n,6,6) de n barras P2D """
+    EA, EI, L = np.broadcast_arrays(np.atleast_1d(np.asarray(EA, dtype=float)),
+                                    np.atleast_1d(np.asarray(EI, dtype=float)),
+                                    np.atleast_1d(np.asarray(L, dtype=float)))
+    n = L.shape[0]
+
+# Términos de la matriz, calculados una sola vez para todas las barras
+    k_ax = EA / L
+    k_11 = 12 * EI / L**3
+    k_12 = 6 * EI / L**2
+    k_22 = 4 * EI / L
+    k_25 = 2 * EI / L
+
+    K_L = np.zeros((n, 6, 6))
+
+# Se rellenan los términos de la triangular superior, igual que en k_p2d:
+    K_L[:, 0, 0] = k_ax
+    K_L[:, 0, 3] = -k_ax
+    K_L[:, 1, 1] = k_11
+    K_L[:, 1, 2] = k_12
+    K_L[:, 1, 4] = -k_11
+    K_L[:, 1, 5] = k_12
+    K_L[:, 2, 2] = k_22
+    K_L[:, 2, 4] = -k_12
+    K_L[:, 2, 5] = k_25
+    K_L[:, 3, 3] = k_ax
+    K_L[:, 4, 4] = k_11
+    K_L[:, 4, 5] = -k_12
+    K_L[:, 5, 5] = k_22
+
+# El resto por simetría. Sólo se copian los términos fuera de la diagonal
+    iu = np.triu_indices(6, 1)
+    K_L[:, iu[1], iu[0]] = K_L[:, iu[0], iu[1]]
+
+    return K_L
+
+#---------------------------------------------------------------
+# Función m_lg_p2d_lote: Matrices de cambio de base L -> G del P2D
+#     angulo: vector de ángulos en radianes
+#     Salida: pila (n,6,6)
+#---------------------------------------------------------------
+def m_lg_p2d_lote(angulo):
+    """ Matrices de cambio de base de locales a globales (n,6,6) """
+    angulo = np.atleast_1d(np.asarray(angulo, dtype=float))
+    c = np.cos(angulo)
+    s = np.sin(angulo)
+
+    M_LG = np.zeros((angulo.shape[0], 6, 6))
+# Los dos bloques 3x3 de la diagonal son iguales
+    for i in (0, 3):
+        M_LG[:, i, i] = c
+        M_LG[:, i, i + 1] = -s
+        M_LG[:, i + 1, i] = s
+        M_LG[:, i + 1, i + 1] = c
+        M_LG[:, i + 2, i + 2] = 1.
+    return M_LG
+
+#---------------------------------------------------------------
+# Función k_p2d_lote: Matrices de rigidez P2D en globales
+#     EA, EI, L: escalares o vectores de longitud n
+#     angulo: ángulo de cada barra en radianes
+#     Salida: pila (n,6,6)
+#---------------------------------------------------------------
+def k_p2d_lote(EA, EI, L, angulo=0.):
+    """ Matrices de rigidez en globales (n,6,6) de n barras P2D """
+    EA, EI, L, angulo = np.broadcast_arrays(np.atleast_1d(np.asarray(EA, dtype=float)),
+                                            np.atleast_1d(np.asarray(EI, dtype=float)),
+                                            np.atleast_1d(np.asarray(L, dtype=float)),
+                                            np.atleast_1d(np.asarray(angulo, dtype=float)))
+    c = np.cos(angulo)
+    s = np.sin(angulo)
+
+# El producto M_LG * K_L * M_LG^T tiene una expresión cerrada en c, s,
+# EA/L y EI/L^n: se escriben directamente los términos en globales
+    k_ax = EA / L
+    k_11 = 12 * EI / L**3
+    k_12 = 6 * EI / L**2
+    k_xx = k_ax * c * c + k_11 * s * s
+    k_yy = k_ax * s * s + k_11 * c * c
+    k_xy = k_ax * c * s - k_11 * c * s
+    k_xg = k_12 * s
+    k_yg = k_12 * c
+
+# Los opuestos se calculan como 0 - x, y no como -x, para no obtener
+# ceros negativos (-0.) que el producto de matrices no da
+    n_xx, n_yy, n_xy = 0. - k_xx, 0. - k_yy, 0. - k_xy
+    n_xg, n_yg = 0. - k_xg, 0. - k_yg
+
+    K_G = np.empty((L.shape[0], 6, 6))
+    for i in (0, 3):
+        for j in (0, 3):
+            K_G[:, i, j] = k_xx if i == j else n_xx
+            K_G[:, i, j + 1] = K_G[:, i + 1, j] = k_xy if i == j else n_xy
+            K_G[:, i + 1, j + 1] = k_yy if i == j else n_yy
+# Términos desplazamiento - giro: el signo depende del nudo
+        K_G[:, i, 2] = K_G[:, 2, i] = K_G[:, i, 5] = K_G[:, 5, i] = n_xg if i == 0 else k_xg
+        K_G[:, i + 1, 2] = K_G[:, 2, i + 1] = K_G[:, i + 1, 5] = K_G[:, 5, i + 1] = (
+            k_yg if i == 0 else n_yg)
+    K_G[:, 2, 2] = K_G[:, 5, 5] = 4 * EI / L
+    K_G[:, 2, 5] = K_G[:, 5, 2] = 2 * EI / L
+    return K_G
+
+#---------------------------------------------------------------
+# Función k_p2d_lote_producto: Igual que k_p2d_lote, con el producto de
+# matrices M_LG * K_L * M_LG^T. Es más lenta; sirve de referencia para
+# comprobar la expresión cerrada:
+#     np.allclose(k_p2d_lote(EA, EI, L, a), k_p2d_lote_producto(EA, EI, L, a))
+#---------------------------------------------------------------
+def k_p2d_lote_producto(EA, EI, L, angulo=0.):
+    """ Matrices de rigidez en globales (n,6,6), por producto de matrices """
+    K_L = k_p2d_local_lote(EA, EI, L)
+    angulo = np.broadcast_to(np.atleast_1d(np.asarray(angulo, dtype=float)),
+                             (K_L.shape[0],))
+    M_LG = m_lg_p2d_lote(angulo)
+
+# Cambio de base de todas las barras a la vez: K_G = M_LG * K_L * M_LG^T
+# El producto se hace con np.matmul, que opera sobre el último par de ejes
+    return M_LG @ K_L @ M_LG.transpose(0, 2, 1)
+
+#---------------------------------------------------------------
+# Función k_p2d_global: Matriz de rigidez P2D en globales de una barra
+#     Misma expresión cerrada que k_p2d_lote, con escalares de Python:
+#     para una sola barra es más rápida que la versión por lotes.
+#     angulo: en radianes
+#     Salida: matriz (6,6)
+#---------------------------------------------------------------
+def k_p2d_global(EA, EI, L, angulo=0.):
+    """ Matriz de rigidez en globales (6,6) de una barra P2D """
+    c, s = math.cos(angulo), math.sin(angulo)
+    k_ax = EA / L
+    k_11 = 12 * EI / L**3
+    k_12 = 6 * EI / L**2
+    k_22 = 4 * EI / L
+    k_25 = 2 * EI / L
+    xx = k_ax * c * c + k_11 * s * s
+    yy = k_ax * s * s + k_11 * c * c
+    xy = k_ax * c * s - k_11 * c * s
+    xg = k_12 * s
+    yg = k_12 * c
+# Opuestos como 0 - x, para no obtener ceros negativos (ver k_p2d_lote)
+    nxx, nyy, nxy, nxg, nyg = 0. - xx, 0. - yy, 0. - xy, 0. - xg, 0. - yg
+    return np.array([[ xx,  xy, nxg, nxx, nxy, nxg],
+                     [ xy,  yy,  yg, nxy, nyy,  yg],
+                     [nxg,  yg, k_22, xg, nyg, k_25],
+                     [nxx, nxy,  xg,  xx,  xy,  xg],
+                     [nxy, nyy, nyg,  xy,  yy, nyg],
+                     [nxg,  yg, k_25, xg, nyg, k_22]])
+
+#---------------------------------------------------------------
+# Función k_p2d_lote_coords: Igual que k_p2d_lote, pero a partir de
+# las coordenadas de los nudos de cada barra
+#---------------------------------------------------------------
+def k_p2d_lote_coords(EA, EI, x1, y1, x2, y2):
+    """ Matrices de rigidez en globales (n,6,6) a partir de coordenadas """
+    L, angulo = geometria_lote(x1, y1, x2, y2)
+    return k_p2d_lote(EA, EI, L, angulo)
+
+#---------------------------------------------------------------
+# Función k_a2d_lote: Matrices de rigidez A2D en globales
+#     EA, L: escalares o vectores de longitud n
+#     angulo: ángulo de cada barra en radianes
+#     Salida: pila (n,4,4), gdl (u1x, u1y, u2x, u2y)
+#---------------------------------------------------------------
+def k_a2d_lote(EA, L, angulo=0.):
+    """ Matrices de rigidez en globales (n,4,4) de n barras A2D """
+    EA, L, angulo = np.broadcast_arrays(np.atleast_1d(np.asarray(EA, dtype=float)),
+                                        np.atleast_1d(np.asarray(L, dtype=float)),
+                                        np.atleast_1d(np.asarray(angulo, dtype=float)))
+# M_LG * K_L * M_LG^T se reduce a EA/L * [[vv^T, -vv^T], [-vv^T, vv^T]]
+# siendo v = (cos, sin) el vector director de la barra
+    v = np.stack([np.cos(angulo), np.sin(angulo)], axis=1)
+    vv = (EA / L)[:, None, None] * v[:, :, None] * v[:, None, :]
+    K_G = np.empty((L.shape[0], 4, 4))
+    K_G[:, 0:2, 0:2] = vv
+    K_G[:, 0:2, 2:4] = -vv
+    K_G[:, 2:4, 0:2] = -vv
+    K_G[:, 2:4, 2:4] = vv
+    return K_G
+
+#---------------------------------------------------------------
+# Función axiles_a2d_lote: Esfuerzo axil de n barras A2D
+#     N = EA/L * (c, s) . (u2 - u1)   (positivo a tracción)
+#     u_e: desplazamientos en globales de los extremos de cada barra,
+#          (n,4) o (n,4,n_casos)
+#     Salida: vector (n) o matriz (n, n_casos)
+#---------------------------------------------------------------
+def axiles_a2d_lote(EA, L, angulo, u_e):
+    """ Axiles (n) o (n, n_casos) de n barras A2D """
+    u_e = np.asarray(u_e, dtype=float)
+    k = np.atleast_1d(np.asarray(EA, dtype=float) / np.asarray(L, dtype=float))
+    c = np.cos(np.atleast_1d(np.asarray(angulo, dtype=float)))
+    s = np.sin(np.atleast_1d(np.asarray(angulo, dtype=float)))
+    if u_e.ndim == 3:
+        k, c, s = k[:, None], c[:, None], s[:, None]
+    return k * (c * (u_e[:, 2] - u_e[:, 0]) + s * (u_e[:, 3] - u_e[:, 1]))
+
+#---------------------------------------------------------------
+# Función geometria_3d_lote: Longitud y vector director de n barras 3D
+#     p1, p2: matrices (n,3) de coordenadas de los nudos inicial y final
+#     Salida: (L, v), siendo v la matriz (n,3) de cosenos directores
+#---------------------------------------------------------------
+def geometria_3d_lote(p1, p2):
+    """ Devuelve (L, v) de n barras 3D """
+    d = np.asarray(p2, dtype=float).reshape(-1, 3) - np.asarray(p1, dtype=float).reshape(-1, 3)
+    L = np.linalg.norm(d, axis=1)
+    return L, d / L[:, None]
+
+#---------------------------------------------------------------
+# Función k_a3d_lote: Matrices de rigidez A3D en globales
+#     EA, L: escalares o vectores de longitud n
+#     v: matriz (n,3) de cosenos directores de cada barra
+#     Salida: pila (n,6,6), gdl (u1x, u1y, u1z, u2x, u2y, u2z)
+#---------------------------------------------------------------
+def k_a3d_lote(EA, L, v):
+    """ Matrices de rigidez en globales (n,6,6) de n barras A3D """
+    v = np.asarray(v, dtype=float).reshape(-1, 3)
+    EA, L = np.broadcast_arrays(np.atleast_1d(np.asarray(EA, dtype=float)),
+                                np.atleast_1d(np.asarray(L, dtype=float)))
+# M_LG (6x2) * K_L (2x2) * M_LG^T = EA/L * [[vv^T, -vv^T], [-vv^T, vv^T]]
+    vv = (EA / L)[:, None, None] * v[:, :, None] * v[:, None, :]
+    K_G = np.empty((v.shape[0], 6, 6))
+    K_G[:, 0:3, 0:3] = vv
+    K_G[:, 0:3, 3:6] = -vv
+    K_G[:, 3:6, 0:3] = -vv
+    K_G[:, 3:6, 3:6] = vv
+    return K_G
+
+#---------------------------------------------------------------
+# Función axiles_a3d_lote: Esfuerzo axil de n barras A3D
+#     N = EA/L * v . (u2 - u1)   (positivo a tracción)
+#     u_e: desplazamientos en globales de los extremos de cada barra,
+#          (n,6) o (n,6,n_casos)
+#     Salida: vector (n) o matriz (n, n_casos)
+#---------------------------------------------------------------
+def axiles_a3d_lote(EA, L, v, u_e):
+    """ Axiles (n) o (n, n_casos) de n barras A3D """
+    u_e = np.asarray(u_e, dtype=float)
+    alarg = np.einsum("ni,ni...->n...", np.asarray(v, dtype=float), u_e[:, 3:6] - u_e[:, 0:3])
+    k = np.asarray(EA, dtype=float) / np.asarray(L, dtype=float)
+    return (k[..., None] if alarg.ndim == 2 and np.ndim(k) else k) * alarg
+
+#===============================================================
+# PÓRTICOS 3D (P3D): 12 gdl por barra
+# Gdl de cada nudo: (ux, uy, uz, giro_x, giro_y, giro_z)
+# Ejes locales de cada barra (filas de la matriz R, en globales):
+#     x': eje de la barra, de p1 a p2
+#     y': en el plano vertical que contiene a la barra (perpendicular a
+#         ella, hacia arriba). En barras verticales, y' = X global
+#     z' = x' ^ y'
+# Con el giro (ángulo beta, en radianes) se giran y', z' alrededor de x'.
+# Inercias: Iz para la flexión en el plano x'y', Iy en el plano x'z'.
+#===============================================================
+
+#---------------------------------------------------------------
+# Función ejes_locales_lote: Matrices R (n,3,3) de ejes locales
+#     v: matriz (n,3) de cosenos directores de las barras
+#     giro: ángulo beta de cada barra (escalar o vector), en radianes
+#     u_local = R u_global para cada terna de gdl
+#---------------------------------------------------------------
+def ejes_locales_lote(v, giro=0.):
+    """ Ejes locales (n,3,3) de n barras P3D. Filas: x', y', z' """
+    v = np.asarray(v, dtype=float).reshape(-1, 3)
+    n = v.shape[0]
+    giro = np.broadcast_to(np.asarray(giro, dtype=float), (n,))
+
+# Referencia Z global, salvo en barras verticales (X global)
+    vertical = np.hypot(v[:, 0], v[:, 1]) < 1E-9
+    ref = np.zeros((n, 3))
+    ref[:, 2] = ~vertical
+    ref[:, 0] = vertical
+    y = ref - np.einsum("ni,ni->n", ref, v)[:, None] * v
+    y /= np.linalg.norm(y, axis=1)[:, None]
+    z = np.cross(v, y)
+
+    c = np.cos(giro)[:, None]
+    s = np.sin(giro)[:, None]
+    return np.stack([v, c * y + s * z, c * z - s * y], axis=1)
+
+#---------------------------------------------------------------
+# Función giro_referencia_lote: Giro beta a partir de un vector de
+# referencia. El eje y' de cada barra queda en el plano que forman el
+# eje de la barra y el vector de referencia (como en muchos programas
+# de cálculo, el "punto K" o "vector de orientación").
+#     v: matriz (n,3) de cosenos directores
+#     referencia: vector (3) común, o matriz (n,3)
+#---------------------------------------------------------------
+def giro_referencia_lote(v, referencia):
+    """ Ángulos beta (n) para que y' esté en el plano (x', referencia) """
+    v = np.asarray(v, dtype=float).reshape(-1, 3)
+    r = np.broadcast_to(np.asarray(referencia, dtype=float), v.shape)
+    r = r - np.einsum("ni,ni->n", r, v)[:, None] * v
+    if np.any(np.linalg.norm(r, axis=1) < 1E-9):
+        raise ValueError("El vector de referencia no puede ser paralelo a la barra")
+    R = ejes_locales_lote(v)
+    return np.arctan2(np.einsum("ni,ni->n", r, R[:, 2]), np.einsum("ni,ni->n", r, R[:, 1]))
+
+#---------------------------------------------------------------
+# Función k_p3d_local_lote: Matrices de rigidez P3D en locales
+#     EA, GJ, EIy, EIz, L: escalares o vectores de longitud n
+#     Salida: pila (n,12,12)
+#---------------------------------------------------------------
+def k_p3d_local_lote(EA, GJ, EIy, EIz, L):
+    """ Matrices de rigidez en locales (n,12,12) de n barras P3D """
+    EA, GJ, EIy, EIz, L = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(a, dtype=float)) for a in (EA, GJ, EIy, EIz, L)])
+    n = L.shape[0]
+
+    k_ax = EA / L
+    k_t = GJ / L
+    K_L = np.zeros((n, 12, 12))
+    K_L[:, 0, 0] = K_L[:, 6, 6] = k_ax
+    K_L[:, 0, 6] = -k_ax
+    K_L[:, 3, 3] = K_L[:, 9, 9] = k_t
+    K_L[:, 3, 9] = -k_t
+
+# Flexión en el plano x'y' (uy, giro_z): los mismos términos del P2D
+    k_11 = 12 * EIz / L**3
+    k_12 = 6 * EIz / L**2
+    K_L[:, 1, 1] = K_L[:, 7, 7] = k_11
+    K_L[:, 1, 7] = -k_11
+    K_L[:, 1, 5] = K_L[:, 1, 11] = k_12
+    K_L[:, 5, 7] = K_L[:, 7, 11] = -k_12
+    K_L[:, 5, 5] = K_L[:, 11, 11] = 4 * EIz / L
+    K_L[:, 5, 11] = 2 * EIz / L
+
+# Flexión en el plano x'z' (uz, giro_y): cambia el signo de los
+# términos que acoplan desplazamiento y giro
+    k_11 = 12 * EIy / L**3
+    k_12 = 6 * EIy / L**2
+    K_L[:, 2, 2] = K_L[:, 8, 8] = k_11
+    K_L[:, 2, 8] = -k_11
+    K_L[:, 2, 4] = K_L[:, 2, 10] = -k_12
+    K_L[:, 4, 8] = K_L[:, 8, 10] = k_12
+    K_L[:, 4, 4] = K_L[:, 10, 10] = 4 * EIy / L
+    K_L[:, 4, 10] = 2 * EIy / L
+
+    iu = np.triu_indices(12, 1)
+    K_L[:, iu[1], iu[0]] = K_L[:, iu[0], iu[1]]
+    return K_L
+
+#---------------------------------------------------------------
+# Función m_lg_p3d_lote: Matrices de cambio de base L -> G del P3D
+#     R: pila (n,3,3) de ejes locales (ejes_locales_lote)
+#     Salida: pila (n,12,12), con cuatro bloques R^T en la diagonal
+#---------------------------------------------------------------
+def m_lg_p3d_lote(R):
+    """ Matrices de cambio de base de locales a globales (n,12,12) """
+    R = np.asarray(R, dtype=float).reshape(-1, 3, 3)
+    M_LG = np.zeros((R.shape[0], 12, 12))
+    for i in range(0, 12, 3):
+        M_LG[:, i:i + 3, i:i + 3] = R.transpose(0, 2, 1)
+    return M_LG
+
+#---------------------------------------------------------------
+# Función k_p3d_lote: Matrices de rigidez P3D en globales
+#     R: pila (n,3,3) de ejes locales
+#     Salida: pila (n,12,12)
+#---------------------------------------------------------------
+def k_p3d_lote(EA, GJ, EIy, EIz, L, R):
+    """ Matrices de rigidez en globales (n,12,12) de n barras P3D """
+    EA, GJ, EIy, EIz, L = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(a, dtype=float)) for a in (EA, GJ, EIy, EIz, L)])
+    n = L.shape[0]
+    R = np.broadcast_to(np.asarray(R, dtype=float), (n, 3, 3))
+
+# M_LG es diagonal por bloques, y los bloques 3x3 de K_L son diagonales
+# o sólo tienen dos términos. Cada bloque en globales, R^T K_ab R, es
+# una suma de productos r_i r_j^T de los ejes locales (filas de R), que
+# se calculan una vez: no se multiplica ninguna matriz 12x12
+    rr = R[:, :, None, :, None] * R[:, None, :, None, :]   # rr[:,i,j] = r_i r_j^T
+    def diagonal(d0, d1, d2):
+        return (d0[:, None, None] * rr[:, 0, 0] + d1[:, None, None] * rr[:, 1, 1]
+                + d2[:, None, None] * rr[:, 2, 2])
+
+    K_uu = diagonal(EA / L, 12 * EIz / L**3, 12 * EIy / L**3)
+    K_ug = (6 * EIz / L**2)[:, None, None] * rr[:, 1, 2] - (6 * EIy / L**2)[:, None, None] * rr[:, 2, 1]
+    K_gg = diagonal(GJ / L, 4 * EIy / L, 4 * EIz / L)
+    K_gg2 = diagonal(-GJ / L, 2 * EIy / L, 2 * EIz / L)
+    K_gu = K_ug.transpose(0, 2, 1)
+
+# Bloques (a, b) con a, b = u1, giro1, u2, giro2
+    K_b = np.empty((n, 4, 4, 3, 3))
+    K_b[:, 0, 0] = K_b[:, 2, 2] = K_uu
+    K_b[:, 0, 2] = K_b[:, 2, 0] = -K_uu
+    K_b[:, 0, 1] = K_b[:, 0, 3] = K_ug
+    K_b[:, 1, 0] = K_b[:, 3, 0] = K_gu
+    K_b[:, 2, 1] = K_b[:, 2, 3] = -K_ug
+    K_b[:, 1, 2] = K_b[:, 3, 2] = -K_gu
+    K_b[:, 1, 1] = K_b[:, 3, 3] = K_gg
+    K_b[:, 1, 3] = K_gg2
+    K_b[:, 3, 1] = K_gg2.transpose(0, 2, 1)
+    return K_b.transpose(0, 1, 3, 2, 4).reshape(n, 12, 12)
+
+#===============================================================
+# CONDENSACIÓN ESTÁTICA POR LOTES
+# Para cada barra se separan los gdl retenidos (r) y condensados (c):
+#
+#     K_cond = K_rr - K_rc K_cc^-1 K_cr       (complemento de Schur)
+#     u_c    = -K_cc^-1 K_cr u_r - K_cc^-1 F_c (recuperación)
+#
+# Cada barra puede condensar un conjunto distinto de gdl. Para operar
+# con todas a la vez, las matrices se mantienen de dimensión (n,6,6):
+# las filas y columnas condensadas quedan a cero en K_cond.
+#===============================================================
+
+#---------------------------------------------------------------
+# Función mascara_gdl: Máscara booleana (n,d) de gdl condensados
+#     liberados: máscara (n,d) o (d), o lista de índices de gdl
+#                (indexando desde 0), común a todas las barras
+#---------------------------------------------------------------
+def mascara_gdl(liberados, n, d=6):
+    """ Máscara booleana (n,d) de los gdl condensados de cada barra """
+    liberados = np.asarray(liberados)
+    if liberados.dtype != bool:
+        mascara = np.zeros(d, dtype=bool)
+        mascara[liberados.astype(np.int64)] = True
+        liberados = mascara
+    return np.broadcast_to(liberados, (n, d))
+
+#---------------------------------------------------------------
+# Función condensa_lote: Condensación estática de n barras
+#     K: pila (n,d,d) de matrices de rigidez (locales o globales)
+#     liberados: gdl a condensar de cada barra (ver mascara_gdl)
+#     F: pila (n,d) de fuerzas de empotramiento, opcional
+#     Salida: (K_cond, T) o (K_cond, T, F_cond, u_0), todas de
+#             dimensión (n,d,d) o (n,d), de forma que los
+#             desplazamientos de todos los gdl de la barra son
+#             u = T u_r + u_0
+#---------------------------------------------------------------
+def condensa_lote(K, liberados, F=None):
+    """ Complemento de Schur de los gdl liberados de cada barra """
+    K = np.asarray(K, dtype=float)
+    n, d = K.shape[0], K.shape[1]
+    c = mascara_gdl(liberados, n, d)
+    r = ~c
+    cc = c[:, :, None] & c[:, None, :]
+    rc = r[:, :, None] & c[:, None, :]
+
+# A = K_cc en los gdl condensados, identidad en los retenidos. Así se
+# pueden resolver todas las barras a la vez con np.linalg.solve
+    A = np.where(cc, K, 0.)
+    A[:, np.arange(d), np.arange(d)] += r
+    K_rc = np.where(rc, K, 0.)
+    K_cr = np.where(rc.transpose(0, 2, 1), K, 0.)
+
+# X = K_cc^-1 K_cr, con filas nulas en los gdl retenidos
+    X = np.linalg.solve(A, K_cr)
+    K_cond = np.where(r[:, :, None] & r[:, None, :], K, 0.) - K_rc @ X
+
+# Operador de recuperación: u = T u_r
+    T = -X
+    T[:, np.arange(d), np.arange(d)] += r
+    if F is None:
+        return K_cond, T
+
+    F = np.broadcast_to(np.asarray(F, dtype=float), (n, d))
+    G = np.linalg.solve(A, np.where(c, F, 0.)[:, :, None])
+    F_cond = np.where(r, F, 0.) - (K_rc @ G)[:, :, 0]
+    return K_cond, T, F_cond, -G[:, :, 0]
+
+#---------------------------------------------------------------
+# Función bloques_lote: Submatrices de n barras
+#     K: pila (n,2d,2d) de matrices de barras de dos nudos
+#     Salida: pila (n,2,2,d,d), siendo B[e,i,j] el bloque ij (nudos
+#             i, j = 0, 1) de la barra e. Es una vista de K, sin copia
+#             si K es contigua: B[e,0,1] es K[e,0:d,d:2d]
+#---------------------------------------------------------------
+def bloques_lote(K):
+    """ Vista (n,2,2,d,d) de los bloques ij de una pila de matrices """
+    n, m = K.shape[0], K.shape[1]
+    d = m // 2
+    return K.reshape(n, 2, d, 2, d).transpose(0, 1, 3, 2, 4)
+
+#===============================================================
+# RIGIDEZ GEOMÉTRICA (PANDEO LINEAL)
+# Con un axil N en la barra (positivo a tracción), el equilibrio en la
+# posición deformada añade a K la matriz de rigidez geométrica K_G,
+# proporcional a N. La tracción rigidiza la barra y la compresión la
+# flexibiliza. Las matrices se dan para todas las barras a la vez:
+#     P2D: funciones de forma cúbicas (matriz consistente), en locales
+#          N/(30L) * [[0,  0,    0,   0,  0,    0  ],
+#                     [0,  36,   3L,  0, -36,   3L ],
+#                     [0,  3L,   4L², 0, -3L,  -L² ],
+#                     [0,  0,    0,   0,  0,    0  ],
+#                     [0, -36,  -3L,  0,  36,  -3L ],
+#                     [0,  3L,  -L²,  0, -3L,   4L²]]
+#     A2D, A3D: N/L * [[P, -P], [-P, P]], siendo P = I - v v^T la
+#          proyección perpendicular a la barra
+#===============================================================
+
+#---------------------------------------------------------------
+# Función kg_p2d_local_lote: Matrices geométricas P2D en locales
+#     N, L: escalares o vectores de longitud n
+#     Salida: pila (n,6,6)
+#---------------------------------------------------------------
+def kg_p2d_local_lote(N, L):
+    """ Matrices de rigidez geométrica en locales (n,6,6) de barras P2D """
+    N, L = np.broadcast_arrays(np.atleast_1d(np.asarray(N, dtype=float)),
+                               np.atleast_1d(np.asarray(L, dtype=float)))
+    c = N / (30. * L)
+    K_G = np.zeros((L.shape[0], 6, 6))
+    K_G[:, 1, 1] = K_G[:, 4, 4] = 36. * c
+    K_G[:, 1, 4] = K_G[:, 4, 1] = -36. * c
+    K_G[:, 1, 2] = K_G[:, 2, 1] = K_G[:, 1, 5] = K_G[:, 5, 1] = 3. * L * c
+    K_G[:, 4, 2] = K_G[:, 2, 4] = K_G[:, 4, 5] = K_G[:, 5, 4] = -3. * L * c
+    K_G[:, 2, 2] = K_G[:, 5, 5] = 4. * L**2 * c
+    K_G[:, 2, 5] = K_G[:, 5, 2] = -L**2 * c
+    return K_G
+
+#---------------------------------------------------------------
+# Función kg_p2d_lote: Matrices geométricas P2D en globales
+#     angulo: ángulo de cada barra en radianes
+#     Salida: pila (n,6,6)
+#---------------------------------------------------------------
+def kg_p2d_lote(N, L, angulo=0.):
+    """ Matrices de rigidez geométrica en globales (n,6,6) de barras P2D """
+    K_L = kg_p2d_local_lote(N, L)
+    M_LG = m_lg_p2d_lote(np.broadcast_to(np.asarray(angulo, dtype=float), (K_L.shape[0],)))
+    return M_LG @ K_L @ M_LG.transpose(0, 2, 1)
+
+# Matriz N/L [[P, -P], [-P, P]] a partir de las proyecciones P (n,d,d)
+def _kg_barra_articulada(N, L, P):
+    P = (np.asarray(N, dtype=float) / np.asarray(L, dtype=float))[:, None, None] * P
+    d = P.shape[1]
+    K_G = np.empty((P.shape[0], 2 * d, 2 * d))
+    K_G[:, :d, :d] = P
+    K_G[:, :d, d:] = -P
+    K_G[:, d:, :d] = -P
+    K_G[:, d:, d:] = P
+    return K_G
+
+#---------------------------------------------------------------
+# Funciones kg_a2d_lote, kg_a3d_lote: Matrices geométricas A2D y A3D
+# en globales
+#     N, L: escalares o vectores de longitud n
+#     angulo (A2D): ángulo de cada barra en radianes
+#     v (A3D): matriz (n,3) de cosenos directores
+#     Salida: pila (n,4,4) o (n,6,6), gdl como en k_a2d_lote, k_a3d_lote
+#---------------------------------------------------------------
+def kg_a2d_lote(N, L, angulo=0.):
+    """ Matrices de rigidez geométrica en globales (n,4,4) de barras A2D """
+    N, L, angulo = np.broadcast_arrays(np.atleast_1d(np.asarray(N, dtype=float)),
+                                       np.atleast_1d(np.asarray(L, dtype=float)),
+                                       np.atleast_1d(np.asarray(angulo, dtype=float)))
+# En el plano, I - v v^T = n n^T, con n = (-sin, cos) perpendicular a la barra
+    n = np.stack([-np.sin(angulo), np.cos(angulo)], axis=1)
+    return _kg_barra_articulada(N, L, n[:, :, None] * n[:, None, :])
+
+def kg_a3d_lote(N, L, v):
+    """ Matrices de rigidez geométrica en globales (n,6,6) de barras A3D """
+    v = np.asarray(v, dtype=float).reshape(-1, 3)
+    N = np.broadcast_to(np.asarray(N, dtype=float), (v.shape[0],))
+    L = np.broadcast_to(np.asarray(L, dtype=float), (v.shape[0],))
+    return _kg_barra_articulada(N, L, np.eye(3) - v[:, :, None] * v[:, None, :])
+
+#===============================================================
+# MATRICES DE MASA (ANÁLISIS MODAL)
+# m es la masa por unidad de longitud de cada barra (rho * A).
+#     Consistente: con las mismas funciones de forma que la rigidez.
+#         P2D en locales, axil mL/6 [[2, 1], [1, 2]] en (u1, u2) y flexión
+#         mL/420 * [[ 156,  22L,   54,  -13L ],
+#                   [ 22L,  4L²,  13L,  -3L² ],
+#                   [  54,  13L,  156,  -22L ],
+#                   [-13L, -3L², -22L,   4L² ]] en (v1, giro1, v2, giro2)
+#         A2D, A3D: mL/6 [[2I, I], [I, 2I]] (interpolación lineal)
+#     Concentrada: mL/2 en cada gdl de traslación, 0 en los giros. Es
+#         diagonal e igual en locales y en globales
+#===============================================================
+
+#---------------------------------------------------------------
+# Función m_p2d_local_lote: Matrices de masa P2D en locales
+#     m, L: escalares o vectores de longitud n
+#     concentrada: True para la matriz de masas concentradas
+#     Salida: pila (n,6,6)
+#---------------------------------------------------------------
+def m_p2d_local_lote(m, L, concentrada=False):
+    """ Matrices de masa en locales (n,6,6) de barras P2D """
+    m, L = np.broadcast_arrays(np.atleast_1d(np.asarray(m, dtype=float)),
+                               np.atleast_1d(np.asarray(L, dtype=float)))
+    M = np.zeros((L.shape[0], 6, 6))
+    if concentrada:
+        for i in (0, 1, 3, 4):
+            M[:, i, i] = m * L / 2.
+        return M
+    a = m * L / 6.
+    M[:, 0, 0] = M[:, 3, 3] = 2. * a
+    M[:, 0, 3] = M[:, 3, 0] = a
+    c = m * L / 420.
+    M[:, 1, 1] = M[:, 4, 4] = 156. * c
+    M[:, 1, 4] = M[:, 4, 1] = 54. * c
+    M[:, 1, 2] = M[:, 2, 1] = 22. * L * c
+    M[:, 4, 5] = M[:, 5, 4] = -22. * L * c
+    M[:, 1, 5] = M[:, 5, 1] = -13. * L * c
+    M[:, 2, 4] = M[:, 4, 2] = 13. * L * c
+    M[:, 2, 2] = M[:, 5, 5] = 4. * L**2 * c
+    M[:, 2, 5] = M[:, 5, 2] = -3. * L**2 * c
+    return M
+
+#---------------------------------------------------------------
+# Función m_p2d_lote: Matrices de masa P2D en globales
+#     angulo: ángulo de cada barra en radianes
+#     Salida: pila (n,6,6)
+#---------------------------------------------------------------
+def m_p2d_lote(m, L, angulo=0., concentrada=False):
+    """ Matrices de masa en globales (n,6,6) de barras P2D """
+    M_L = m_p2d_local_lote(m, L, concentrada)
+    if concentrada:
+        return M_L
+    M_LG = m_lg_p2d_lote(np.broadcast_to(np.asarray(angulo, dtype=float), (M_L.shape[0],)))
+    return M_LG @ M_L @ M_LG.transpose(0, 2, 1)
+
+#---------------------------------------------------------------
+# Funciones m_a2d_lote, m_a3d_lote: Matrices de masa A2D y A3D
+#     m, L: escalares o vectores de longitud n
+#     No dependen de la orientación de la barra
+#     Salida: pila (n,4,4) o (n,6,6), gdl como en k_a2d_lote, k_a3d_lote
+#---------------------------------------------------------------
+def _m_barra_articulada(m, L, d, concentrada):
+    m, L = np.broadcast_arrays(np.atleast_1d(np.asarray(m, dtype=float)),
+                               np.atleast_1d(np.asarray(L, dtype=float)))
+    I = np.eye(d)
+    if concentrada:
+        return (m * L / 2.)[:, None, None] * np.eye(2 * d)
+    return (m * L / 6.)[:, None, None] * np.block([[2. * I, I], [I, 2. * I]])
+
+def m_a2d_lote(m, L, concentrada=False):
+    """ Matrices de masa (n,4,4) de barras A2D """
+    return _m_barra_articulada(m, L, 2, concentrada)
+
+def m_a3d_lote(m, L, concentrada=False):
+    """ Matrices de masa (n,6,6) de barras A3D """
+    return _m_barra_articulada(m, L, 3, concentrada)
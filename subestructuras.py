@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+
+from ensamblaje import tripletes, ensambla_coo
+from resolucion import Factorizacion
+
+#===============================================================
+# SUBESTRUCTURAS (SUPERELEMENTOS)
+# Es la misma idea que K_Condensa_Giro, pero con una parte del modelo:
+# los gdl interiores (i) de la subestructura se condensan sobre los gdl
+# de frontera (b), que son los que la unen con el resto del modelo.
+#
+#     K_sup = K_bb - K_bi K_ii^-1 K_ib
+#     F_sup = F_b  - K_bi K_ii^-1 F_i
+#     u_i   = K_ii^-1 (F_i - K_ib u_b)     (recuperación del interior)
+#
+# Si un viaducto tiene varios vanos iguales, se condensa un vano una
+# sola vez y se coloca en el modelo tantas veces como vanos haya.
+#===============================================================
+
+#---------------------------------------------------------------
+# Clase Subestructura
+# Inicialización:
+#     K: matriz de rigidez (dispersa) de la subestructura, con su propia
+#        numeración de gdl (indexando desde 0)
+#     gdl_frontera: gdl de la subestructura que se conservan
+#     F: fuerzas en los gdl de la subestructura, (n) o (n, n_casos)
+#     metodo: método de factorización de K_ii (ver resolucion.py)
+# Funciones de la clase:
+#     condensa(): Calcula y guarda K_sup y F_sup
+#     K_sup, F_sup: Matriz (n_b, n_b) y fuerzas (n_b) del superelemento
+#     recupera(u_b): Desplazamientos de todos los gdl a partir de los
+#                    de frontera. Sólo se calcula cuando se pide.
+#---------------------------------------------------------------
+class Subestructura:
+    """ Clase para representar una subestructura condensada """
+    def __init__(self, K, gdl_frontera, F=None, metodo="banda"):
+        self.K = sp.csr_matrix(K)
+        self.n_gdl = self.K.shape[0]
+        self.frontera = np.asarray(gdl_frontera, dtype=np.int64)
+        self.interior = np.setdiff1d(np.arange(self.n_gdl), self.frontera)
+        self.F = np.zeros(self.n_gdl) if F is None else np.asarray(F, dtype=float)
+        self.metodo = metodo
+        self._K_sup = None
+        self._F_sup = None
+        self._factorizacion = None
+        self._u_F = None
+
+    def condensa(self):
+        if self._K_sup is not None:
+            return self
+        i, b = self.interior, self.frontera
+        K_i = self.K[i]
+        K_b = self.K[b]
+        K_ib = K_i[:, b].toarray()
+        K_bi = K_b[:, i]
+
+# Una sola factorización de K_ii sirve para condensar y para recuperar
+        self._factorizacion = Factorizacion(K_i[:, i], self.metodo)
+        X = self._factorizacion.resuelve(K_ib)      # K_ii^-1 K_ib
+        self._u_F = self._factorizacion.resuelve(self.F[i])  # K_ii^-1 F_i
+
+        self._K_sup = K_b[:, b].toarray() - K_bi @ X
+        self._F_sup = self.F[b] - K_bi @ self._u_F
+        return self
+
+    @property
+    def K_sup(self):
+        return self.condensa()._K_sup
+
+    @property
+    def F_sup(self):
+        return self.condensa()._F_sup
+
+    def recupera(self, u_b):
+        """ Desplazamientos (n) o (n, n_casos) de todos los gdl """
+        self.condensa()
+        u_b = np.asarray(u_b, dtype=float)
+        K_ib = self.K[self.interior][:, self.frontera]
+        u_F = self._u_F
+        if u_b.ndim == 2 and u_F.ndim == 1:
+            u_F = u_F[:, None]
+        u = np.zeros((self.n_gdl,) + u_b.shape[1:])
+        u[self.frontera] = u_b
+        u[self.interior] = u_F - self._factorizacion.resuelve(K_ib @ u_b)
+        return u
+
+#---------------------------------------------------------------
+# Función condensa_subestructuras: Condensa varias subestructuras
+#     Con procesos > 1, cada subestructura se condensa en un proceso
+#     distinto (concurrent.futures). Las subestructuras se devuelven ya
+#     condensadas (con su factorización, para recuperar el interior).
+#     La factorización "dispersa" (SuperLU) no se puede enviar entre
+#     procesos: en paralelo todas deben usar metodo = "banda".
+#---------------------------------------------------------------
+def _condensa(subestructura):
+    return subestructura.condensa()
+
+def condensa_subestructuras(subestructuras, procesos=None):
+    """ Lista de subestructuras condensadas, en serie o en paralelo """
+    if procesos is None or procesos <= 1 or len(subestructuras) <= 1:
+        return [s.condensa() for s in subestructuras]
+    if any(s.metodo == "dispersa" for s in subestructuras):
+        raise ValueError('En paralelo las subestructuras deben usar metodo = "banda"')
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        return list(ejecutor.map(_condensa, subestructuras))
+
+#---------------------------------------------------------------
+# Función ensambla_superelementos: Matriz y fuerzas globales
+#     colocaciones: lista de pares (subestructura, gdl_globales), siendo
+#                   gdl_globales los números de ecuación de los gdl de
+#                   frontera en el modelo completo. Una misma
+#                   subestructura puede aparecer varias veces.
+#     n_gdl: número total de gdl del modelo
+#     Salida: (K, F). K es una matriz CSR. Sin colocaciones, K y F son
+#             nulas
+#---------------------------------------------------------------
+def ensambla_superelementos(colocaciones, n_gdl):
+    """ Ensamblaje de superelementos en el modelo global """
+    filas, columnas, valores = [], [], []
+    F = None
+    for sub, gdl in colocaciones:
+        gdl = np.asarray(gdl, dtype=np.int64)
+        f, c, v = tripletes(sub.K_sup[None], gdl[None])
+        filas.append(f)
+        columnas.append(c)
+        valores.append(v)
+        F_sup = sub.F_sup
+        if F is None:
+            F = np.zeros((n_gdl,) + F_sup.shape[1:])
+        np.add.at(F, gdl, F_sup)
+
+    if not filas:
+        return (ensambla_coo(np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0), n_gdl),
+                np.zeros(n_gdl))
+    K = ensambla_coo(np.concatenate(filas), np.concatenate(columnas),
+                     np.concatenate(valores), n_gdl)
+    return K, F
@@ -0,0 +1,770 @@
+# -*- coding: utf-8 -*-
+"""
+Autores:
+Alejandro E. Martínez Castro, R. Gallego, E. Puertas, F. Ávila.
+amcastro@ugr.es
+Licencia Creative-Commons CC BY-NC-ND 3.0 ES
+"""
+#===============================================================
+#Librerías y funciones necesarias
+#===============================================================
+import itertools
+
+import numpy as np
+
+from rigidez import (k_p2d_local_lote, m_lg_p2d_lote, k_p2d_lote, k_a2d_lote,
+                     k_a3d_lote, ejes_locales_lote, giro_referencia_lote,
+                     k_p3d_local_lote, m_lg_p3d_lote, k_p3d_lote,
+                     condensa_lote, bloques_lote)
+
+#===============================================================
+# TABLAS DE NUDOS Y BARRAS (ESTRUCTURA DE ARRAYS)
+# Los datos del modelo se guardan en arrays de numpy, una columna por
+# dato y una fila por nudo o barra:
+#     nudos:      coordenadas (x, y, z) en float64
+#     barras:     nudos inicial y final (int32), tipo, sección, material
+#                 y giro de los ejes locales (P3D)
+#     secciones:  A, I (Iz en P3D), Iy, J
+#     materiales: E, G y densidad rho (masa por unidad de volumen)
+# Así, un modelo ocupa unos 49 bytes por barra (tabla de barras, nudos
+# y margen de crecimiento de las tablas), frente a unos 230 con objetos
+# con __dict__: unas 4.7 veces menos. Las longitudes, ángulos y
+# rigideces de todas las barras se calculan a la vez.
+#
+# Las clases Punto, Punto2D, P2D, A2D, A3D y P3D se mantienen, pero son
+# "vistas" ligeras (con __slots__) de una fila de las tablas: sólo
+# guardan la estructura y el número de fila. Al modificar p1.x se
+# modifica la tabla.
+#
+# Caché de geometría y rigidez: la estructura guarda la longitud, los
+# cosenos directores y la matriz de rigidez en globales de cada barra
+# la primera vez que se piden. Cada fila de las tablas lleva la marca
+# del instante de su última modificación (columna "_mod"); un valor de
+# la caché sólo es válido si se calculó después de la última
+# modificación de la barra, de sus nudos, de su sección y de su
+# material. Las modificaciones deben hacerse con Tabla.modifica (o
+# con las vistas: p1.x = ..., barra.ea = ...). Si se escribe
+# directamente en una columna, hay que llamar después a Tabla.marca.
+#===============================================================
+
+# Tipos de barra
+TIPO_P2D = 0
+TIPO_A2D = 1
+TIPO_A3D = 2
+TIPO_P3D = 3
+
+# Dimensión de la matriz de rigidez en globales de cada tipo de barra
+DIMENSION = {TIPO_P2D: 6, TIPO_A2D: 4, TIPO_A3D: 6, TIPO_P3D: 12}
+
+# Reloj común a todas las tablas: cada modificación recibe un instante
+# mayor que el anterior
+_RELOJ = itertools.count(1)
+
+def instante():
+    """ Instante actual del reloj: posterior a todas las modificaciones """
+    return next(_RELOJ)
+
+#---------------------------------------------------------------
+# Clase Tabla: Columnas de numpy que crecen al añadir filas
+#     COLUMNAS: diccionario nombre: (tipo de dato, forma de cada fila)
+#     tabla["nombre"] devuelve la columna (vista, sin copia)
+#     agrega(...) añade una fila, agrega_lote(...) añade varias
+#     modifica(...) cambia valores y marca las filas como modificadas
+#     reserva(m) asegura capacidad para m filas más, si se sabe de antemano
+#     La capacidad se duplica cuando se llena, como una lista de Python
+#---------------------------------------------------------------
+class Tabla:
+    """ Clase para representar una tabla como estructura de arrays """
+    COLUMNAS = {}
+
+    def __init__(self, capacidad=16):
+        self.n = 0
+        self._datos = {nombre: np.zeros((capacidad,) + forma, dtype=tipo)
+                       for nombre, (tipo, forma) in self.COLUMNAS.items()}
+        self._datos["_mod"] = np.zeros(capacidad, dtype=np.int64)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, nombre):
+        return self._datos[nombre][:self.n]
+
+    def reserva(self, m):
+        """ Asegura capacidad para m filas más (sin añadirlas) """
+        capacidad = next(iter(self._datos.values())).shape[0]
+        if self.n + m <= capacidad:
+            return
+        capacidad = max(2 * capacidad, self.n + m)
+        for nombre, columna in self._datos.items():
+            nueva = np.zeros((capacidad,) + columna.shape[1:], dtype=columna.dtype)
+            nueva[:self.n] = columna[:self.n]
+            self._datos[nombre] = nueva
+
+    def agrega_lote(self, **columnas):
+        """ Añade m filas. Devuelve sus índices """
+        m = max(np.shape(v)[0] for v in columnas.values())
+        self.reserva(m)
+        for nombre, valores in columnas.items():
+            self._datos[nombre][self.n:self.n + m] = valores
+        indices = np.arange(self.n, self.n + m)
+        self.n += m
+        return indices
+
+    def agrega(self, **valores):
+        """ Añade una fila. Devuelve su índice """
+        return int(self.agrega_lote(**{k: [v] for k, v in valores.items()})[0])
+
+    def modifica(self, nombre, indices, valores):
+        """ Cambia valores de una columna y marca las filas modificadas """
+        self[nombre][indices] = valores
+        self.marca(indices[0] if isinstance(indices, tuple) else indices)
+
+    def marca(self, filas=slice(None)):
+        """ Marca filas como modificadas (invalida la caché que dependa de ellas) """
+        self["_mod"][filas] = next(_RELOJ)
+
+class TablaNudos(Tabla):
+    """ Tabla de nudos: coordenadas (x, y, z) """
+    COLUMNAS = {"xyz": (np.float64, (3,))}
+
+class TablaSecciones(Tabla):
+    """ Tabla de secciones: área, inercias y módulo de torsión """
+    COLUMNAS = {"A":  (np.float64, ()),
+                "I":  (np.float64, ()),
+                "Iy": (np.float64, ()),
+                "J":  (np.float64, ())}
+
+class TablaMateriales(Tabla):
+    """ Tabla de materiales: módulos de elasticidad y de cortante, densidad """
+    COLUMNAS = {"E":   (np.float64, ()),
+                "G":   (np.float64, ()),
+                "rho": (np.float64, ())}
+
+class TablaBarras(Tabla):
+    """ Tabla de barras: nudos, tipo, sección, material y giro """
+    COLUMNAS = {"nudos":    (np.int32, (2,)),
+                "tipo":     (np.int8, ()),
+                "seccion":  (np.int32, ()),
+                "material": (np.int32, ()),
+                "giro":     (np.float64, ())}
+
+#---------------------------------------------------------------
+# Clase Estructura: Conjunto de tablas de un modelo
+#     El material 0 tiene E = G = 1. Lo usan las barras definidas
+#     directamente con EA y EI (por ejemplo P2D(p1, p2, ea, ei)), cuya
+#     sección guarda A = EA, I = EI (y en P3D Iy = EIy, J = GJ).
+#     Su densidad es rho = 0: la masa de esas barras se da directamente
+#     por unidad de longitud (ver dinamica.py).
+# Funciones de la clase (todas vectorizadas; "barras" es un índice o
+# vector de índices de barras, por defecto todas):
+#     vectores(barras): vectores p2 - p1 (n,3)
+#     geometria(barras): (L, cosenos directores (n,3)), con caché
+#     longitudes(barras), angulos(barras): L y ángulo en el plano xy
+#     ea(barras), ei(barras): productos E*A y E*I (E*Iz en P3D)
+#     eiy(barras), gj(barras): productos E*Iy y G*J (P3D)
+#     masas(barras): masa por unidad de longitud rho*A
+#     ejes(barras): ejes locales (n,3,3) de barras P3D
+#     rigideces(barras): matrices en globales (n,D,D), con caché. D = 6,
+#                        o 12 si entre ellas hay barras P3D
+#     vista_rigidez(i): matriz de la barra i en la caché, sin copia
+#     bloques(barras): bloques ij (n,2,2,d,d) de barras del mismo tipo
+#     de_tipo(tipo): índices de las barras de un tipo
+#     modificadas(desde, barras): barras afectadas por alguna
+#                        modificación posterior al instante "desde"
+#     estadisticas_cache(): aciertos y fallos de la caché
+#---------------------------------------------------------------
+class Estructura:
+    """ Clase para representar las tablas de nudos y barras de un modelo """
+    def __init__(self):
+        self.nudos = TablaNudos()
+        self.secciones = TablaSecciones()
+        self.materiales = TablaMateriales()
+        self.barras = TablaBarras()
+        self.materiales.agrega(E=1., G=1.)
+
+# Caché por barra: instante del cálculo (0 = sin calcular) y valores
+        self._instante_geo = np.zeros(0, dtype=np.int64)
+        self._L = np.zeros(0)
+        self._d = np.zeros((0, 3))
+        self._instante_K = np.zeros(0, dtype=np.int64)
+        self._K = np.zeros((0, 6, 6))
+# Las matrices (12,12) de las barras P3D se guardan aparte, para que las
+# demás barras no ocupen 1152 bytes: fila de cada barra en _K_p3d (-1 si
+# todavía no tiene)
+        self._fila_p3d = np.zeros(0, dtype=np.int64)
+        self._K_p3d = np.zeros((0, 12, 12))
+        self._n_p3d = 0
+        self.aciertos = {"geometria": 0, "rigidez": 0}
+        self.fallos = {"geometria": 0, "rigidez": 0}
+
+    def vectores(self, barras=slice(None)):
+        xyz = self.nudos["xyz"]
+        conect = self.barras["nudos"][barras]
+        return xyz[conect[..., 1]] - xyz[conect[..., 0]]
+
+# La caché crece con la tabla de barras. La de rigidez (304 bytes por
+# barra) sólo se crea cuando se piden rigideces: si sólo se piden
+# longitudes o ángulos, la caché ocupa 40 bytes por barra
+    def _ajusta_cache(self, rigidez=False):
+        n = self.barras.n
+        m = len(self.barras._datos["tipo"])
+        def amplia(v, valor=0):
+            if v.shape[0] >= n:
+                return v
+            nuevo = np.full((m,) + v.shape[1:], valor, dtype=v.dtype)
+            nuevo[:v.shape[0]] = v
+            return nuevo
+        self._instante_geo = amplia(self._instante_geo)
+        self._L = amplia(self._L)
+        self._d = amplia(self._d)
+        if rigidez:
+            self._instante_K = amplia(self._instante_K)
+            self._K = amplia(self._K)
+            self._fila_p3d = amplia(self._fila_p3d, -1)
+
+# Instante de la última modificación que afecta a cada barra
+    def _modificado(self, idx, propiedades=True):
+        conect = self.barras["nudos"][idx]
+        mod_nudos = self.nudos["_mod"]
+        mod = np.maximum(self.barras["_mod"][idx],
+                         np.maximum(mod_nudos[conect[:, 0]], mod_nudos[conect[:, 1]]))
+        if propiedades:
+            mod = np.maximum(mod, self.secciones["_mod"][self.barras["seccion"][idx]])
+            mod = np.maximum(mod, self.materiales["_mod"][self.barras["material"][idx]])
+        return mod
+
+    def _indices(self, barras):
+        idx = np.arange(self.barras.n)[barras]
+        return np.ndim(idx) == 0, np.atleast_1d(idx)
+
+    def geometria(self, barras=slice(None)):
+        """ Devuelve (L, cosenos directores) de las barras, con caché """
+        escalar, idx = self._indices(barras)
+        self._ajusta_cache()
+        validos = self._instante_geo[idx] > self._modificado(idx, False)
+        pendientes = np.unique(idx[~validos])
+        self.aciertos["geometria"] += int(np.count_nonzero(validos))
+        self.fallos["geometria"] += int(idx.size - np.count_nonzero(validos))
+        if pendientes.size:
+            v = self.vectores(pendientes)
+            L = np.linalg.norm(v, axis=1)
+            self._L[pendientes] = L
+            self._d[pendientes] = v / L[:, None]
+            self._instante_geo[pendientes] = next(_RELOJ)
+        if escalar:
+            return self._L[idx[0]], self._d[idx[0]].copy()
+        return self._L[idx], self._d[idx]
+
+    def longitudes(self, barras=slice(None)):
+        return self.geometria(barras)[0]
+
+    def angulos(self, barras=slice(None)):
+        d = self.geometria(barras)[1]
+        return np.arctan2(d[..., 1], d[..., 0])
+
+    def ea(self, barras=slice(None)):
+        E = self.materiales["E"][self.barras["material"][barras]]
+        return E * self.secciones["A"][self.barras["seccion"][barras]]
+
+    def ei(self, barras=slice(None)):
+        E = self.materiales["E"][self.barras["material"][barras]]
+        return E * self.secciones["I"][self.barras["seccion"][barras]]
+
+    def eiy(self, barras=slice(None)):
+        E = self.materiales["E"][self.barras["material"][barras]]
+        return E * self.secciones["Iy"][self.barras["seccion"][barras]]
+
+    def gj(self, barras=slice(None)):
+        G = self.materiales["G"][self.barras["material"][barras]]
+        return G * self.secciones["J"][self.barras["seccion"][barras]]
+
+    def masas(self, barras=slice(None)):
+        rho = self.materiales["rho"][self.barras["material"][barras]]
+        return rho * self.secciones["A"][self.barras["seccion"][barras]]
+
+    def ejes(self, barras=slice(None)):
+        return ejes_locales_lote(self.geometria(barras)[1], self.barras["giro"][barras])
+
+    def de_tipo(self, tipo):
+        return np.flatnonzero(self.barras["tipo"] == tipo)
+
+    def modificadas(self, desde, barras=slice(None)):
+        """ Índices de las barras modificadas después del instante desde """
+        idx = self._indices(barras)[1]
+        return idx[self._modificado(idx, True) > desde]
+
+# Cálculo de las matrices de rigidez de las barras que no estén en caché
+    def _actualiza_rigideces(self, idx):
+        self._ajusta_cache(rigidez=True)
+        validos = self._instante_K[idx] > self._modificado(idx, True)
+        pendientes = np.unique(idx[~validos])
+        self.aciertos["rigidez"] += int(np.count_nonzero(validos))
+        self.fallos["rigidez"] += int(idx.size - np.count_nonzero(validos))
+        if pendientes.size == 0:
+            return
+        L, d = self.geometria(pendientes)
+        tipo = self.barras["tipo"][pendientes]
+        ea = self.ea(pendientes)
+
+        s = tipo == TIPO_P2D
+        if np.any(s):
+            angulo = np.arctan2(d[s, 1], d[s, 0])
+            self._K[pendientes[s]] = k_p2d_lote(ea[s], self.ei(pendientes[s]), L[s], angulo)
+        s = tipo == TIPO_A2D
+        if np.any(s):
+            angulo = np.arctan2(d[s, 1], d[s, 0])
+            self._K[pendientes[s], :4, :4] = k_a2d_lote(ea[s], L[s], angulo)
+        s = tipo == TIPO_A3D
+        if np.any(s):
+            self._K[pendientes[s]] = k_a3d_lote(ea[s], L[s], d[s])
+        s = tipo == TIPO_P3D
+        if np.any(s):
+            p = pendientes[s]
+            self._asigna_filas_p3d(p)
+            R = ejes_locales_lote(d[s], self.barras["giro"][p])
+            self._K_p3d[self._fila_p3d[p]] = k_p3d_lote(ea[s], self.gj(p), self.eiy(p),
+                                                        self.ei(p), L[s], R)
+        self._instante_K[pendientes] = next(_RELOJ)
+
+# Filas nuevas de _K_p3d para las barras P3D que no tengan. _K_p3d crece
+# al doble cuando se llena
+    def _asigna_filas_p3d(self, barras):
+        nuevas = barras[self._fila_p3d[barras] < 0]
+        if nuevas.size == 0:
+            return
+        n = self._n_p3d + nuevas.size
+        if n > self._K_p3d.shape[0]:
+            K = np.zeros((max(2 * self._K_p3d.shape[0], n), 12, 12))
+            K[:self._n_p3d] = self._K_p3d[:self._n_p3d]
+            self._K_p3d = K
+        self._fila_p3d[nuevas] = np.arange(self._n_p3d, n)
+        self._n_p3d = n
+
+    def rigideces(self, barras=slice(None)):
+        """ Matrices de rigidez en globales (n,D,D). Las menores ocupan [:d,:d] """
+        escalar, idx = self._indices(barras)
+        self._actualiza_rigideces(idx)
+        p3d = self.barras["tipo"][idx] == TIPO_P3D
+        if np.any(p3d):
+            K = np.zeros((idx.size, 12, 12))
+            K[:, :6, :6] = self._K[idx]
+            K[p3d] = self._K_p3d[self._fila_p3d[idx[p3d]]]
+        else:
+            K = self._K[idx]
+        return K[0].copy() if escalar else K
+
+    def rigidez(self, i):
+        """ Matriz de rigidez en globales de la barra i, de su dimensión """
+        d = DIMENSION[int(self.barras["tipo"][i])]
+        return self.rigideces(i)[:d, :d].copy()
+
+# Vista de sólo lectura, sin copia, de la matriz de la barra i en la
+# caché. Refleja los recálculos de la caché mientras ésta no se amplíe
+# (al añadir barras); después conviene pedirla de nuevo
+    def vista_rigidez(self, i):
+        """ Matriz en caché de la barra i, de su dimensión y de sólo lectura """
+        self._actualiza_rigideces(np.array([i]))
+        tipo = int(self.barras["tipo"][i])
+        d = DIMENSION[tipo]
+        K = self._K_p3d[self._fila_p3d[i]] if tipo == TIPO_P3D else self._K[i, :d, :d]
+        K = K.view()
+        K.flags.writeable = False
+        return K
+
+# Bloques ii, ij, ji, jj de todas las barras pedidas, listos para
+# sumarlos en la matriz global: B[e,0,1] es el bloque ij de la barra e
+    def bloques(self, barras=slice(None)):
+        """ Pila (n,2,2,d,d) de bloques de barras de un mismo tipo """
+        escalar, idx = self._indices(barras)
+        tipos = np.unique(self.barras["tipo"][idx])
+        if tipos.size > 1:
+            raise ValueError("Los bloques se piden para barras de un mismo tipo")
+        d = DIMENSION[int(tipos[0])] if tipos.size else 6
+        return bloques_lote(np.ascontiguousarray(self.rigideces(idx)[:, :d, :d]))
+
+    def estadisticas_cache(self):
+        return {clave: {"aciertos": self.aciertos[clave], "fallos": self.fallos[clave]}
+                for clave in self.aciertos}
+
+# Estructura por defecto: la usan los puntos y barras que se crean sin
+# indicar otra, como en los ejemplos (p1 = Punto2D(0,0)). Guarda todos
+# esos puntos y barras mientras dure el proceso: si se ejecutan varios
+# ejemplos en el mismo intérprete, conviene llamar antes a
+# reinicia_estructura(). Las vistas creadas antes siguen apuntando a la
+# estructura anterior
+ESTRUCTURA = Estructura()
+
+def reinicia_estructura():
+    """ Sustituye la estructura por defecto por una vacía, y la devuelve """
+    global ESTRUCTURA
+    ESTRUCTURA = Estructura()
+    return ESTRUCTURA
+
+#---------------------------------------------------------------
+# Definición de la clase "Punto". Coordenadas (x, y, z) de un punto
+#    Es una vista de una fila de la tabla de nudos.
+#    Ejemplo: p1 = Punto(1,2,3) añade el nudo (1,2,3) a la estructura
+#             por defecto. p1.coords() muestra (1, 2,3)
+#    Dos vistas del mismo nudo son iguales (p == q)
+#---------------------------------------------------------------
+def _coordenada(k):
+    def lee(self):
+        return float(self.estructura.nudos._datos["xyz"][self.i, k])
+    def escribe(self, valor):
+        self.estructura.nudos.modifica("xyz", (self.i, k), valor)
+    return property(lee, escribe)
+
+class Punto:
+    """ Clase para representar los puntos en 3D, coordenadas x, y, z """
+    __slots__ = ("estructura", "i")
+
+    def __init__(self, x=0, y=0, z=0, estructura=None):
+        self.estructura = ESTRUCTURA if estructura is None else estructura
+        self.i = self.estructura.nudos.agrega(xyz=(x, y, z))
+
+    @classmethod
+    def vista(cls, estructura, i):
+        """ Vista del nudo i de la estructura, sin añadir ninguna fila """
+        p = object.__new__(cls)
+        p.estructura = estructura
+        p.i = int(i)
+        return p
+
+    x = _coordenada(0)
+    y = _coordenada(1)
+    z = _coordenada(2)
+
+    def __eq__(self, otro):
+        return (isinstance(otro, Punto) and otro.estructura is self.estructura
+                and otro.i == self.i)
+
+    def __hash__(self):
+        return hash((id(self.estructura), self.i))
+
+    def coords(self):
+        return "({0:g}, {1:g},{2:g})".format(self.x, self.y, self.z)
+
+class Punto2D(Punto):
+    """ Clase para representar los puntos en 2D, coordenadas x, y """
+    __slots__ = ()
+
+    def __init__(self, x=0, y=0, estructura=None):
+        Punto.__init__(self, x, y, 0, estructura)
+
+    def coords(self):
+        return "({0:g}, {1:g})".format(self.x, self.y)
+
+#---------------------------------------------------------------
+# Definición de la función "longitud"
+# Calcula la distancia entre dos puntos (2D o 3D)
+#---------------------------------------------------------------
+def longitud(p1, p2):
+    """ Devuelve la longitud (módulo) del vector p1-p2 """
+    Longitud = 0
+    Longitud += (p2.x - p1.x ) ** 2
+    Longitud += (p2.y - p1.y ) ** 2
+    Longitud += (getattr(p2, "z", 0) - getattr(p1, "z", 0)) ** 2
+    return np.sqrt(Longitud)
+
+#---------------------------------------------------------------
+# Definición de la función "alfa"
+# Devuelve el ángulo que define el vector P1 -> P2 en el plano xy
+#---------------------------------------------------------------
+def alfa(p1,p2):
+    """Angulo P1 -> P2"""
+    return np.arctan2(p2.y - p1.y, p2.x - p1.x)
+
+#---------------------------------------------------------------
+# Clase base de las barras: vista de una fila de la tabla de barras
+#     p1, p2: vistas de los nudos inicial y final
+#     longitud(), alfa(): geometría leída de la tabla
+#---------------------------------------------------------------
+class _Barra:
+    """ Vista de una barra de la tabla de barras """
+    __slots__ = ("estructura", "i")
+    TIPO = None
+    PUNTO = Punto2D
+
+    def _crea(self, p1, p2, A, I=0., Iy=0., J=0., giro=0.):
+        if p1.estructura is not p2.estructura:
+            raise ValueError("Los puntos de la barra son de estructuras distintas")
+        self.estructura = est = p1.estructura
+        seccion = est.secciones.agrega(A=A, I=I, Iy=Iy, J=J)
+        self.i = est.barras.agrega(nudos=(p1.i, p2.i), tipo=self.TIPO,
+                                   seccion=seccion, material=0, giro=giro)
+
+    @classmethod
+    def vista(cls, estructura, i):
+        """ Vista de la barra i de la estructura, sin añadir ninguna fila """
+        b = object.__new__(cls)
+        b.estructura = estructura
+        b.i = int(i)
+        return b
+
+    def _nudo(self, k):
+        return self.PUNTO.vista(self.estructura, self.estructura.barras["nudos"][self.i, k])
+
+    @property
+    def p1(self):
+        return self._nudo(0)
+
+    @property
+    def p2(self):
+        return self._nudo(1)
+
+    def _E(self):
+        return self.estructura.materiales["E"][self.estructura.barras["material"][self.i]]
+
+    def _seccion(self):
+        return self.estructura.barras["seccion"][self.i]
+
+    @property
+    def ea(self):
+        return float(self.estructura.ea(self.i))
+
+# Al cambiar EA (o EI) se modifica la sección de la barra, y por tanto
+# la de todas las barras que compartan esa sección
+    @ea.setter
+    def ea(self, valor):
+        self.estructura.secciones.modifica("A", self._seccion(), valor / self._E())
+
+    def longitud(self):
+        return float(self.estructura.geometria(self.i)[0])
+
+    def alfa(self):
+        d = self.estructura.geometria(self.i)[1]
+        return float(np.arctan2(d[1], d[0]))
+
+# Los cuatro bloques (ii, ij, ji, jj) de la matriz en globales, de una
+# sola vez. Son vistas de sólo lectura de la matriz guardada en caché,
+# sin copia (ver Estructura.vista_rigidez)
+    def K_global_bloques(self):
+        K = self.estructura.vista_rigidez(self.i)
+        d = K.shape[0] // 2
+        return K[:d, :d], K[:d, d:], K[d:, :d], K[d:, d:]
+
+    def __eq__(self, otro):
+        return (isinstance(otro, _Barra) and otro.estructura is self.estructura
+                and otro.i == self.i)
+
+    def __hash__(self):
+        return hash((id(self.estructura), self.i))
+
+#---------------------------------------------------------------
+# Definición de la clase "P2D", para barra P2D
+#---------------------------------------------------------------
+# Inicialización: A partir de dos puntos, y los parámetros EA, EI
+# Funciones de la clase:
+#     K_local: Para obtener la matriz de rigidez en locales (6x6)
+#     M_lg: Matriz de cambio de base de Locales a Globales (6x6)
+#     K_global: Para obtener la matriz de rigidez en globales (6x6)
+#     K_global_caja(i,j): Para obtener la submatriz ij en globales (3x3)
+#     K_global_bloques: Las cuatro submatrices (11, 12, 21, 22) a la vez
+#     K_Condensa_Giro(nodo): Matriz en globales con un giro condensado
+
+class P2D(_Barra):
+    """ Clase para representar la barra P2D """
+    __slots__ = ()
+    TIPO = TIPO_P2D
+
+    def __init__(self, p1 = None, p2 = None, ea = 0, ei = 0):
+        self._crea(Punto2D() if p1 is None else p1,
+                   Punto2D() if p2 is None else p2, ea, ei)
+
+    @property
+    def ei(self):
+        return float(self.estructura.ei(self.i))
+
+    @ei.setter
+    def ei(self, valor):
+        self.estructura.secciones.modifica("I", self._seccion(), valor / self._E())
+
+    def K_local(self):
+        return k_p2d_local_lote(self.ea, self.ei, self.longitud())[0]
+
+    def M_lg(self):
+        return m_lg_p2d_lote(self.alfa())[0]
+
+    def K_global(self):
+        return self.estructura.rigidez(self.i)
+
+# Función para extraer una submatriz
+    def K_global_caja(self,icol=1,jcol=1):
+        if (icol not in ([1,2]) or jcol not in ([1,2]) ):
+            print("Valores de icol, jcol fuera de rango")
+            return
+        return self.K_global_bloques()[(icol - 1) * 2 + jcol - 1]
+
+# Matriz de rigidez con giro condensado en globales (5x5)
+#     Si nodo = 1, giro condensado en nodo inicial
+#     Si nodo = 2, giro condensado en nodo final
+    def K_Condensa_Giro(self,nodo=2) :
+        indice = nodo*3-1 # Indice local del GDL en giro, en vector de Python
+        kc, T = condensa_lote(self.K_global()[None], [indice])
+        resto = [i for i in range(6) if i != indice]
+        return kc[0][np.ix_(resto, resto)]
+
+#---------------------------------------------------------------
+# Definición de la clase "A2D", para barra A2D
+#---------------------------------------------------------------
+# Inicialización: A partir de dos puntos, y el parámetro ea
+# Funciones de la clase:
+#     K_local : Para obtener la matriz de rigidez en locales (2x2)
+#     M_lg : Matriz de cambio de base de Locales a Globales (4x2)
+#     K_global: Para obtener la matriz de rigidez en globales (4x4)
+#     K_global_caja(i,j): Para obtener la submatriz en ij en globales (2x2)
+#     K_global_bloques: Las cuatro submatrices (11, 12, 21, 22) a la vez
+
+class A2D(_Barra):
+    """ Clase para representar la barra A2D """
+    __slots__ = ()
+    TIPO = TIPO_A2D
+
+    def __init__(self, p1 = None, p2 = None, ea = 0):
+        self._crea(Punto2D() if p1 is None else p1,
+                   Punto2D() if p2 is None else p2, ea)
+
+    def K_local(self):
+        EA, L = self.ea, self.longitud()
+        return np.array([[EA / L, -EA / L],
+                         [-EA / L, EA / L]])
+
+    def M_lg(self):
+        Angulo = self.alfa()
+        return np.array([[np.cos(Angulo), 0],
+                         [np.sin(Angulo), 0],
+                         [0, np.cos(Angulo)],
+                         [0, np.sin(Angulo)]])
+
+    def K_global(self):
+        return self.estructura.rigidez(self.i)
+
+# Función para extraer una submatriz
+    def K_global_caja(self,icol=1,jcol=1):
+        if (icol not in ([1,2]) or jcol not in ([1,2]) ):
+            print("Valores de icol, jcol fuera de rango")
+            return
+        return self.K_global_bloques()[(icol - 1) * 2 + jcol - 1]
+
+#---------------------------------------------------------------
+# Definición de la clase A3D, para barra articulada 3D
+#---------------------------------------------------------------
+# Inicialización: A partir de dos puntos (Punto), y el parámetro EA
+# Funciones de la clase:
+#     mrig_local: Matriz de rigidez en locales (2x2)
+#     m_lg: Matriz de cambio de base de Locales a Globales (6x2)
+#     mrig_global: Matriz de rigidez en globales (6x6)
+#     imprime_mrig: Escribe por pantalla la matriz en globales
+
+class A3D(_Barra):
+    """ Clase para representar la barra articulada 3D """
+    __slots__ = ()
+    TIPO = TIPO_A3D
+    PUNTO = Punto
+
+    def __init__(self, p1 = None, p2 = None, EA = 0):
+        self._crea(Punto() if p1 is None else p1,
+                   Punto() if p2 is None else p2, EA)
+
+    def mrig_local(self):
+        EA, L = self.ea, self.longitud()
+        return np.array([[EA / L, -EA / L],
+                         [-EA / L, EA / L]])
+
+    def m_lg(self):
+# Vector unitario de dirección p1 apuntando a p2
+        vx, vy, vz = self.estructura.geometria(self.i)[1]
+        return np.array([[vx, 0],
+                         [vy, 0],
+                         [vz, 0],
+                         [0,  vx],
+                         [0,  vy],
+                         [0,  vz]])
+
+    def mrig_global(self):
+        return self.estructura.rigidez(self.i)
+
+    def imprime_mrig(self):
+        np.set_printoptions(precision=3)
+        print(self.mrig_global())
+
+#---------------------------------------------------------------
+# Definición de la clase P3D, para barra de pórtico 3D
+#---------------------------------------------------------------
+# Inicialización: A partir de dos puntos (Punto), y los parámetros EA,
+# GJ, EIy, EIz. Los ejes locales se orientan con el giro beta (en
+# radianes) o con un vector de referencia (ver rigidez.py)
+# Funciones de la clase:
+#     ejes: Matriz R (3x3) de ejes locales (filas x', y', z')
+#     K_local: Para obtener la matriz de rigidez en locales (12x12)
+#     M_lg: Matriz de cambio de base de Locales a Globales (12x12)
+#     K_global: Para obtener la matriz de rigidez en globales (12x12)
+#     K_global_caja(i,j): Para obtener la submatriz ij en globales (6x6)
+#     K_global_bloques: Las cuatro submatrices (11, 12, 21, 22) a la vez
+
+class P3D(_Barra):
+    """ Clase para representar la barra de pórtico 3D """
+    __slots__ = ()
+    TIPO = TIPO_P3D
+    PUNTO = Punto
+
+    def __init__(self, p1 = None, p2 = None, ea = 0, gj = 0, eiy = 0, eiz = 0,
+                 giro = 0., referencia = None):
+        p1 = Punto() if p1 is None else p1
+        p2 = Punto() if p2 is None else p2
+        if referencia is not None:
+            v = np.array([p2.x - p1.x, p2.y - p1.y, p2.z - p1.z])
+            giro = float(giro_referencia_lote(v / np.linalg.norm(v), referencia)[0])
+        self._crea(p1, p2, ea, eiz, eiy, gj, giro)
+
+    @property
+    def gj(self):
+        return float(self.estructura.gj(self.i))
+
+    @gj.setter
+    def gj(self, valor):
+        G = self.estructura.materiales["G"][self.estructura.barras["material"][self.i]]
+        self.estructura.secciones.modifica("J", self._seccion(), valor / G)
+
+    @property
+    def eiy(self):
+        return float(self.estructura.eiy(self.i))
+
+    @eiy.setter
+    def eiy(self, valor):
+        self.estructura.secciones.modifica("Iy", self._seccion(), valor / self._E())
+
+    @property
+    def eiz(self):
+        return float(self.estructura.ei(self.i))
+
+    @eiz.setter
+    def eiz(self, valor):
+        self.estructura.secciones.modifica("I", self._seccion(), valor / self._E())
+
+    @property
+    def giro(self):
+        return float(self.estructura.barras["giro"][self.i])
+
+    @giro.setter
+    def giro(self, valor):
+        self.estructura.barras.modifica("giro", self.i, valor)
+
+    def ejes(self):
+        return self.estructura.ejes(self.i)[0]
+
+    def K_local(self):
+        return k_p3d_local_lote(self.ea, self.gj, self.eiy, self.eiz, self.longitud())[0]
+
+    def M_lg(self):
+        return m_lg_p3d_lote(self.ejes())[0]
+
+    def K_global(self):
+        return self.estructura.rigidez(self.i)
+
+# Función para extraer una submatriz
+    def K_global_caja(self,icol=1,jcol=1):
+        if (icol not in ([1,2]) or jcol not in ([1,2]) ):
+            print("Valores de icol, jcol fuera de rango")
+            return
+        return self.K_global_bloques()[(icol - 1) * 2 + jcol - 1]